@@ -1,9 +1,24 @@
-import pytest
 import os
+import pytest
 from framework.api.core.api_client import APIClient
+from framework.api.core.client_registry import ClientRegistry
 from dotenv import load_dotenv
 from framework.api.core.context import TestContext
 from framework.api.tools.connection_tools import ConnectionTools
+from framework.api.core.transcript import request_transcript, is_debug_enabled
+from framework.api.core.metrics import latency_metrics
+from framework.api.core.cassette import Cassette, MODE_OFF, cassette_mode, cassette_path, cassettes
+from framework.api.core.session_broker import session_broker
+from framework.api.core.shared_state import remove_shared_state, run_id
+from framework.api.core.logger import logger
+from framework.api.models.pool_models import PoolConfig
+from framework.api.resources.disks.collection_inventory import collection_inventory
+from framework.api.resources.disks.disk_ledger import disk_ledger, ledger_owner, node_owner
+from framework.api.resources.disks.disk_needs import DiskNeeds, claim_disks, hold_disks
+from framework.api.resources.pools.pool_feasibility import PoolFeasibility, expand_pool_matrix
+from framework.api.resources.pools.pool_matrix import PoolMatrix
+from framework.api.utils.generators import Generates
+from framework.emulator.transport import build_transports
 
 #   Загрузка переменных окружения из .env файла. Нужно для переключения между нодами.
 load_dotenv()
@@ -13,6 +28,308 @@ load_dotenv()
 #     from framework.utils.serializer import Serializer
 #     Serializer.current_test = item
 
+def pytest_addoption(parser):
+    group = parser.getgroup("emulator", "Эмулятор СХД внутри процесса")
+    group.addoption(
+        "--emulator", action="store_true",
+        default=os.getenv("API_EMULATOR", "").lower() in ("1", "true", "yes"),
+        help="Выполнять запросы к эмулятору внутри процесса вместо кластера (или API_EMULATOR=1)"
+    )
+    group.addoption(
+        "--emulator-disks", type=int, default=int(os.getenv("EMULATOR_DISKS", 256)),
+        help="Количество дисков эмулируемого кластера"
+    )
+    group = parser.getgroup("pools", "Проверка конфигураций пулов при сборе")
+    group.addoption(
+        "--no-pool-feasibility", action="store_true", default=False,
+        help="Не запрашивать инвентарь кластера при сборе: pool_config, pool_matrix и needs_disks "
+             "не проверяются по дискам кластера (или API_COLLECTION_INVENTORY=0)"
+    )
+
+
+def _pool_feasibility(config):
+    """
+    Проверка конфигураций пулов по инвентарю кластера, снятому один раз при сборе тестов
+    (см. collection_inventory.py). None - проверка выключена, идёт только сбор (--collect-only)
+    или кластер недоступен: тогда тесты не отсеиваются.
+    """
+    if not hasattr(config, "pool_feasibility"):
+        config.pool_feasibility = None
+        if config.getoption("--no-pool-feasibility") or config.option.collectonly:
+            return None
+        try:
+            nodes = ConnectionTools(None).get_available_nodes()
+            # С --emulator инвентарь берётся у такого же эмулируемого кластера, как у воркеров
+            transports = build_transports(nodes, disk_count=config.getoption("--emulator-disks")) \
+                if config.getoption("--emulator") else None
+            inventory = collection_inventory(nodes, transports)
+        except Exception as e:
+            logger.warning(f"Cluster inventory for collection is unavailable, pool configs are not checked: {e}")
+            return None
+        config.pool_feasibility = PoolFeasibility(inventory) if inventory is not None else None
+    return config.pool_feasibility
+
+
+def pytest_generate_tests(metafunc):
+    """
+    Параметризует pool_config матрицей конфигураций из маркера pool_matrix. Конфигурации,
+    которые не помещаются на кластер, снимаются с запуска в pytest_collection_modifyitems.
+
+    Example:
+        @pytest.mark.pool_matrix(auto_configure=False, raid_type="raid5", mainDisks=[3, 4], spareDisks=[0, 1])
+        def test_pool(framework_context, pool_config): ...
+    """
+    marker = metafunc.definition.get_closest_marker("pool_matrix")
+    if marker is None:
+        return
+    if "pool_config" not in metafunc.fixturenames:
+        raise pytest.UsageError(f"{metafunc.definition.nodeid}: pool_matrix requires the pool_config argument")
+
+    configs = expand_pool_matrix(**marker.kwargs)
+    metafunc.parametrize("pool_config", [config for _, config in configs],
+                         ids=[config_id for config_id, _ in configs])
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    """
+    Выполняется после отбора тестов (-k, -m): инвентарь кластера запрашивается, только если среди отобранных
+    есть тесты с pool_config или needs_disks (см. _pool_feasibility).
+
+    Конфигурации матрицы pool_matrix, которые не помещаются на кластер, снимаются с запуска (deselected).
+    Остальные тесты с такой конфигурацией пула (параметр pool_config) пропускаются: без этого тест ждал бы
+    в повторах disk_operation_with_retry и падал с "Insufficient disks".
+    Негативные тесты (nc) не пропускаются - они могут проверять отказ сервера.
+
+    Тесты с pool_config, которые помещаются на кластер, ставятся подряд волнами PoolMatrix (см. _schedule_pool_waves).
+
+    Тесты с маркером needs_disks ставятся после остальных, большие требования - первыми (см. disk_needs.py):
+    к их запуску остальные тесты уже сняли свои резервы, и воркер не ждёт дисков, пока у него есть другие тесты.
+    Требования, которые кластер не выполнит даже пустым, пропускаются.
+    """
+    pool_items = [item for item in items if isinstance(_pool_config(item), PoolConfig)]
+    needs = {}
+    for item in items:
+        marker = item.get_closest_marker("needs_disks")
+        if marker is not None:
+            try:
+                needs[item] = DiskNeeds.from_marker(marker)
+            except ValueError as e:
+                raise pytest.UsageError(f"{item.nodeid}: {e}")
+
+    feasibility = _pool_feasibility(config) if pool_items or needs else None
+    if feasibility is not None:
+        deselected = []
+        for item in pool_items:
+            reason = feasibility.reason(_pool_config(item))
+            if reason is None:
+                continue
+            if item.get_closest_marker("pool_matrix"):
+                deselected.append(item)
+            elif not item.get_closest_marker("nc"):
+                item.add_marker(pytest.mark.skip(reason=f"Pool config does not fit the cluster: {reason}"))
+        if deselected:
+            logger.info(f"Pool configs do not fit the cluster: {[item.nodeid for item in deselected]}")
+            config.hook.pytest_deselected(items=deselected)
+            deselected = set(deselected)
+            items[:] = [item for item in items if item not in deselected]
+        for item, item_needs in needs.items():
+            if not item_needs.is_possible(feasibility.inventory):
+                item.add_marker(pytest.mark.skip(reason=f"Cluster cannot satisfy needs_disks({item_needs})"))
+        _schedule_pool_waves(items, feasibility)
+
+    if needs:
+        items[:] = [item for item in items if item not in needs] \
+            + sorted((item for item in items if item in needs), key=lambda item: -needs[item].total())
+
+
+def _pool_config(item):
+    return getattr(item, "callspec", None) and item.callspec.params.get("pool_config")
+
+
+def _schedule_pool_waves(items, feasibility: PoolFeasibility):
+    """
+    Раскладывает отобранные тесты с pool_config (в том числе из pool_matrix) всех модулей сессии по волнам
+    PoolMatrix на инвентаре сбора и ставит их подряд, волна за волной, на место первого такого теста.
+    Пулы одной волны помещаются на кластер вместе: под pytest-xdist воркеры получают тесты волны
+    одновременно и создают их пулы параллельно, а тесты следующей волны идут после них.
+    Без xdist тесты по-прежнему выполняются по одному - порядок волн на это не влияет.
+
+    Инвентарь сбора общий для воркеров (collection_inventory.py), поэтому порядок тестов у них совпадает.
+    Пропущенные тесты, тесты с needs_disks и конфигурации, которые не помещаются, остаются на своих местах.
+    Негативные тесты (nc) тоже не переставляются: они могут рассчитывать на состояние кластера на своём месте.
+    Номер волны теста записывается в item.user_properties ("pool_wave").
+    """
+    scheduled = [item for item in items if isinstance(_pool_config(item), PoolConfig)
+                 and not any(item.get_closest_marker(name) for name in ("skip", "nc", "needs_disks"))]
+    if len(scheduled) < 2:
+        return
+    matrix = PoolMatrix()
+    for item in scheduled:
+        matrix.add(_pool_config(item), key=item.nodeid)
+    schedule = matrix.schedule(feasibility.inventory)
+
+    by_nodeid = {item.nodeid: item for item in scheduled}
+    ordered = []
+    for wave in schedule.waves:
+        for nodeid in wave.keys:
+            by_nodeid[nodeid].user_properties.append(("pool_wave", wave.index))
+            ordered.append(by_nodeid[nodeid])
+    waved = set(ordered)
+    first = items.index(scheduled[0])
+    rest = [item for item in items if item not in waved]
+    items[:] = rest[:first] + ordered + rest[first:]
+
+
+def pytest_runtest_setup(item):
+    """
+    Допуск теста с маркером needs_disks до его фикстур: ждёт по журналу резервов, пока другие тесты снимут
+    свои резервы, и резервирует диски за тестом (см. disk_needs.py). Тест не логинится, пока ждёт.
+    Без инвентаря сбора диски резервирует фикстура disk_needs.
+    """
+    marker = item.get_closest_marker("needs_disks")
+    if marker is None:
+        return
+    feasibility = _pool_feasibility(item.config)
+    if feasibility is None:
+        return
+    try:
+        hold_disks(DiskNeeds.from_marker(marker), feasibility.inventory, node_owner(item.nodeid))
+    except TimeoutError as e:
+        pytest.fail(str(e))
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_teardown(item):
+    """Снимает резерв needs_disks, если тест упал до framework_context (он снимает резервы теста сам)"""
+    if item.get_closest_marker("needs_disks") is not None:
+        disk_ledger.release_owner(node_owner(item.nodeid))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Сохраняет отчёт каждой фазы теста в item, чтобы фикстуры знали об упавших тестах"""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+
+
+def pytest_sessionfinish(session):
+    """
+    Сохраняет метрики задержек API: воркер xdist передаёт их контроллеру, контроллер пишет JSON.
+    Контроллер (или процесс без xdist) удаляет файлы общего состояния прогона (shared_state.py).
+    """
+    if hasattr(session.config, "workeroutput"):
+        session.config.workeroutput["api_metrics"] = latency_metrics.to_dict()
+        session.config.workeroutput["shared_state_run"] = run_id()
+        return
+    if latency_metrics:
+        session.config.api_metrics_path = latency_metrics.export_json()
+    for run in getattr(session.config, "shared_state_runs", set()) | {run_id()}:
+        remove_shared_state(run)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Собирает метрики задержек и идентификатор прогона (для удаления общего состояния) с воркеров pytest-xdist"""
+    workeroutput = getattr(node, "workeroutput", {})
+    latency_metrics.merge_dict(workeroutput.get("api_metrics", {}))
+    if "shared_state_run" in workeroutput:
+        if not hasattr(node.config, "shared_state_runs"):
+            node.config.shared_state_runs = set()
+        node.config.shared_state_runs.add(workeroutput["shared_state_run"])
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Печатает p50/p90/p99/max задержек по эндпоинтам API"""
+    if not latency_metrics:
+        return
+    terminalreporter.write_sep("=", "API latency by endpoint")
+    terminalreporter.write_line(latency_metrics.format_table())
+    if getattr(config, "api_metrics_path", None):
+        terminalreporter.write_line(f"JSON export: {config.api_metrics_path}")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def api_session_cassette():
+    """
+    Сессионная кассета (API_CASSETTE_MODE=record/replay): запросы вне тестов
+    (logout в teardown сессионных фикстур) и все запросы авторизации.
+    Записывать кассеты нужно без pytest-xdist: воркеры перезапишут сессионную кассету друг друга.
+    """
+    mode = cassette_mode()
+    if mode == MODE_OFF:
+        yield None
+        return
+
+    with cassettes.use(Cassette(cassette_path("__session__"), mode), session=True) as cassette:
+        yield cassette
+
+
+@pytest.fixture(autouse=True)
+def api_cassette(request):
+    """Кассета текущего теста. Генератор имён инициализируется от nodeid, чтобы имена пулов совпадали."""
+    mode = cassette_mode()
+    if mode == MODE_OFF:
+        yield None
+        return
+
+    Generates.seed(request.node.nodeid)
+    with cassettes.use(Cassette(cassette_path(request.node.nodeid), mode)) as cassette:
+        yield cassette
+
+
+@pytest.fixture(autouse=True)
+def http_transcript(request):
+    """
+    Журнал HTTP-запросов текущего теста.
+
+    Перед тестом буфер очищается, после теста запросы рендерятся в cURL и прикладываются
+    к Allure/TestIT только если тест упал (или включён API_DEBUG_TRANSCRIPT).
+    """
+    request_transcript.clear()
+
+    yield request_transcript
+
+    reports = (getattr(request.node, "rep_setup", None), getattr(request.node, "rep_call", None))
+    if any(report is not None and report.failed for report in reports) or is_debug_enabled():
+        request_transcript.attach()
+
+
+@pytest.fixture(autouse=True)
+def disk_needs(request):
+    """
+    Диски теста с маркером needs_disks (без маркера - None). Резерв, сделанный при допуске теста
+    (pytest_runtest_setup), сверяется с текущим инвентарём кластера: по снимку сбора диски могли оказаться
+    заняты. Если резерва нет или он устарел, диски резервируются одной попыткой (см. disk_needs.py).
+
+    Example:
+        @pytest.mark.needs_disks(hdd=7, ssd=2, wc=2)
+        def test_pool(framework_context, disk_needs): ...
+    """
+    marker = request.node.get_closest_marker("needs_disks")
+    if marker is None:
+        yield None
+        return
+
+    needs = DiskNeeds.from_marker(marker)
+    context = request.getfixturevalue("framework_context")
+    owner = ledger_owner(context)
+    inventory = context.tools_manager.cluster.snapshot().inventory
+    if not needs.is_possible(inventory):
+        pytest.skip(f"Cluster cannot satisfy needs_disks({needs})")
+    held = disk_ledger.held_by(owner)
+    disks = needs.pick(inventory, exclude=set(inventory) - held) if held else None
+    if disks is None:
+        disk_ledger.release(owner, held)
+        disks = claim_disks(needs, inventory, owner)
+    if disks is None:
+        pytest.fail(f"Cluster has no free disks for needs_disks({needs})")
+
+    # Резерв снимается в teardown framework_context вместе с остальными резервами теста
+    yield disks
+
+
 @pytest.fixture(scope="session")
 def connection_tools():
     """
@@ -61,18 +378,57 @@ def base_url(request, connection_tools):
         return connection_tools.get_current_config().url
 
 
+@pytest.fixture(scope="session")
+def emulator_transports(request, connection_tools):
+    """
+    Транспорты эмулятора по нодам из .env, если тесты запущены с --emulator, иначе None.
+
+    Все ноды работают поверх одного эмулируемого кластера, запросы обрабатываются
+    внутри процесса без сокетов, но проходят через handle_http и сессию ноды (SessionStore).
+    """
+    if not request.config.getoption("--emulator"):
+        return None
+    # У каждого воркера xdist свой кластер эмулятора: сессия и диски одного воркера неизвестны другим
+    session_broker.enabled = False
+    disk_ledger.shared = False
+    return build_transports(
+        connection_tools.get_available_nodes(),
+        disk_count=request.config.getoption("--emulator-disks")
+    )
+
+
+@pytest.fixture(scope="session")
+def client_registry(connection_tools, emulator_transports):
+    """
+    Реестр API клиентов по нодам на всю сессию.
+
+    У каждой ноды из .env (NODE_1, NODE_2...) свой клиент: отдельный пул соединений
+    с keep-alive, опциональный HTTP/2 (API_HTTP2=1) и свои куки. Лимиты соединений
+    задаются переменными API_MAX_CONNECTIONS, API_MAX_KEEPALIVE, API_KEEPALIVE_EXPIRY, API_TIMEOUT.
+    С --emulator клиенты нод работают через транспорт эмулятора.
+    """
+    registry = ClientRegistry(connection_tools.get_available_nodes(), transports=emulator_transports)
+
+    yield registry
+
+    registry.close()
+
+
 @pytest.fixture
-def node_switcher(framework_context):
+def node_switcher(framework_context, client_registry):
     """
     Фикстура предоставляет функцию для динамического переключения между нодами в рамках одного теста.
 
     Создает и возвращает замыкание, которое позволяет:
     - Переключаться между нодами в любой момент выполнения теста
-    - Автоматически обновлять base_url в клиенте
+    - Подменять клиент контекста на клиент выбранной ноды из реестра (без переподключения)
     - Сохранять контекст подключения
 
+    После теста контексту возвращается исходный клиент.
+
     Args:
         framework_context: Контекст тестового фреймворка
+        client_registry: Реестр клиентов по нодам
 
     Returns:
         Callable[[str], None]: Функция switch_to для переключения на указанную ноду
@@ -85,27 +441,38 @@ def node_switcher(framework_context):
             # выполняем действия на NODE_2
     """
     connection_tool = framework_context.tools_manager.connection
+    original_client = framework_context.client
+    original_config = connection_tool.get_current_config()
 
     def switch_to(node: str):
         connection_tool.configure(node)
-        framework_context.client.base_url = os.getenv(node)
+        framework_context.client = client_registry.get(node)
+        framework_context.base_url = framework_context.client.base_url
+
+    yield switch_to
 
-    return switch_to
+    framework_context.client = original_client
+    framework_context.base_url = original_client.base_url
+    if original_config:
+        connection_tool.configure(original_config.node)
 
 
 @pytest.fixture(scope="session")
-def client(base_url):
+def client(base_url, client_registry, connection_tools):
     """
-    Фикстура для инициализации APIClient с правильным base_url
-    Scope: function
-    Установка scope="function" здесь нужно, что бы каждый тест мог использовать разные значения base_url.
-    Это позволяет создавать новый экземпляр APIClient для каждого теста,
-    что обеспечивает изоляцию и предотвращает возможные проблемы с состоянием.
+    Фикстура возвращает APIClient выбранной ноды из реестра клиентов.
+
+    Клиент берётся из client_registry, поэтому повторная параметризация той же ноды
+    переиспользует соединения и куки. Если нода не выбрана через base_url - создаётся
+    отдельный клиент на base_url.
 
     :param base_url:
     :return:
     """
-    return APIClient(base_url)
+    current_config = connection_tools.get_current_config()
+    if current_config is None:
+        return APIClient(base_url)
+    return client_registry.get(current_config.node)
 
 # Строчка для распаралеливания тестов. Копирует контекст независимый от другого.
 # context = copy.deepcopy(base_framework_context)
@@ -123,8 +490,36 @@ def base_framework_context(client, base_url, request):
 
 @pytest.fixture(scope="function")
 def framework_context(base_framework_context, request):
-    """Context with authentication"""
+    """
+    Context with authentication.
+    Пока тест идёт, его резервы дисков (disk_ledger) продлеваются, после теста - снимаются.
+    """
     base_framework_context.request = request
     base_framework_context.tools_manager.auth.authentication()
+    # Контекст общий на сессию: кластер мог измениться с прошлого теста
+    base_framework_context.tools_manager.cluster.invalidate()
+    owner = ledger_owner(base_framework_context)
+
+    # Резервы теста продлеваются, пока он идёт: длинный тест не теряет их по API_DISK_LEASE
+    with disk_ledger.keep_alive(owner):
+        yield base_framework_context
+
+    disk_ledger.release_owner(owner)
+
+
+@pytest.fixture(scope="function")
+async def async_framework_context(framework_context):
+    """
+    Context with authentication для асинхронных тестов.
+
+    Асинхронный клиент (context.async_client) привязан к event loop теста,
+    поэтому закрывается после каждого теста.
+
+    Example:
+        async def test_example(async_framework_context):
+            pools = async_framework_context.tools_manager.async_pool
+            responses = await asyncio.gather(*(pools.get_pools() for _ in range(10)))
+    """
+    yield framework_context
 
-    return base_framework_context
+    await framework_context.close_async_client()
@@ -1,9 +1,25 @@
+import asyncio
 import httpx
 from framework.api.core.logger import logger
+import importlib.util
+import os
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List
 from urllib.parse import urlencode
-from framework.api.core.cookie_manager import CookieManager
+from framework.api.core.transcript import request_transcript, is_debug_enabled
+from framework.api.core.batch import BatchResult, RequestSpec, default_concurrency
+from framework.api.core.metrics import latency_metrics
+from framework.api.core.cassette import Cassette, cassettes
+from framework.api.core.session_store import SessionStore
+from framework.api.core.response_cache import response_cache
+from framework.api.utils.retry import RetryPolicy
+from framework.api.core.rate_limiter import rate_limiter
+from framework.api.core.circuit_breaker import circuit_breakers
+from framework.api.resources.endpoints import ApiEndpoints
 
 
 """ Этот модуль предоставляет функциональность для выполнения HTTP-запросов (GET, POST, PUT, DELETE)
@@ -13,7 +29,19 @@ from framework.api.core.cookie_manager import CookieManager
 Основные функции:
     - `handle_http`: Выполняет HTTP-запросы и обрабатывает ошибки.
     - `request_to_curl`: Преобразует параметры запроса в строку cURL. (используется для отладки и отчётности)
+      Запросы складываются в журнал `request_transcript` и рендерятся в cURL только для упавших тестов.
     - Класс `APIClient`: Реализует методы для выполнения CRUD операций.
+    - Класс `AsyncAPIClient`: Асинхронный аналог `APIClient` поверх `httpx.AsyncClient`.
+    - `batch`: Параллельное выполнение списка RequestSpec с ограничением одновременных запросов.
+    - Задержки запросов пишутся в гистограммы `latency_metrics` по шаблонам ApiEndpoints.
+    - При API_CASSETTE_MODE=record/replay запросы пишутся в кассеты или воспроизводятся из них.
+    - Перед отправкой клиент проверяет circuit breaker ноды и лимит частоты `rate_limiter`,
+      сетевые ошибки, 429 и 5xx повторяются по `RetryPolicy`. В цепь пишется один исход на запрос -
+      после последней попытки, поэтому повторы одного запроса не размыкают цепь.
+    - Куки берутся из `SessionStore` ноды, общего для клиентов ноды, AuthTools и TokenRefresher.
+      Запрос, получивший 401 из-за истёкшего токена, повторяется после single-flight обновления сессии.
+    - При API_RESPONSE_CACHE=1 ответы GET кэшируются в `response_cache` по TTL эндпоинта (с ETag),
+      POST/PUT/DELETE сбрасывают связанные записи.
 """
 
 
@@ -57,60 +85,434 @@ def request_to_curl(method, url, headers=None, params=None, json_data=None, cook
     return ' '.join(curl_command)
 
 
-class APIClient:
+_AUTH_ENDPOINTS = (ApiEndpoints.Auth.LOGIN, ApiEndpoints.Auth.REFRESH_TOKENS, ApiEndpoints.Auth.LOGOUT)
+SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
 
-    def __init__(self, base_url):
+
+@dataclass
+class ClientSettings:
+    """
+    Параметры пула соединений клиента.
+
+    Значения по умолчанию берутся из переменных окружения (.env):
+        API_TIMEOUT, API_MAX_CONNECTIONS, API_MAX_KEEPALIVE, API_KEEPALIVE_EXPIRY, API_HTTP2.
+    HTTP/2 требует пакет h2 (pip install httpx[http2]), без него клиент работает по HTTP/1.1.
+    """
+    timeout: float = 40.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> 'ClientSettings':
+        return cls(
+            timeout=float(os.getenv('API_TIMEOUT', cls.timeout)),
+            max_connections=int(os.getenv('API_MAX_CONNECTIONS', cls.max_connections)),
+            max_keepalive_connections=int(os.getenv('API_MAX_KEEPALIVE', cls.max_keepalive_connections)),
+            keepalive_expiry=float(os.getenv('API_KEEPALIVE_EXPIRY', cls.keepalive_expiry)),
+            http2=os.getenv('API_HTTP2', '').lower() in ('1', 'true', 'yes'),
+        )
+
+    def client_kwargs(self) -> dict:
+        """Аргументы для httpx.Client / httpx.AsyncClient"""
+        http2 = self.http2
+        if http2 and importlib.util.find_spec('h2') is None:
+            logger.warning("HTTP/2 requested but package 'h2' is not installed. Falling back to HTTP/1.1")
+            http2 = False
+
+        return {
+            'timeout': self.timeout,
+            'http2': http2,
+            'limits': httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+
+class BaseAPIClient:
+    """Общая часть синхронного и асинхронного клиентов: base_url, куки и логирование"""
+
+    def __init__(self, base_url, session=None, timeout=40.0, transcript=None, settings=None, name=None,
+                 metrics=None, transport=None, retry_policy=None, limiter=None, cache=None):
         """
         Инициализация API клиента.
 
         :param base_url: (str): Базовый URL для API.
+        :param session: (SessionStore, optional): Сессия ноды, общая с другим клиентом (например, асинхронным).
+        :param timeout: (float): Таймаут HTTP-запросов в секундах (если не переданы settings).
+        :param transcript: (RequestTranscript, optional): Журнал запросов, по умолчанию общий request_transcript.
+        :param settings: (ClientSettings, optional): Лимиты пула соединений, keep-alive и HTTP/2.
+        :param name: (str, optional): Имя ноды (NODE_1, NODE_2...), к которой привязан клиент.
+        :param metrics: (LatencyRecorder, optional): Сборщик задержек, по умолчанию общий latency_metrics.
+        :param transport: (httpx.BaseTransport, optional): Транспорт httpx вместо сетевого,
+            например EmulatorTransport для работы с эмулятором внутри процесса.
+        :param retry_policy: (RetryPolicy, optional): Повторы при сетевых ошибках, 429 и 5xx (по умолчанию из .env).
+        :param limiter: (RateLimiter, optional): Ограничитель частоты запросов, по умолчанию общий rate_limiter.
+        :param cache: (ResponseCache, optional): Кэш ответов GET, по умолчанию общий response_cache.
         """
 
         self.base_url = base_url
-        self.http_client = httpx.Client(timeout=40.0)
-        self.cookie_manager = CookieManager()
+        self.name = name
+        self.settings = settings or ClientSettings(timeout=timeout)
+        self.timeout = self.settings.timeout
+        self.session = session or SessionStore()
+        self.transcript = transcript if transcript is not None else request_transcript
+        self.metrics = metrics if metrics is not None else latency_metrics
+        self.transport = transport
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.limiter = limiter if limiter is not None else rate_limiter
+        self.cache = cache if cache is not None else response_cache
+        # Цепь общая для всех клиентов ноды; проверки /health идут через тот же транспорт (например, эмулятор)
+        self.breaker = circuit_breakers.get(
+            str(base_url), transport if isinstance(transport, httpx.BaseTransport) else None
+        )
+        self.debug = is_debug_enabled()
+
+    def _prepare_request(self, method, url, json=None, headers=None, params=None, cookies=None):
+        """
+        Проверяет метод, собирает куки запроса и записывает запрос в журнал.
 
-    def __del__(self):
-        self.http_client.close()
+        :return: tuple: Куки сессии, дополненные кастомными куки запроса, и запись журнала.
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
 
-    def handle_http(self, method, url, json=None, headers=None, params=None, cookies=None):
-        start_time = time.time()
+        request_cookies = self._request_cookies(cookies)
 
-        # Merge default cookies from cookie_manager with custom cookies
-        request_cookies = {
-            **self.cookie_manager.get_current_cookies(),
-            **(cookies or {})
-        }
+        record = self.transcript.record(method, url, headers, params, json, request_cookies)
+        if self.debug:
+            logger.info(f"Equivalent CURL command:\n{record.to_curl()}")
+
+        return request_cookies, record
 
-        curl_command = request_to_curl(method, url, headers, params, json, request_cookies)
-        logger.info(f"Equivalent CURL command:\n{curl_command}")
+    def _request_cookies(self, cookies=None):
+        # Куки сессии передаются без копирования, новый словарь нужен только при кастомных куки
+        return {**self.session.cookies, **cookies} if cookies else self.session.cookies
 
+    def _session_expired(self, url, response, cookies=None) -> bool:
+        """
+        401 на запрос с куки сессии: токен истёк или был обновлён, пока запрос был в пути.
+        Запросы авторизации и запросы с собственным jwt_access не повторяются.
+        """
+        return (
+            response.status_code == 401
+            and self._endpoint_template(url) not in _AUTH_ENDPOINTS
+            and not (cookies and 'jwt_access' in cookies)
+        )
+
+    def _cache_lookup(self, method, url, params=None, cassette=None):
+        """Запись кэша для GET. С кассетами кэш не используется: они должны видеть все запросы теста"""
+        if cassette is not None:
+            return None
+        return self.cache.lookup(self.name or httpx.URL(url).host, method, self._endpoint_template(url), url, params)
+
+    def _cached_response(self, method, url, params, lookup, start_time, record):
+        response = self.cache.hit(lookup, httpx.Request(method, url, params=params))
+        record.status_code = response.status_code
+        record.elapsed = time.time() - start_time
+        logger.info(f"{method} {url} served from cache")
+        return response
+
+    def _update_cache(self, method, url, lookup, response):
+        """Сохраняет ответ GET в кэш или сбрасывает записи, которые устарели после изменения"""
+        if lookup is not None:
+            return self.cache.complete(lookup, response)
+        if method != 'GET' and self.cache.enabled:
+            self.cache.invalidate(self._endpoint_template(url))
+        return response
+
+    @staticmethod
+    def _request_kwargs(method, json=None, headers=None, params=None, cookies=None):
+        """Аргументы для httpx: GET передаёт params, POST/PUT - тело запроса."""
+        kwargs = {'headers': headers, 'cookies': cookies}
+        if method == 'GET':
+            kwargs['params'] = params
+        elif method in ('POST', 'PUT'):
+            kwargs['json'] = json
+        return kwargs
+
+    def _finalize_response(self, method, url, response, start_time, record):
+        # Update cookies from response
+        self.session.update_from_response(response)
+
+        elapsed_time = time.time() - start_time
+        record.status_code = response.status_code
+        record.elapsed = elapsed_time
+        self.metrics.record(
+            method, self._endpoint_template(url), elapsed_time, response.status_code,
+            self._request_size(response), self._response_size(response)
+        )
+        logger.info(f"{method} {url} completed with status {response.status_code} in {elapsed_time:.2f} seconds")
+        return response
+
+    def _rate_limit_delay(self, method, url) -> float:
+        """Сколько ждать перед запросом по лимитам ноды (0, если лимиты не заданы)"""
+        if not self.limiter:
+            return 0.0
+        return self.limiter.reserve(self.name or httpx.URL(url).host, method, self._endpoint_template(url))
+
+    @staticmethod
+    def _log_retry(method, url, attempt, delay, response=None, error=None):
+        reason = f"status {response.status_code}" if response is not None else repr(error)
+        logger.warning(f"{method} {url} attempt {attempt} failed ({reason}). Retrying in {delay:.2f}s")
+
+    def _cassette_key(self, method, url, json=None, params=None):
+        node = self.name or httpx.URL(url).host
+        return Cassette.make_key(node, method, self._endpoint_template(url), json, params)
+
+    def _replay(self, method, url, json=None, params=None):
+        """Ответ из активной кассеты вместо обращения к кластеру"""
+        return cassettes.play(self._cassette_key(method, url, json, params), httpx.Request(method, url, params=params))
+
+    def _record(self, cassette, method, url, json, params, response):
+        if cassette is not None and cassette.recording:
+            # login/refresh/logout нужны и тестам, запущенным поодиночке - пишем их и в сессионную кассету
+            shared = self._endpoint_template(url) in _AUTH_ENDPOINTS
+            cassettes.record(self._cassette_key(method, url, json, params), response, shared=shared)
+
+    def _endpoint_template(self, url):
+        """Шаблон ApiEndpoints для URL запроса: группирует /pools/abc и /pools/xyz в /pools/{pool_name}"""
+        if self.base_url and url.startswith(self.base_url):
+            path = url[len(self.base_url):]
+        else:
+            path = httpx.URL(url).path
+        return ApiEndpoints.template_for(path.split('?', 1)[0] or '/')
+
+    @staticmethod
+    def _request_size(response):
         try:
-            # if cookies:
-            #     self.http_client.cookies.update(cookies)
-
-            if method == 'GET':
-                response = self.http_client.get(url, headers=headers, params=params, cookies=request_cookies)
-            elif method == 'POST':
-                response = self.http_client.post(url, json=json, headers=headers, cookies=request_cookies)
-            elif method == 'PUT':
-                response = self.http_client.put(url, json=json, headers=headers, cookies=request_cookies)
-            elif method == 'DELETE':
-                response = self.http_client.delete(url, headers=headers, cookies=request_cookies)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            return len(response.request.content)
+        except (httpx.RequestNotRead, RuntimeError):
+            return 0
+
+    @staticmethod
+    def _response_size(response):
+        # Для потоковых ответов тело ещё не прочитано - берём Content-Length
+        try:
+            return len(response.content)
+        except httpx.ResponseNotRead:
+            return int(response.headers.get('Content-Length', 0))
+
+
+    @staticmethod
+    def log_response(response):
+        """
+        Логирует информацию о ответе от сервера.
 
-            # Update cookies from response
-            self.cookie_manager.update_from_response(response)
+        :param response: (httpx.Response): Ответ от сервера.
+        :return: None
+        """
 
-            elapsed_time = time.time() - start_time
-            logger.info(f"{method} {url} completed with status {response.status_code} in {elapsed_time:.2f} seconds")
-            return response
+        if response.status_code not in (200, 201, 204):
+            logger.error(f"Error response. Status code: {response.status_code} - Body: {response.text}")
+
+
+    @staticmethod
+    def log_request(method, url, headers=None, params=None, json=None, cookies=None):
+        """
+        Логирует информацию о выполненном запросе.
+
+        :param method: (str): Метод HTTP-запроса.
+        :param url: (str): URL запроса.
+        :param headers: (dict or None): Заголовки запроса.
+        :param params: (dict or None): Параметры запроса.
+        :param json: (dict or None): Тело запроса в формате JSON.
+        :return: None
+        """
+
+        logger.info("=== Request Details ===")
+        logger.info(f"{method} Request to {url}")
+        if headers:
+            logger.info("Headers:")
+            for header, value in headers.items():
+                logger.info(f"  {header}: {value}")
+
+        if cookies:
+            logger.info("Cookies:")
+            for cookie, value in cookies.items():
+                logger.info(f"  {cookie}: {value}")
+
+        if params:
+            logger.info(f"Params: {params}")
+
+        if json:
+            logger.info(f"Body: {json}")
+
+        logger.info("=====================")
+
+
+class APIClient(BaseAPIClient):
+
+    def __init__(self, base_url, session=None, timeout=40.0, transcript=None, settings=None, name=None,
+                 metrics=None, transport=None, retry_policy=None, limiter=None, cache=None):
+        super().__init__(base_url, session=session, timeout=timeout, transcript=transcript,
+                         settings=settings, name=name, metrics=metrics, transport=transport,
+                         retry_policy=retry_policy, limiter=limiter, cache=cache)
+        self.http_client = httpx.Client(**self.settings.client_kwargs(), transport=transport)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Закрывает пул соединений клиента"""
+        http_client = getattr(self, 'http_client', None)
+        if http_client is not None and not http_client.is_closed:
+            http_client.close()
+
+    def handle_http(self, method, url, json=None, headers=None, params=None, cookies=None):
+        start_time = time.time()
+        session = self.session.snapshot
+        request_cookies, record = self._prepare_request(method, url, json, headers, params, cookies)
+
+        try:
+            cassette = cassettes.current
+            if cassette is not None and cassette.replaying:
+                response = self._replay(method, url, json, params)
+            else:
+                lookup = self._cache_lookup(method, url, params, cassette)
+                if lookup is not None and lookup.is_fresh():
+                    return self._cached_response(method, url, params, lookup, start_time, record)
+                if lookup is not None:
+                    headers = lookup.validator_headers(headers)
+
+                response = self._send_with_retry(
+                    method, url, self._request_kwargs(method, json, headers, params, request_cookies)
+                )
+                # Сессия обновляется один раз на всех (single-flight), запрос повторяется с новыми куки
+                if self._session_expired(url, response, cookies) and self.session.renew(session):
+                    logger.info(f"{method} {url} returned 401, replaying with the renewed session")
+                    response.close()
+                    response = self._send_with_retry(
+                        method, url, self._request_kwargs(method, json, headers, params, self._request_cookies(cookies))
+                    )
+                response = self._update_cache(method, url, lookup, response)
+                self._record(cassette, method, url, json, params, response)
+            return self._finalize_response(method, url, response, start_time, record)
 
         except httpx.HTTPStatusError as exc:
             logger.error(f"{method} request failed: {exc.response.status_code} - {exc.response.text}", exc_info=exc)
             raise
 
+    def _send_with_retry(self, method, url, request_kwargs, stream=False):
+        """
+        Отправляет запрос, повторяя его по retry_policy.
+        stream=True - тело ответа не читается (решение о повторе принимается по статусу и заголовкам).
+        """
+        policy = self.retry_policy
+        deadline = policy.deadline()
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = self._rate_limit_delay(method, url)
+            if wait:
+                time.sleep(wait)
+            self.breaker.before_request()
+            try:
+                if stream:
+                    request = self.http_client.build_request(method, url, **request_kwargs)
+                    response = self.http_client.send(request, stream=True)
+                else:
+                    response = self.http_client.request(method, url, **request_kwargs)
+            except httpx.TransportError as exc:
+                delay = policy.next_delay(method, attempt, deadline, error=exc)
+                if delay is None:
+                    self.breaker.record_failure(repr(exc))
+                    raise
+                self._log_retry(method, url, attempt, delay, error=exc)
+            else:
+                delay = policy.next_delay(method, attempt, deadline, response=response)
+                if delay is None:
+                    self.breaker.record_response(response)
+                    return response
+                self._log_retry(method, url, attempt, delay, response=response)
+                response.close()
+            time.sleep(delay)
+
+    def send(self, spec: RequestSpec):
+        """
+        Выполняет запрос, описанный RequestSpec.
+
+        :param spec: (RequestSpec): Метод, шаблон эндпоинта и параметры запроса.
+        :return: httpx.Response: Ответ от сервера.
+        """
+        url = f"{self.base_url}{spec.path}"
+        response = self.handle_http(spec.method, url, json=spec.json, headers=spec.headers,
+                                    params=spec.params, cookies=spec.cookies)
+        self.log_response(response)
+        return response
+
+    def batch(self, specs: List[RequestSpec], max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Выполняет запросы параллельно в пуле потоков.
+
+        Ошибки отдельных запросов не пробрасываются, а сохраняются в BatchResult.error.
+
+        :param specs: (list[RequestSpec]): Запросы пакета.
+        :param max_concurrency: (int, optional): Максимум одновременных запросов (API_BATCH_CONCURRENCY).
+        :return: list[BatchResult]: Результаты в порядке specs.
+        """
+        if not specs:
+            return []
+
+        def run(spec):
+            try:
+                return BatchResult(spec, response=self.send(spec))
+            except Exception as e:
+                logger.error(f"Batch request {spec.method} {spec.path} failed: {e}")
+                return BatchResult(spec, error=e)
+
+        workers = min(max_concurrency or default_concurrency(), len(specs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, specs))
+
+    @contextmanager
+    def stream(self, method, endpoint, json=None, headers=None, params=None, cookies=None):
+        """
+        Выполняет запрос без чтения тела ответа целиком.
+
+        Тело читается по частям через response.iter_bytes() внутри блока with.
+        Как и в handle_http: лимит частоты, circuit breaker и повторы по retry_policy (до чтения тела),
+        повтор после обновления сессии при 401, куки и журнал запросов.
+
+        :param method: (str): HTTP метод.
+        :param endpoint: (str): Эндпоинт для запроса.
+        :return: httpx.Response: Потоковый ответ от сервера.
+        """
+        url = f"{self.base_url}{endpoint}"
+        start_time = time.time()
+        session = self.session.snapshot
+        request_cookies, record = self._prepare_request(method, url, json, headers, params, cookies)
+
+        cassette = cassettes.current
+        if cassette is not None and cassette.replaying:
+            response = self._replay(method, url, json, params)
+            self._finalize_response(method, url, response, start_time, record)
+            yield response
+            return
+
+        response = self._send_with_retry(
+            method, url, self._request_kwargs(method, json, headers, params, request_cookies), stream=True
+        )
+        try:
+            if self._session_expired(url, response, cookies) and self.session.renew(session):
+                logger.info(f"{method} {url} returned 401, replaying with the renewed session")
+                response.close()
+                response = self._send_with_retry(
+                    method, url, self._request_kwargs(method, json, headers, params, self._request_cookies(cookies)),
+                    stream=True
+                )
+            if cassette is not None and cassette.recording:
+                # Для записи в кассету тело нужно целиком
+                response.read()
+                self._record(cassette, method, url, json, params, response)
+            self._finalize_response(method, url, response, start_time, record)
+            yield response
+        finally:
+            response.close()
+
     def get(self, endpoint, headers=None, params=None, cookies=None):
         """
         Выполняет GET запрос к указанному эндпоинту.
@@ -145,8 +547,6 @@ class APIClient:
         # self.log_request("POST", url, headers, None, json, request_cookies)
         response = self.handle_http("POST", url, json=json, headers=headers, cookies=cookies)
 
-        # Update cookie_manager with new cookies from response
-        self.cookie_manager.update_from_response(response)
         self.log_response(response)
 
         return response
@@ -185,48 +585,149 @@ class APIClient:
         return response
 
 
-    @staticmethod
-    def log_response(response):
-        """
-        Логирует информацию о ответе от сервера.
+class AsyncAPIClient(BaseAPIClient):
+    """
+    Асинхронный API клиент поверх httpx.AsyncClient.
 
-        :param response: (httpx.Response): Ответ от сервера.
-        :return: None
-        """
+    Повторяет интерфейс APIClient (get/post/put/delete/handle_http), но все методы - корутины.
+    Позволяет выполнять десятки запросов к кластеру одновременно через asyncio.gather
+    без отдельного потока на каждый запрос.
 
-        if response.status_code not in (200, 201, 204):
-            logger.error(f"Error response. Status code: {response.status_code} - Body: {response.text}")
+    Example:
+        async with AsyncAPIClient(base_url, session=client.session) as async_client:
+            responses = await asyncio.gather(*(async_client.get(f"/pools/{name}") for name in names))
+    """
 
+    def __init__(self, base_url, session=None, timeout=40.0, transcript=None, settings=None, name=None,
+                 metrics=None, transport=None, retry_policy=None, limiter=None, cache=None):
+        super().__init__(base_url, session=session, timeout=timeout, transcript=transcript,
+                         settings=settings, name=name, metrics=metrics, transport=transport,
+                         retry_policy=retry_policy, limiter=limiter, cache=cache)
+        self.http_client = httpx.AsyncClient(**self.settings.client_kwargs(), transport=transport)
 
-    @staticmethod
-    def log_request(method, url, headers=None, params=None, json=None, cookies=None):
-        """
-        Логирует информацию о выполненном запросе.
+    async def __aenter__(self):
+        return self
 
-        :param method: (str): Метод HTTP-запроса.
-        :param url: (str): URL запроса.
-        :param headers: (dict or None): Заголовки запроса.
-        :param params: (dict or None): Параметры запроса.
-        :param json: (dict or None): Тело запроса в формате JSON.
-        :return: None
-        """
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
 
-        logger.info("=== Request Details ===")
-        logger.info(f"{method} Request to {url}")
-        if headers:
-            logger.info("Headers:")
-            for header, value in headers.items():
-                logger.info(f"  {header}: {value}")
+    async def aclose(self):
+        """Закрывает пул соединений. Вызывать в том же event loop, где выполнялись запросы."""
+        await self.http_client.aclose()
 
-        if cookies:
-            logger.info("Cookies:")
-            for cookie, value in cookies.items():
-                logger.info(f"  {cookie}: {value}")
+    async def handle_http(self, method, url, json=None, headers=None, params=None, cookies=None):
+        start_time = time.time()
+        session = self.session.snapshot
+        request_cookies, record = self._prepare_request(method, url, json, headers, params, cookies)
 
-        if params:
-            logger.info(f"Params: {params}")
+        try:
+            cassette = cassettes.current
+            if cassette is not None and cassette.replaying:
+                response = self._replay(method, url, json, params)
+            else:
+                lookup = self._cache_lookup(method, url, params, cassette)
+                if lookup is not None and lookup.is_fresh():
+                    return self._cached_response(method, url, params, lookup, start_time, record)
+                if lookup is not None:
+                    headers = lookup.validator_headers(headers)
+
+                response = await self._send_with_retry(
+                    method, url, self._request_kwargs(method, json, headers, params, request_cookies)
+                )
+                # Обновление сессии синхронное и общее с синхронным клиентом - выполняется в потоке
+                expired = self._session_expired(url, response, cookies)
+                if expired and await asyncio.to_thread(self.session.renew, session):
+                    logger.info(f"{method} {url} returned 401, replaying with the renewed session")
+                    await response.aclose()
+                    response = await self._send_with_retry(
+                        method, url, self._request_kwargs(method, json, headers, params, self._request_cookies(cookies))
+                    )
+                response = self._update_cache(method, url, lookup, response)
+                self._record(cassette, method, url, json, params, response)
+            return self._finalize_response(method, url, response, start_time, record)
 
-        if json:
-            logger.info(f"Body: {json}")
+        except httpx.HTTPStatusError as exc:
+            logger.error(f"{method} request failed: {exc.response.status_code} - {exc.response.text}", exc_info=exc)
+            raise
+
+    async def get(self, endpoint, headers=None, params=None, cookies=None):
+        """Асинхронный GET запрос к указанному эндпоинту. См. APIClient.get"""
+        url = f"{self.base_url}{endpoint}"
+        response = await self.handle_http("GET", url, headers=headers, params=params, cookies=cookies)
+        self.log_response(response)
+        return response
+
+    async def post(self, endpoint, json=None, headers=None, cookies=None):
+        """Асинхронный POST запрос к указанному эндпоинту. См. APIClient.post"""
+        url = f"{self.base_url}{endpoint}"
+        response = await self.handle_http("POST", url, json=json, headers=headers, cookies=cookies)
+        self.log_response(response)
+        return response
+
+    async def put(self, endpoint, json=None, headers=None, cookies=None):
+        """Асинхронный PUT запрос к указанному эндпоинту. См. APIClient.put"""
+        url = f"{self.base_url}{endpoint}"
+        response = await self.handle_http("PUT", url, json=json, headers=headers, cookies=cookies)
+        self.log_response(response)
+        return response
+
+    async def delete(self, endpoint, headers=None, cookies=None):
+        """Асинхронный DELETE запрос к указанному эндпоинту. См. APIClient.delete"""
+        url = f"{self.base_url}{endpoint}"
+        response = await self.handle_http("DELETE", url, headers=headers, cookies=cookies)
+        self.log_response(response)
+        return response
+
+    async def _send_with_retry(self, method, url, request_kwargs):
+        """Отправляет запрос, повторяя его по retry_policy"""
+        policy = self.retry_policy
+        deadline = policy.deadline()
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = self._rate_limit_delay(method, url)
+            if wait:
+                await asyncio.sleep(wait)
+            self.breaker.before_request()
+            try:
+                response = await self.http_client.request(method, url, **request_kwargs)
+            except httpx.TransportError as exc:
+                delay = policy.next_delay(method, attempt, deadline, error=exc)
+                if delay is None:
+                    self.breaker.record_failure(repr(exc))
+                    raise
+                self._log_retry(method, url, attempt, delay, error=exc)
+            else:
+                delay = policy.next_delay(method, attempt, deadline, response=response)
+                if delay is None:
+                    self.breaker.record_response(response)
+                    return response
+                self._log_retry(method, url, attempt, delay, response=response)
+                await response.aclose()
+            await asyncio.sleep(delay)
+
+    async def send(self, spec: RequestSpec):
+        """Асинхронно выполняет запрос, описанный RequestSpec. См. APIClient.send"""
+        url = f"{self.base_url}{spec.path}"
+        response = await self.handle_http(spec.method, url, json=spec.json, headers=spec.headers,
+                                          params=spec.params, cookies=spec.cookies)
+        self.log_response(response)
+        return response
+
+    async def batch(self, specs: List[RequestSpec], max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Выполняет запросы конкурентно в текущем event loop. См. APIClient.batch
+
+        :return: list[BatchResult]: Результаты в порядке specs.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or default_concurrency())
+
+        async def run(spec):
+            async with semaphore:
+                try:
+                    return BatchResult(spec, response=await self.send(spec))
+                except Exception as e:
+                    logger.error(f"Batch request {spec.method} {spec.path} failed: {e}")
+                    return BatchResult(spec, error=e)
 
-        logger.info("=====================")
\ No newline at end of file
+        return list(await asyncio.gather(*(run(spec) for spec in specs)))
@@ -0,0 +1,52 @@
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import httpx
+
+
+""" Пакетное выполнение запросов.
+
+    RequestSpec описывает запрос через шаблон из ApiEndpoints и параметры пути,
+    BatchResult - результат одного запроса пакета: ответ или перехваченная ошибка.
+    Сами пакеты выполняют APIClient.batch (пул потоков) и AsyncAPIClient.batch (asyncio).
+"""
+
+
+def default_concurrency() -> int:
+    """Максимум одновременных запросов пакета (API_BATCH_CONCURRENCY, по умолчанию 8)"""
+    return int(os.getenv('API_BATCH_CONCURRENCY', 8))
+
+
+@dataclass
+class RequestSpec:
+    """
+    Спецификация запроса пакета.
+
+    Example:
+        RequestSpec("DELETE", ApiEndpoints.Pools.DELETE_POOL, {"pool_name": name})
+        RequestSpec("POST", ApiEndpoints.Pools.ADD_SPARE, {"pool_name": name}, json={"disks": disks})
+    """
+    method: str
+    endpoint: str
+    path_params: Dict[str, Any] = field(default_factory=dict)
+    json: Optional[Any] = None
+    headers: Optional[Dict[str, str]] = None
+    params: Optional[Dict[str, Any]] = None
+    cookies: Optional[Dict[str, str]] = None
+
+    @property
+    def path(self) -> str:
+        """Эндпоинт с подставленными параметрами пути"""
+        return self.endpoint.format(**self.path_params) if self.path_params else self.endpoint
+
+
+@dataclass
+class BatchResult:
+    """Результат запроса пакета: response при успешной отправке, error - если запрос упал с исключением"""
+    spec: RequestSpec
+    response: Optional[httpx.Response] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.response is not None and self.response.is_success
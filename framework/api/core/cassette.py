@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional
+import httpx
+from framework.api.core.logger import logger
+
+
+""" Запись и воспроизведение HTTP-взаимодействий (кассеты).
+
+    В режиме record клиент сохраняет пары запрос/ответ каждого теста в компактный JSON-файл,
+    в режиме replay - отдаёт ответы из кассеты, не обращаясь к кластеру.
+
+    Ключ взаимодействия: нода, метод, шаблон эндпоинта ApiEndpoints и нормализованное тело/параметры
+    (ключи словарей и списки скаляров сортируются, поэтому порядок дисков из set не важен).
+    Одинаковые ключи воспроизводятся в порядке записи, последний ответ повторяется для лишних вызовов.
+    Имена пулов из Generates.random_string детерминированы: перед каждым тестом генератор
+    инициализируется от nodeid теста. Запросы авторизации дополнительно пишутся в сессионную кассету,
+    поэтому отдельный тест воспроизводится даже если login был записан в другом тесте.
+
+Настройки (.env / переменные окружения):
+    - API_CASSETTE_MODE: off (по умолчанию) | record | replay.
+    - API_CASSETTE_DIR: каталог кассет (по умолчанию tests/cassettes).
+"""
+
+MODE_OFF = 'off'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+# Заголовки ответа, которые нужны клиенту и инструментам при воспроизведении
+_KEPT_HEADERS = ('content-type', 'set-cookie', 'etag', 'retry-after')
+
+
+class CassetteMissError(LookupError):
+    """В кассете нет записанного ответа для запроса"""
+
+
+def cassette_mode() -> str:
+    mode = os.getenv('API_CASSETTE_MODE', MODE_OFF).lower()
+    if mode not in (MODE_OFF, MODE_RECORD, MODE_REPLAY):
+        raise ValueError(f"Unknown API_CASSETTE_MODE: {mode}. Expected off, record or replay")
+    return mode
+
+
+def cassette_path(name: str) -> str:
+    """Путь к файлу кассеты по имени (например, nodeid теста)"""
+    file_name = re.sub(r'[^\w.\-\[\]]+', '_', name).strip('_')
+    return os.path.join(os.getenv('API_CASSETTE_DIR', os.path.join('tests', 'cassettes')), f"{file_name}.json")
+
+
+def _normalize(value):
+    """Каноническое представление тела: словари по ключам, списки скаляров - отсортированы"""
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize(item) for item in value]
+        if all(isinstance(item, (str, int, float, bool)) or item is None for item in items):
+            return sorted(items, key=lambda item: (str(type(item)), str(item)))
+        return items
+    return value
+
+
+class Cassette:
+    """Кассета одного теста"""
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self._recorded: List[Dict] = []
+        self._queues: Dict[str, Deque[Dict]] = defaultdict(deque)
+
+        if mode == MODE_REPLAY:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    @staticmethod
+    def make_key(node: str, method: str, endpoint: str, json_body=None, params=None) -> str:
+        payload = json.dumps([_normalize(json_body), _normalize(params)], separators=(',', ':'), default=str)
+        # Тело хранится только в виде хэша, чтобы пароли из /login не попадали в кассету
+        digest = hashlib.sha1(payload.encode()).hexdigest()[:16]
+        return f"{node} {method} {endpoint} {digest}"
+
+    def record(self, key: str, response: httpx.Response):
+        self._recorded.append({
+            'key': key,
+            'status': response.status_code,
+            'headers': [[name, value] for name, value in response.headers.multi_items()
+                        if name.lower() in _KEPT_HEADERS],
+            'body': response.text,
+        })
+
+    def has(self, key: str) -> bool:
+        return bool(self._queues.get(key))
+
+    def play(self, key: str, request: httpx.Request) -> httpx.Response:
+        queue = self._queues.get(key)
+        if not queue:
+            raise CassetteMissError(f"No recorded response for '{key}' in cassette {self.path}")
+
+        interaction = queue.popleft() if len(queue) > 1 else queue[0]
+        return httpx.Response(
+            interaction['status'],
+            headers=interaction['headers'],
+            content=interaction['body'].encode(),
+            request=request,
+        )
+
+    def save(self):
+        if not self.recording or not self._recorded:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump({'version': 1, 'interactions': self._recorded}, file, separators=(',', ':'))
+        logger.info(f"Cassette saved: {self.path} ({len(self._recorded)} interactions)")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            logger.warning(f"Cassette {self.path} not found, all requests will miss")
+            return
+        with open(self.path, encoding='utf-8') as file:
+            for interaction in json.load(file)['interactions']:
+                self._queues[interaction['key']].append(interaction)
+
+
+class CassetteLibrary:
+    """
+    Активные кассеты процесса: кассета текущего теста и сессионная кассета
+    для запросов вне тестов (logout в teardown сессионных фикстур и т.п.).
+    """
+
+    def __init__(self):
+        self.session: Optional[Cassette] = None
+        self.test: Optional[Cassette] = None
+
+    @property
+    def current(self) -> Optional[Cassette]:
+        return self.test or self.session
+
+    def play(self, key: str, request: httpx.Request) -> httpx.Response:
+        """Ответ из кассеты теста, а если там его нет - из сессионной"""
+        for cassette in (self.test, self.session):
+            if cassette is not None and cassette.has(key):
+                return cassette.play(key, request)
+        raise CassetteMissError(f"No recorded response for '{key}' in active cassettes")
+
+    def record(self, key: str, response: httpx.Response, shared: bool = False):
+        """Записывает взаимодействие в текущую кассету; shared - ещё и в сессионную"""
+        current = self.current
+        current.record(key, response)
+        if shared and self.session is not None and self.session is not current:
+            self.session.record(key, response)
+
+    @contextmanager
+    def use(self, cassette: Cassette, session: bool = False):
+        attr = 'session' if session else 'test'
+        setattr(self, attr, cassette)
+        try:
+            yield cassette
+        finally:
+            setattr(self, attr, None)
+            cassette.save()
+
+
+# Общая библиотека кассет для всех клиентов процесса (по аналогии с logger)
+cassettes = CassetteLibrary()
@@ -0,0 +1,159 @@
+import os
+import time
+from dataclasses import dataclass
+from threading import Event, Lock, Thread
+from typing import Dict, Optional
+import httpx
+from framework.api.core.logger import logger
+from framework.api.resources.endpoints import ApiEndpoints
+
+
+""" Circuit breaker по базовому URL ноды.
+
+    После threshold подряд неудачных запросов (сетевая ошибка, таймаут, 502/503/504) цепь размыкается:
+    запросы к ноде сразу падают с CircuitOpenError вместо ожидания таймаута httpx.
+    Запрос с повторами считается один раз - по исходу последней попытки RetryPolicy.
+    Пока цепь разомкнута, фоновый поток опрашивает /health; первый успешный ответ замыкает цепь.
+
+Настройки (.env / переменные окружения):
+    - API_BREAKER_THRESHOLD: неудач подряд до размыкания (по умолчанию 3, 0 - выключено).
+    - API_BREAKER_PROBE_INTERVAL: пауза между проверками /health, секунды (по умолчанию 2).
+    - API_BREAKER_PROBE_TIMEOUT: таймаут проверки /health, секунды (по умолчанию 2).
+"""
+
+CLOSED = 'closed'
+OPEN = 'open'
+
+# Ответы, означающие недоступность ноды (500 - штатная ошибка API, например logout на чужой ноде)
+FAILURE_STATUSES = frozenset((502, 503, 504))
+
+
+class CircuitOpenError(ConnectionError):
+    """Нода недоступна: цепь разомкнута, запрос не отправлялся"""
+
+
+@dataclass
+class BreakerSettings:
+    threshold: int = 3
+    probe_interval: float = 2.0
+    probe_timeout: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> 'BreakerSettings':
+        return cls(
+            threshold=int(os.getenv('API_BREAKER_THRESHOLD', cls.threshold)),
+            probe_interval=float(os.getenv('API_BREAKER_PROBE_INTERVAL', cls.probe_interval)),
+            probe_timeout=float(os.getenv('API_BREAKER_PROBE_TIMEOUT', cls.probe_timeout)),
+        )
+
+
+class CircuitBreaker:
+    """Состояние цепи одной ноды. Потокобезопасен."""
+
+    def __init__(self, base_url: str, settings: Optional[BreakerSettings] = None,
+                 transport: Optional[httpx.BaseTransport] = None):
+        """
+        :param base_url: (str): Базовый URL ноды, /health проверяется относительно него.
+        :param transport: (httpx.BaseTransport, optional): Транспорт для проверок (например, эмулятор).
+        """
+        self.base_url = base_url
+        self.settings = settings or BreakerSettings.from_env()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._transport = transport
+        self._lock = Lock()
+        self._closed = Event()
+        self._closed.set()
+        self._prober: Optional[Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.threshold > 0
+
+    def before_request(self):
+        """Вызывается перед отправкой запроса. Если цепь разомкнута - CircuitOpenError."""
+        if self.state == OPEN:
+            raise CircuitOpenError(
+                f"Node {self.base_url} is unavailable: circuit opened "
+                f"{time.monotonic() - self.opened_at:.1f}s ago after {self.failures} failures"
+            )
+
+    def record_success(self):
+        if self.failures:
+            with self._lock:
+                self.failures = 0
+
+    def record_failure(self, reason: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= self.settings.threshold:
+                self._open(reason)
+
+    def record_response(self, response: httpx.Response):
+        if response.status_code in FAILURE_STATUSES:
+            self.record_failure(f"status {response.status_code}")
+        else:
+            self.record_success()
+
+    def wait_closed(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт восстановления ноды. True, если цепь замкнута."""
+        return self._closed.wait(timeout)
+
+    def _open(self, reason: str):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._closed.clear()
+        logger.error(f"Circuit for {self.base_url} opened after {self.failures} failures (last: {reason})")
+        self._prober = Thread(target=self._probe_until_healthy, daemon=True, name=f"breaker-probe {self.base_url}")
+        self._prober.start()
+
+    def _close(self):
+        with self._lock:
+            downtime = time.monotonic() - self.opened_at
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._prober = None
+            self._closed.set()
+        logger.info(f"Circuit for {self.base_url} closed: node is healthy again after {downtime:.1f}s")
+
+    def _probe_until_healthy(self):
+        with httpx.Client(timeout=self.settings.probe_timeout, transport=self._transport) as client:
+            while True:
+                if self.probe(client):
+                    self._close()
+                    return
+                time.sleep(self.settings.probe_interval)
+
+    def probe(self, client: httpx.Client) -> bool:
+        """Одна проверка /health"""
+        try:
+            return client.get(f"{self.base_url}{ApiEndpoints.Cluster.HEALTH}").status_code == 200
+        except httpx.HTTPError:
+            return False
+
+
+class CircuitBreakerRegistry:
+    """Цепи по базовым URL: все клиенты одной ноды (sync, async, из реестра) делят одну цепь"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = Lock()
+
+    def get(self, base_url: str, transport: Optional[httpx.BaseTransport] = None) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(base_url)
+            if breaker is None:
+                breaker = self._breakers[base_url] = CircuitBreaker(base_url, transport=transport)
+            return breaker
+
+    def states(self) -> Dict[str, str]:
+        with self._lock:
+            return {url: breaker.state for url, breaker in self._breakers.items()}
+
+
+# Общий реестр цепей процесса (по аналогии с logger)
+circuit_breakers = CircuitBreakerRegistry()
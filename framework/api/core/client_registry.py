@@ -0,0 +1,72 @@
+from threading import Lock
+from typing import Dict, Optional
+import httpx
+from framework.api.core.api_client import APIClient, ClientSettings
+from framework.api.core.logger import logger
+
+
+class ClientRegistry:
+    """
+    Реестр API клиентов по нодам (NODE_1, NODE_2...).
+
+    У каждой ноды свой APIClient: собственный пул соединений с keep-alive,
+    опциональный HTTP/2 и собственные куки/сессия. Переключение между нодами
+    не требует переподключения и повторного login, соединения ко всем нодам остаются "тёплыми".
+
+    Example:
+        registry = ClientRegistry(connection_tools.get_available_nodes())
+        registry.configure("NODE_2", ClientSettings(http2=True, max_connections=10))
+        client = registry.get("NODE_2")
+    """
+
+    def __init__(self, nodes: Dict[str, str], settings: Optional[ClientSettings] = None,
+                 transports: Optional[Dict[str, httpx.BaseTransport]] = None):
+        """
+        :param nodes: (dict): Ноды и их URL, как их загружает ConnectionTools.
+        :param settings: (ClientSettings, optional): Настройки по умолчанию для всех нод, иначе из .env.
+        :param transports: (dict, optional): Транспорты httpx по нодам (например, эмулятор внутри процесса).
+        """
+        self._nodes = dict(nodes)
+        self._transports = dict(transports or {})
+        self._default_settings = settings or ClientSettings.from_env()
+        self._node_settings: Dict[str, ClientSettings] = {}
+        self._clients: Dict[str, APIClient] = {}
+        self._lock = Lock()
+
+    def configure(self, node: str, settings: ClientSettings) -> 'ClientRegistry':
+        """Задаёт отдельные настройки соединения для ноды. Действует для ещё не созданного клиента."""
+        self._check_node(node)
+        if node in self._clients:
+            logger.warning(f"Client for {node} already created, new settings apply after close()")
+        self._node_settings[node] = settings
+        return self
+
+    def settings_for(self, node: str) -> ClientSettings:
+        return self._node_settings.get(node, self._default_settings)
+
+    def get(self, node: str) -> APIClient:
+        """Возвращает клиент ноды, создавая его при первом обращении"""
+        self._check_node(node)
+        with self._lock:
+            if node not in self._clients:
+                self._clients[node] = APIClient(
+                    self._nodes[node],
+                    settings=self.settings_for(node),
+                    name=node,
+                    transport=self._transports.get(node)
+                )
+            return self._clients[node]
+
+    def nodes(self) -> Dict[str, str]:
+        return self._nodes.copy()
+
+    def close(self):
+        """Закрывает соединения всех клиентов"""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+    def _check_node(self, node: str):
+        if node not in self._nodes:
+            raise ValueError(f"Unknown node: {node}. Available nodes: {list(self._nodes.keys())}")
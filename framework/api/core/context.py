@@ -1,3 +1,6 @@
+from typing import Dict
+import httpx
+from framework.api.core.api_client import AsyncAPIClient
 from framework.api.core.tools_manager import ToolsManager
 
 
@@ -9,11 +12,46 @@ class TestContext:
         self.client = client
         self.base_url = base_url
         self.request = request
+        self._async_clients: Dict[str, AsyncAPIClient] = {}
         self.tools_manager: ToolsManager = ToolsManager(self)
         '''Если вдруг нужно будет хранить контекст:'''
         # self.cluster_info = None
         # self.keys_to_extract = None
 
+    @property
+    def async_client(self) -> AsyncAPIClient:
+        """
+        Асинхронный клиент текущей ноды, создаётся при первом обращении.
+
+        Разделяет сессию (SessionStore) и настройки соединения с синхронным клиентом ноды,
+        поэтому сессия после login через AuthTools сразу действует и для асинхронных запросов.
+        Привязан к event loop теста - закрывается через close_async_client().
+        """
+        key = self.client.name or self.client.base_url
+        if key not in self._async_clients:
+            self._async_clients[key] = AsyncAPIClient(
+                self.client.base_url,
+                session=self.client.session,
+                settings=self.client.settings,
+                name=self.client.name,
+                transport=self._async_transport(),
+                retry_policy=self.client.retry_policy,
+                limiter=self.client.limiter,
+                cache=self.client.cache
+            )
+        return self._async_clients[key]
+
+    def _async_transport(self):
+        """Транспорт синхронного клиента, если он умеет и асинхронные запросы (как EmulatorTransport)"""
+        transport = getattr(self.client, 'transport', None)
+        return transport if isinstance(transport, httpx.AsyncBaseTransport) else None
+
+    async def close_async_client(self):
+        """Закрывает асинхронные клиенты текущего теста"""
+        for async_client in self._async_clients.values():
+            await async_client.aclose()
+        self._async_clients.clear()
+
     def __enter__(self):
         return self
 
@@ -0,0 +1,154 @@
+import bisect
+import json
+import math
+import os
+from collections import Counter
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+
+""" Гистограммы задержек HTTP-запросов по эндпоинтам.
+
+    Запросы группируются по шаблону из ApiEndpoints (метод + "/pools/{pool_name}"), а не по конкретному URL.
+    Для каждой группы хранятся счётчики по логарифмическим корзинам задержки, коды ответов
+    и объёмы тел запросов/ответов. По окончании сессии печатается сводка p50/p90/p99/max
+    и сохраняется JSON (путь из API_METRICS_EXPORT, по умолчанию api_metrics.json).
+"""
+
+
+def _bucket_bounds() -> List[float]:
+    """Верхние границы корзин: от 1 мс до ~2 мин, 20 корзин на порядок (~12% точности)"""
+    bounds = []
+    value = 0.001
+    while value < 120:
+        bounds.append(value)
+        value *= 10 ** (1 / 20)
+    return bounds
+
+
+BUCKET_BOUNDS = _bucket_bounds()
+
+
+class LatencyHistogram:
+    """Гистограмма задержек одного эндпоинта"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max', 'statuses', 'request_bytes', 'response_bytes')
+
+    def __init__(self):
+        # Последняя корзина - всё, что больше последней границы
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.statuses = Counter()
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def record(self, elapsed: float, status_code: Optional[int], request_bytes: int, response_bytes: int):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, elapsed)] += 1
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.statuses[str(status_code)] += 1
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+
+    def percentile(self, percent: float) -> float:
+        """Оценка перцентиля по верхней границе корзины (не больше фактического максимума)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+            'total': self.total,
+            'statuses': dict(self.statuses),
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'buckets': {str(index): value for index, value in enumerate(self.buckets) if value},
+        }
+
+    def merge_dict(self, data: Dict):
+        """Добавляет данные гистограммы из to_dict() (например, от воркера pytest-xdist)"""
+        for index, value in data.get('buckets', {}).items():
+            self.buckets[int(index)] += value
+        self.count += data['count']
+        self.total += data['total']
+        self.max = max(self.max, data['max'])
+        self.statuses.update(data['statuses'])
+        self.request_bytes += data['request_bytes']
+        self.response_bytes += data['response_bytes']
+
+
+class LatencyRecorder:
+    """Набор гистограмм по ключу (метод, шаблон эндпоинта). Потокобезопасен."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = Lock()
+
+    def record(self, method: str, endpoint: str, elapsed: float, status_code: Optional[int] = None,
+               request_bytes: int = 0, response_bytes: int = 0):
+        key = (method, endpoint)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(elapsed, status_code, request_bytes, response_bytes)
+
+    def __bool__(self):
+        return bool(self._histograms)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                f"{method} {endpoint}": histogram.to_dict()
+                for (method, endpoint), histogram in sorted(self._histograms.items())
+            }
+
+    def merge_dict(self, data: Dict):
+        with self._lock:
+            for key, histogram_data in data.items():
+                method, endpoint = key.split(' ', 1)
+                histogram = self._histograms.setdefault((method, endpoint), LatencyHistogram())
+                histogram.merge_dict(histogram_data)
+
+    def format_table(self) -> str:
+        """Сводная таблица p50/p90/p99/max в миллисекундах"""
+        header = f"{'endpoint':<52} {'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  statuses"
+        lines = [header, '-' * len(header)]
+        for key, stats in self.to_dict().items():
+            statuses = ', '.join(f"{code}:{count}" for code, count in sorted(stats['statuses'].items()))
+            lines.append(
+                f"{key:<52} {stats['count']:>7} "
+                f"{stats['p50'] * 1000:>7.1f}ms {stats['p90'] * 1000:>7.1f}ms "
+                f"{stats['p99'] * 1000:>7.1f}ms {stats['max'] * 1000:>7.1f}ms  {statuses}"
+            )
+        return '\n'.join(lines)
+
+    def export_json(self, path: Optional[str] = None) -> str:
+        path = path or os.getenv('API_METRICS_EXPORT', 'api_metrics.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+        return path
+
+
+# Общий сборщик метрик для всех клиентов процесса (по аналогии с logger)
+latency_metrics = LatencyRecorder()
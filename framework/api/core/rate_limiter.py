@@ -0,0 +1,176 @@
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from framework.api.core.logger import logger
+from framework.api.core.shared_state import SharedStore, is_xdist_worker, shared_state_path
+from framework.api.resources.endpoints import ApiEndpoints
+
+
+""" Ограничение частоты запросов к нодам (token bucket).
+
+    Клиент перед каждой попыткой запроса резервирует токен в корзине (нода, класс эндпоинта)
+    и, если токена нет, ждёт. Классы эндпоинтов:
+    - auth: /login, /refresh_tokens, /logout;
+    - mutate: POST/PUT/DELETE;
+    - read: GET.
+
+    Корзины общие для всех клиентов и потоков процесса, под pytest-xdist - для всех воркеров прогона
+    (состояние в SQLite, см. shared_state.py), поэтому параллельный прогон сам укладывается в лимиты кластера.
+
+Настройки (.env / переменные окружения), по умолчанию ограничений нет:
+    - API_RATE_LIMIT_AUTH, API_RATE_LIMIT_MUTATE, API_RATE_LIMIT_READ: "запросов_в_секунду[:burst]", например "2:5".
+    - API_RATE_LIMIT_<CLASS>_<NODE>: лимит для отдельной ноды, например API_RATE_LIMIT_AUTH_NODE_2=1.
+"""
+
+ENDPOINT_CLASSES = ('auth', 'mutate', 'read')
+
+_AUTH_ENDPOINTS = frozenset((ApiEndpoints.Auth.LOGIN, ApiEndpoints.Auth.REFRESH_TOKENS, ApiEndpoints.Auth.LOGOUT))
+
+
+def endpoint_class(method: str, endpoint: str) -> str:
+    """Класс эндпоинта по методу и шаблону ApiEndpoints"""
+    if endpoint in _AUTH_ENDPOINTS:
+        return 'auth'
+    return 'read' if method == 'GET' else 'mutate'
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """rate запросов в секунду в среднем, до burst запросов подряд"""
+    rate: float
+    burst: float = 1.0
+
+    @classmethod
+    def parse(cls, value: str) -> 'RateLimit':
+        rate, _, burst = value.partition(':')
+        limit = cls(float(rate), float(burst) if burst else max(1.0, float(rate)))
+        if limit.rate <= 0 or limit.burst < 1:
+            raise ValueError(f"Invalid rate limit '{value}': expected 'rate[:burst]' with rate > 0 and burst >= 1")
+        return limit
+
+
+class _MemoryBuckets:
+    """Корзины в памяти процесса"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = Lock()
+
+    def reserve(self, key: str, limit: RateLimit, now: float) -> float:
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.burst, now))
+            tokens, delay = _take(tokens, updated, limit, now)
+            self._buckets[key] = (tokens, now)
+            return delay
+
+
+class _SharedBuckets:
+    """Корзины в SQLite, общие для воркеров pytest-xdist"""
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);"
+
+    def __init__(self, path: str):
+        self._store = SharedStore(path, self.SCHEMA)
+
+    def reserve(self, key: str, limit: RateLimit, now: float) -> float:
+        with self._store.transaction() as db:
+            row = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (limit.burst, now)
+            tokens, delay = _take(tokens, updated, limit, now)
+            db.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            return delay
+
+
+def _take(tokens: float, updated: float, limit: RateLimit, now: float) -> Tuple[float, float]:
+    """
+    Забирает токен. Токенов может стать меньше нуля - это резерв очереди:
+    запрос ждёт, пока корзина не наполнится до нуля, и следующие запросы выстраиваются за ним.
+    """
+    tokens = min(limit.burst, tokens + max(0.0, now - updated) * limit.rate) - 1
+    return tokens, (-tokens / limit.rate if tokens < 0 else 0.0)
+
+
+class RateLimiter:
+    """
+    Лимиты по нодам и классам эндпоинтов.
+
+    Example:
+        limiter = RateLimiter({"auth": RateLimit(2, burst=5)})
+        time.sleep(limiter.reserve("NODE_1", "POST", ApiEndpoints.Auth.LOGIN))
+    """
+
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None,
+                 node_limits: Optional[Dict[Tuple[str, str], RateLimit]] = None,
+                 shared: Optional[bool] = None):
+        """
+        :param limits: (dict): Класс эндпоинта -> лимит для всех нод.
+        :param node_limits: (dict): (нода, класс эндпоинта) -> лимит, имеет приоритет над limits.
+            Если не заданы ни limits, ни node_limits - лимиты читаются из .env при первом запросе.
+        :param shared: (bool, optional): Хранить корзины в SQLite для воркеров xdist.
+            По умолчанию - если процесс является воркером xdist.
+        """
+        self._from_env = limits is None and node_limits is None
+        self.limits = dict(limits or {})
+        self.node_limits = dict(node_limits or {})
+        self._shared = shared
+        self._backend = None
+        self._backend_lock = Lock()
+
+    @classmethod
+    def from_env(cls) -> 'RateLimiter':
+        return cls(*cls._read_env())
+
+    @staticmethod
+    def _read_env() -> Tuple[Dict[str, RateLimit], Dict[Tuple[str, str], RateLimit]]:
+        limits, node_limits = {}, {}
+        for name, value in os.environ.items():
+            if not name.startswith('API_RATE_LIMIT_') or not value:
+                continue
+            endpoint_kind, _, node = name[len('API_RATE_LIMIT_'):].partition('_')
+            if endpoint_kind.lower() not in ENDPOINT_CLASSES:
+                raise ValueError(f"Unknown endpoint class in {name}. Expected one of {ENDPOINT_CLASSES}")
+            if node:
+                node_limits[(node, endpoint_kind.lower())] = RateLimit.parse(value)
+            else:
+                limits[endpoint_kind.lower()] = RateLimit.parse(value)
+        return limits, node_limits
+
+    def __bool__(self):
+        self._load_env()
+        return bool(self.limits or self.node_limits)
+
+    def limit_for(self, node: str, kind: str) -> Optional[RateLimit]:
+        self._load_env()
+        return self.node_limits.get((node, kind), self.limits.get(kind))
+
+    def reserve(self, node: str, method: str, endpoint: str) -> float:
+        """Резервирует токен и возвращает, сколько секунд подождать перед запросом"""
+        kind = endpoint_class(method, endpoint)
+        limit = self.limit_for(node, kind)
+        if limit is None:
+            return 0.0
+        delay = self._get_backend().reserve(f"{node} {kind}", limit, time.time())
+        if delay > 0.5:
+            logger.info(f"Rate limit {node} {kind}: waiting {delay:.2f}s")
+        return delay
+
+    def _load_env(self):
+        # .env загружается в conftest уже после импорта фреймворка, поэтому читаем его при первом запросе
+        if self._from_env:
+            self._from_env = False
+            self.limits, self.node_limits = self._read_env()
+
+    def _get_backend(self):
+        # Создаётся лениво: переменные окружения xdist выставляются после импорта модулей фреймворка
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    shared = is_xdist_worker() if self._shared is None else self._shared
+                    self._backend = _SharedBuckets(shared_state_path('rate_limits')) if shared else _MemoryBuckets()
+        return self._backend
+
+
+# Общий ограничитель для всех клиентов процесса (по аналогии с logger)
+rate_limiter = RateLimiter()
@@ -0,0 +1,198 @@
+import os
+import time
+from dataclasses import dataclass, replace
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+import httpx
+from framework.api.core.logger import logger
+from framework.api.resources.endpoints import ApiEndpoints
+
+
+""" Кэш ответов GET с TTL по эндпоинтам (по умолчанию выключен).
+
+    Ответы хранятся по ноде, пути и параметрам запроса. Пока запись свежая, клиент отдаёт её без обращения
+    к кластеру; после TTL запрос уходит с If-None-Match, и ответ 304 продлевает запись без передачи тела.
+    POST/PUT/DELETE инвалидируют связанные записи всех нод: пулы, импорт и clusterInfo зависят от одних
+    и тех же дисков, а ноды одного кластера видят одни и те же пулы. Поэтому запись в пулы, импорт,
+    диски, ноды или кластер сбрасывает все эти ответы.
+
+    Изменения, сделанные мимо клиента (другими воркерами xdist или вручную), видны не позже чем через TTL.
+    Кэш не используется при записи и воспроизведении кассет.
+
+Настройки (.env / переменные окружения):
+    - API_RESPONSE_CACHE: 1 - включить кэш.
+    - API_RESPONSE_CACHE_TTLS: TTL по эндпоинтам в секундах, например "/pools=10,/nodes/clusterInfo=30"
+      (0 - не кэшировать).
+"""
+
+# TTL по умолчанию, секунды. Кэшируются только перечисленные шаблоны ApiEndpoints
+DEFAULT_TTLS = {
+    ApiEndpoints.Pools.BASE: 5.0,
+    ApiEndpoints.Pools.GET_POOL: 5.0,
+    ApiEndpoints.Pools.GET_IMPORT_POOLS: 5.0,
+    ApiEndpoints.Cluster.CLUSTER_INFO: 5.0,
+}
+
+# Ресурсы, чьи ответы зависят от состояния дисков: пулы, импорт, clusterInfo (/nodes) и статус кластера
+_DISK_STATE = ('pools', 'importview', 'nodes', 'cluster')
+
+# Изменение ресурса (первый сегмент пути) -> ресурсы, чьи GET-ответы устаревают.
+# Запись в диски и ноды меняет clusterInfo так же, как создание пула
+INVALIDATES = {
+    'pools': _DISK_STATE,
+    'importview': _DISK_STATE,
+    'nodes': _DISK_STATE,
+    'disks': _DISK_STATE,
+    'cluster': _DISK_STATE,
+}
+
+# Заголовки ответа, которые сохраняются в записи
+_KEPT_HEADERS = ('content-type', 'etag')
+
+
+def _resource(template: str) -> str:
+    return template.strip('/').split('/', 1)[0]
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    template: str
+    status_code: int
+    headers: Tuple[Tuple[str, str], ...]
+    content: bytes
+    expires_at: float
+
+    @property
+    def etag(self) -> Optional[str]:
+        return next((value for name, value in self.headers if name == 'etag'), None)
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        """Новый объект ответа на каждое обращение: httpx.Response нельзя делить между потоками"""
+        return httpx.Response(self.status_code, headers=list(self.headers), content=self.content, request=request)
+
+
+@dataclass(frozen=True)
+class CacheLookup:
+    """Результат поиска в кэше для одного GET: запись (если есть) и поколение кэша на момент запроса"""
+    key: Tuple[str, str]
+    template: str
+    entry: Optional[CacheEntry]
+    generation: int
+
+    def is_fresh(self) -> bool:
+        return self.entry is not None and self.entry.is_fresh()
+
+    def validator_headers(self, headers: Optional[dict]) -> Optional[dict]:
+        """Заголовки запроса с If-None-Match, если у устаревшей записи есть ETag"""
+        etag = self.entry.etag if self.entry is not None else None
+        return {**(headers or {}), 'If-None-Match': etag} if etag else headers
+
+
+class ResponseCache:
+    """
+    Кэш ответов GET по нодам.
+
+    Example:
+        response_cache.enabled = True
+        client.get(ApiEndpoints.Pools.BASE)   # запрос к кластеру
+        client.get(ApiEndpoints.Pools.BASE)   # из кэша
+        client.post("/pools/p1", json=...)    # сбрасывает /pools, /pools/{pool_name}, /importview, clusterInfo
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, enabled: Optional[bool] = None):
+        """
+        :param ttls: (dict, optional): Шаблон ApiEndpoints -> TTL в секундах. По умолчанию DEFAULT_TTLS и .env.
+        :param enabled: (bool, optional): По умолчанию из API_RESPONSE_CACHE при первом запросе.
+        """
+        self._ttls = dict(ttls) if ttls is not None else None
+        self._enabled = enabled
+        self._entries: Dict[Tuple[str, str], CacheEntry] = {}
+        self._lock = Lock()
+        # Растёт при каждой инвалидации: ответ GET, начатого до изменения, в кэш не попадает
+        self._generation = 0
+        self.hits = 0
+        self.revalidated = 0
+
+    @property
+    def enabled(self) -> bool:
+        # .env загружается в conftest уже после импорта фреймворка, поэтому читаем его при обращении
+        if self._enabled is None:
+            return os.getenv('API_RESPONSE_CACHE', '').strip().lower() in ('1', 'true', 'yes')
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: Optional[bool]):
+        self._enabled = value
+
+    def ttl_for(self, template: str) -> float:
+        if self._ttls is None:
+            self._ttls = {**DEFAULT_TTLS, **self._read_env()}
+        return self._ttls.get(template, 0.0)
+
+    @staticmethod
+    def _read_env() -> Dict[str, float]:
+        ttls = {}
+        for item in filter(None, os.getenv('API_RESPONSE_CACHE_TTLS', '').split(',')):
+            template, _, ttl = item.strip().rpartition('=')
+            if not template:
+                raise ValueError(f"Invalid API_RESPONSE_CACHE_TTLS item '{item}': expected '<endpoint>=<seconds>'")
+            ttls[template] = float(ttl)
+        return ttls
+
+    def lookup(self, node: str, method: str, template: str, url: str, params=None) -> Optional[CacheLookup]:
+        """None - запрос не кэшируется (не GET, кэш выключен или для эндпоинта нет TTL)"""
+        if method != 'GET' or not self.enabled or self.ttl_for(template) <= 0:
+            return None
+        path = httpx.URL(url).raw_path.decode('ascii')
+        key = (node, f"{path}?{urlencode(sorted(params.items()), doseq=True)}" if params else path)
+        return CacheLookup(key, template, self._entries.get(key), self._generation)
+
+    def hit(self, lookup: CacheLookup, request: httpx.Request) -> httpx.Response:
+        self.hits += 1
+        return lookup.entry.to_response(request)
+
+    def complete(self, lookup: CacheLookup, response: httpx.Response) -> httpx.Response:
+        """
+        Обрабатывает ответ сервера на кэшируемый GET: 304 - продлевает запись и отдаёт её,
+        200 - сохраняет (если с начала запроса кэш не инвалидировали).
+        """
+        if response.status_code == 304 and lookup.entry is not None:
+            response.close()
+            self.revalidated += 1
+            entry = replace(lookup.entry, expires_at=time.monotonic() + self.ttl_for(lookup.template))
+            self._put(lookup, entry)
+            return entry.to_response(response.request)
+
+        if response.status_code == 200:
+            headers = tuple((name, value) for name, value in response.headers.items() if name in _KEPT_HEADERS)
+            expires_at = time.monotonic() + self.ttl_for(lookup.template)
+            self._put(lookup, CacheEntry(lookup.template, 200, headers, response.content, expires_at))
+        return response
+
+    def _put(self, lookup: CacheLookup, entry: CacheEntry):
+        with self._lock:
+            if self._generation == lookup.generation:
+                self._entries[lookup.key] = entry
+
+    def invalidate(self, template: str):
+        """Сбрасывает записи всех нод, которые устаревают после изменения ресурса template"""
+        resources = INVALIDATES.get(_resource(template), (_resource(template),))
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if _resource(entry.template) in resources]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.debug(f"Response cache: {len(stale)} entries invalidated by {template}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Общий кэш ответов для всех клиентов процесса (по аналогии с circuit_breakers)
+response_cache = ResponseCache()
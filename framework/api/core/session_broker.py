@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+from framework.api.core.logger import logger
+from framework.api.core.session_store import FALLBACK_REFRESH_AFTER, access_expires_at, refresh_margin
+from framework.api.core.shared_state import SharedStore, is_xdist_worker, shared_state_path
+
+
+""" Общие сессии для воркеров pytest-xdist.
+
+    Без брокера каждый воркер выполняет свой login на каждую ноду и запускает свой TokenRefresher:
+    16 воркеров и 2 ноды - 32 login и 32 цикла refresh. С брокером login выполняет первый воркер,
+    обратившийся к ноде с данными учётными данными, остальные получают его куки из общего файла SQLite
+    (см. shared_state.py). Refresh тоже выполняется один раз на весь прогон: воркер, заметивший
+    устаревшую сессию, обновляет её, остальные подхватывают новую версию.
+
+    Сам login/refresh идёт вне транзакции SQLite: медленный запрос не держит блокировку записи,
+    и остальные воркеры не падают с "database is locked". Воркер, взявшийся за запрос, отмечает это
+    в таблице flights, остальные ждут новую версию сессии. Если отметка старше API_SESSION_LOGIN_TIMEOUT
+    (воркер упал посреди login), запрос выполняет следующий воркер. Результат записывается,
+    только если версия сессии не изменилась с начала запроса (compare-and-set).
+
+    Сессия закрывается (logout) последним воркером, который её отпускает.
+
+Настройки (.env / переменные окружения):
+    - API_SESSION_BROKER: 1/0 - включить/выключить (по умолчанию включён только для воркеров xdist).
+    - API_SESSION_SYNC_INTERVAL: как часто воркер проверяет новую версию сессии, секунды (по умолчанию 5).
+    - API_SESSION_LOGIN_TIMEOUT: сколько секунд ждать login/refresh другого воркера (по умолчанию 60).
+"""
+
+@dataclass(frozen=True)
+class SharedSession:
+    """Сессия в общем хранилище. version растёт при каждом login/refresh."""
+    cookies: Dict[str, str]
+    session_data: Dict
+    refreshed_at: float
+    version: int
+
+    @property
+    def sid(self) -> str:
+        return self.session_data.get('sid', '')
+
+    def is_fresh(self) -> bool:
+        """jwt_access ещё не пора обновлять (срок из jwtAccessExpirationDate, иначе 170 секунд с обновления)"""
+        expires_at = access_expires_at(self.session_data)
+        if expires_at is not None:
+            return expires_at - refresh_margin() > time.time()
+        return time.time() - self.refreshed_at < FALLBACK_REFRESH_AFTER
+
+
+# login/refresh, выполняемые брокером: возвращают куки и данные сессии после запроса
+SessionFactory = Callable[[], Tuple[Dict[str, str], Dict]]
+
+
+class SessionBroker:
+    """
+    Выдаёт воркерам одну сессию на ноду и учётные данные.
+
+    Example:
+        key = session_broker.key("NODE_1", config)
+        shared = session_broker.acquire(key, login)   # login выполнится, только если сессии ещё нет
+        ...
+        if session_broker.release(key, shared.sid):
+            logout()                                   # последний воркер закрывает сессию
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        "key TEXT PRIMARY KEY, sid TEXT NOT NULL, cookies TEXT NOT NULL, session_data TEXT NOT NULL, "
+        "refreshed_at REAL NOT NULL, version INTEGER NOT NULL, holders INTEGER NOT NULL);"
+        "CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, started_at REAL NOT NULL);"
+    )
+
+    # Пауза между проверками, пока login/refresh выполняет другой воркер
+    FLIGHT_POLL_INTERVAL = 0.05
+
+    def __init__(self, enabled: Optional[bool] = None, path: Optional[str] = None):
+        """
+        :param enabled: (bool, optional): По умолчанию из API_SESSION_BROKER, иначе - если процесс воркер xdist.
+        :param path: (str, optional): Файл SQLite, по умолчанию общий для прогона.
+        """
+        self._enabled = enabled
+        self._path = path
+        self._store: Optional[SharedStore] = None
+        self._store_lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        # Читается при обращении: .env и переменные xdist выставляются после импорта фреймворка
+        if self._enabled is not None:
+            return self._enabled
+        value = os.getenv('API_SESSION_BROKER')
+        return is_xdist_worker() if value is None else value.strip().lower() in ('1', 'true', 'yes')
+
+    @enabled.setter
+    def enabled(self, value: Optional[bool]):
+        self._enabled = value
+
+    @staticmethod
+    def sync_interval() -> float:
+        return float(os.getenv('API_SESSION_SYNC_INTERVAL', 5))
+
+    @staticmethod
+    def key(node: str, config) -> str:
+        """Ключ сессии: нода и учётные данные. Пароль в файл не попадает - только его хэш."""
+        password = hashlib.sha1((config.password or '').encode('utf-8')).hexdigest()[:12]
+        return f"{node} {config.username} {bool(config.remember)} {password}"
+
+    @staticmethod
+    def login_timeout() -> float:
+        return float(os.getenv('API_SESSION_LOGIN_TIMEOUT', 60))
+
+    def acquire(self, key: str, login: SessionFactory) -> SharedSession:
+        """Возвращает действующую сессию, при её отсутствии выполняет login. Воркер становится держателем сессии."""
+        while True:
+            with self._get_store().transaction() as db:
+                shared = self._read(db, key)
+                if shared is not None and shared.is_fresh():
+                    db.execute("UPDATE sessions SET holders = holders + 1 WHERE key = ?", (key,))
+                    logger.info(f"Session {key.split(' ')[0]}: reusing shared session v{shared.version}")
+                    return shared
+                if self._start_flight(db, key):
+                    version = shared.version if shared else 0
+                    break
+            # login выполняет другой воркер - ждём его сессию, а не логинимся сами
+            time.sleep(self.FLIGHT_POLL_INTERVAL)
+
+        session = self._fly(key, login)
+        with self._get_store().transaction() as db:
+            self._land(db, key)
+            shared = self._read(db, key)
+            if shared is not None and shared.version != version and shared.is_fresh():
+                # Отметка login устарела, и другой воркер успел войти раньше - берём его сессию
+                db.execute("UPDATE sessions SET holders = holders + 1 WHERE key = ?", (key,))
+                return shared
+            shared = self._write(db, key, session, version=version + 1, holders=1)
+        logger.info(f"Session {key.split(' ')[0]}: logged in once for all workers")
+        return shared
+
+    def current(self, key: str) -> Optional[SharedSession]:
+        with self._get_store().transaction() as db:
+            return self._read(db, key)
+
+    def refresh(self, key: str, version: int, refresh: SessionFactory) -> Optional[SharedSession]:
+        """
+        Обновляет сессию один раз на прогон.
+        Если другой воркер уже обновил её (версия новее version) - возвращает его версию без запроса.
+        None - сессии нет в брокере (её закрыли), refresh не выполнялся.
+        """
+        while True:
+            with self._get_store().transaction() as db:
+                shared = self._read(db, key)
+                if shared is None or shared.version != version:
+                    return shared
+                if self._start_flight(db, key):
+                    break
+            time.sleep(self.FLIGHT_POLL_INTERVAL)
+
+        session = self._fly(key, refresh)
+        with self._get_store().transaction() as db:
+            self._land(db, key)
+            shared = self._read(db, key)
+            if shared is None or shared.version != version:
+                # Сессию закрыли или заменили, пока шёл refresh
+                return shared
+            holders = db.execute("SELECT holders FROM sessions WHERE key = ?", (key,)).fetchone()[0]
+            return self._write(db, key, session, version=version + 1, holders=holders)
+
+    def _start_flight(self, db, key: str) -> bool:
+        """Отмечает, что воркер начинает login/refresh. False - его уже выполняет другой воркер."""
+        row = db.execute("SELECT started_at FROM flights WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is not None and now - row[0] < self.login_timeout():
+            return False
+        db.execute("INSERT OR REPLACE INTO flights (key, started_at) VALUES (?, ?)", (key, now))
+        return True
+
+    def _fly(self, key: str, request: SessionFactory) -> Tuple[Dict[str, str], Dict]:
+        """Выполняет login/refresh вне транзакции. При ошибке отметка снимается - запрос повторит другой воркер"""
+        try:
+            return request()
+        except BaseException:
+            with self._get_store().transaction() as db:
+                self._land(db, key)
+            raise
+
+    @staticmethod
+    def _land(db, key: str):
+        db.execute("DELETE FROM flights WHERE key = ?", (key,))
+
+    def release(self, key: str, sid: str) -> bool:
+        """
+        Воркер отпускает сессию. True - сессия больше никому не нужна и её следует закрыть (logout).
+        Сессия, которую брокер уже не выдаёт (закрыта или заменена), принадлежит только этому воркеру.
+        """
+        with self._get_store().transaction() as db:
+            shared = self._read(db, key)
+            if shared is None or shared.sid != sid:
+                return True
+            db.execute("UPDATE sessions SET holders = holders - 1 WHERE key = ?", (key,))
+            if db.execute("SELECT holders FROM sessions WHERE key = ?", (key,)).fetchone()[0] > 0:
+                return False
+            db.execute("DELETE FROM sessions WHERE key = ?", (key,))
+            return True
+
+    def forget(self, key: str, sid: str):
+        """Убирает сессию из брокера (явный logout в тесте): следующий воркер выполнит новый login"""
+        with self._get_store().transaction() as db:
+            db.execute("DELETE FROM sessions WHERE key = ? AND sid = ?", (key, sid))
+
+    @staticmethod
+    def _read(db, key: str) -> Optional[SharedSession]:
+        row = db.execute(
+            "SELECT cookies, session_data, refreshed_at, version FROM sessions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        cookies, session_data, refreshed_at, version = row
+        return SharedSession(json.loads(cookies), json.loads(session_data), refreshed_at, version)
+
+    @staticmethod
+    def _write(db, key: str, session: Tuple[Dict[str, str], Dict], version: int, holders: int) -> SharedSession:
+        cookies, session_data = session
+        shared = SharedSession(dict(cookies), session_data, time.time(), version)
+        db.execute(
+            "INSERT OR REPLACE INTO sessions (key, sid, cookies, session_data, refreshed_at, version, holders) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, shared.sid, json.dumps(shared.cookies), json.dumps(session_data), shared.refreshed_at,
+             version, holders)
+        )
+        return shared
+
+    def _get_store(self) -> SharedStore:
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = SharedStore(self._path or shared_state_path('sessions'), self.SCHEMA)
+        return self._store
+
+
+# Общий брокер сессий процесса (по аналогии с rate_limiter)
+session_broker = SessionBroker()
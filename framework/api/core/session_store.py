@@ -0,0 +1,192 @@
+import os
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Callable, Dict, Optional
+from framework.api.core.cookie_manager import CookieManager
+from framework.api.core.logger import logger
+
+
+""" Сессия ноды: куки, данные login и заголовки авторизации в одном месте.
+
+    Хранилище одно на клиент ноды. Его читают синхронный и асинхронный клиенты (куки каждого запроса),
+    AuthTools/AsyncAuthTools и TokenRefresher из фонового потока.
+
+    Состояние хранится неизменяемым снимком SessionSnapshot (copy-on-write): запись под блокировкой
+    собирает новый снимок и подменяет ссылку, чтение - одно обращение к атрибуту без блокировки и копирования.
+    Поэтому тесты в потоках могут работать поверх одного login, а куки и заголовки всегда согласованы между собой.
+
+    Обновление сессии (renew) выполняется single-flight: TokenRefresher по сроку jwtAccessExpirationDate
+    и клиенты, получившие 401, ждут один и тот же refresh, а не запускают каждый свой.
+
+Настройки (.env / переменные окружения):
+    - API_TOKEN_REFRESH_MARGIN: за сколько секунд до истечения jwt_access обновлять токены (по умолчанию 10).
+"""
+
+# Если сервер не вернул срок действия jwt_access: 3 минуты минус 10 секунд, как раньше
+FALLBACK_REFRESH_AFTER = 170
+
+
+def refresh_margin() -> float:
+    return float(os.getenv('API_TOKEN_REFRESH_MARGIN', 10))
+
+
+def access_expires_at(session_data: Optional[Dict], server_date: Optional[str] = None) -> Optional[float]:
+    """
+    Срок действия jwt_access из ответа login/refresh по часам этой машины.
+
+    :param server_date: (str, optional): Заголовок Date ответа - по нему учитывается расхождение часов с сервером.
+    :return: float: Время истечения (time.time()) или None, если сервер срок не вернул.
+    """
+    value = (session_data or {}).get('jwtAccessExpirationDate')
+    if not value:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            expires = value / 1000 if value > 1e11 else float(value)
+        else:
+            expires = datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        logger.warning(f"Unexpected jwtAccessExpirationDate format: {value}")
+        return None
+
+    if server_date:
+        try:
+            expires += time.time() - parsedate_to_datetime(server_date).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return expires
+
+
+@dataclass(frozen=True)
+class SessionSnapshot:
+    """
+    Состояние сессии на момент чтения.
+    cookies и auth_headers - общие для всех читателей словари, изменять их нельзя.
+    """
+    cookies: Dict[str, str] = field(default_factory=dict)
+    session_data: Optional[Dict] = None
+    auth_headers: Optional[Dict[str, str]] = None
+    refreshed_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+    def refresh_in(self) -> Optional[float]:
+        """Через сколько секунд пора обновлять токены (0 - уже пора), None - сессии нет"""
+        if not self.session_data or self.refreshed_at is None:
+            return None
+        if self.expires_at is not None:
+            due = self.expires_at - refresh_margin()
+        else:
+            due = self.refreshed_at + FALLBACK_REFRESH_AFTER
+        return max(0.0, due - time.time())
+
+
+_EMPTY = SessionSnapshot()
+
+
+class SessionStore:
+    """
+    Потокобезопасное хранилище сессии одной ноды.
+
+    Example:
+        session = client.session
+        session.update_from_response(response)
+        cookies = session.cookies          # без копирования
+        session_data = session.snapshot.session_data
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._snapshot = _EMPTY
+        self._renew_lock = Lock()
+        self._renewer: Optional[Callable[[], None]] = None
+
+    @property
+    def snapshot(self) -> SessionSnapshot:
+        return self._snapshot
+
+    @property
+    def cookies(self) -> Dict[str, str]:
+        """Текущие куки. Словарь не копируется - его нельзя изменять."""
+        return self._snapshot.cookies
+
+    def get_current_cookies(self) -> dict:
+        """Копия текущих куки (совместимо с CookieManager)"""
+        return dict(self._snapshot.cookies)
+
+    def update_from_response(self, response):
+        if 'Set-Cookie' not in response.headers:
+            return
+        cookies = CookieManager.parse_set_cookie_header(response.headers.get_list('Set-Cookie'))
+        if cookies:
+            self.update_cookies(cookies)
+
+    def update_cookies(self, cookies: Dict[str, str]):
+        with self._lock:
+            current = self._snapshot
+            if all(current.cookies.get(name) == value for name, value in cookies.items()):
+                return
+            merged = {**current.cookies, **cookies}
+            self._snapshot = replace(
+                current, cookies=merged,
+                auth_headers=self._auth_headers(merged) if current.auth_headers is not None else None
+            )
+
+    def set_session(self, session_data: Dict, refreshed_at: Optional[float] = None,
+                    expires_at: Optional[float] = None):
+        """
+        Сохраняет данные login/refresh и собирает заголовки авторизации по текущим куки.
+
+        :param expires_at: (float, optional): Срок jwt_access, по умолчанию из jwtAccessExpirationDate.
+        """
+        with self._lock:
+            self._snapshot = replace(
+                self._snapshot,
+                session_data=session_data,
+                auth_headers=self._auth_headers(self._snapshot.cookies),
+                refreshed_at=time.time() if refreshed_at is None else refreshed_at,
+                expires_at=access_expires_at(session_data) if expires_at is None else expires_at
+            )
+
+    def bind_renewer(self, renewer: Optional[Callable[[], None]]):
+        """Задаёт функцию обновления сессии (refresh или повторный login), её вызывает renew()"""
+        self._renewer = renewer
+
+    def renew(self, seen: SessionSnapshot) -> bool:
+        """
+        Single-flight обновление сессии.
+
+        :param seen: (SessionSnapshot): Снимок, с которым был отправлен запрос (или проверен срок).
+            Если сессия уже сменилась - другой поток обновил её, повторный refresh не выполняется.
+        :return: bool: True - сессия новее seen, запрос можно повторить.
+        """
+        renewer = self._renewer
+        if renewer is None:
+            return False
+        with self._renew_lock:
+            if self._changed_since(seen):
+                return True
+            try:
+                renewer()
+            except Exception as e:
+                logger.error(f"Session renewal failed: {e}")
+                return False
+            return self._changed_since(seen)
+
+    def _changed_since(self, seen: SessionSnapshot) -> bool:
+        current = self._snapshot
+        return current.refreshed_at != seen.refreshed_at or current.cookies is not seen.cookies
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = _EMPTY
+            self._renewer = None
+
+    @staticmethod
+    def _auth_headers(cookies: Dict[str, str]) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Cookie": CookieManager.format_cookie_header(cookies)
+        }
@@ -0,0 +1,94 @@
+import glob
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from threading import Lock
+from typing import List, Optional
+
+
+""" Общее состояние процессов одного прогона (воркеров pytest-xdist) в файле SQLite.
+
+    Все воркеры одного запуска получают одинаковый PYTEST_XDIST_TESTRUNUID, по нему строится путь к файлу.
+    Вне xdist файл привязан к PID процесса. SQLite выбран потому, что работает одинаково
+    на Linux и на Windows-раннере GitLab (fcntl там недоступен) и сам сериализует запись.
+    Файлы прогона удаляются в конце сессии (remove_shared_state из pytest_sessionfinish контроллера).
+
+Настройки (.env / переменные окружения):
+    - API_SHARED_STATE_DIR: каталог файлов состояния (по умолчанию системный временный каталог).
+"""
+
+
+def is_xdist_worker() -> bool:
+    return bool(os.getenv('PYTEST_XDIST_WORKER'))
+
+
+def run_id() -> str:
+    """Идентификатор прогона, общий для всех воркеров xdist"""
+    return os.getenv('PYTEST_XDIST_TESTRUNUID') or f"pid{os.getpid()}"
+
+
+def shared_state_dir() -> str:
+    return os.getenv('API_SHARED_STATE_DIR', tempfile.gettempdir())
+
+
+def shared_state_path(name: str) -> str:
+    return os.path.join(shared_state_dir(), f"at_api_{name}_{run_id()}.sqlite3")
+
+
+def remove_shared_state(run: Optional[str] = None) -> List[str]:
+    """
+    Удаляет файлы состояния прогона (вместе с -wal и -shm). Вызывать, когда воркеры уже завершились.
+
+    :param run: (str, optional): Идентификатор прогона, по умолчанию run_id() текущего процесса.
+    :return: list: Удалённые файлы.
+    """
+    removed = []
+    for path in glob.glob(os.path.join(shared_state_dir(), f"at_api_*_{glob.escape(run or run_id())}.sqlite3*")):
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            # На Windows файл, открытый другим процессом, удалить нельзя - он останется до следующей очистки
+            pass
+    return removed
+
+
+class SharedStore:
+    """
+    Файл SQLite с сериализованными транзакциями.
+
+    Одно соединение на процесс, доступ из потоков процесса защищён блокировкой,
+    между процессами транзакции сериализует сам SQLite (BEGIN IMMEDIATE).
+
+    Example:
+        store = SharedStore(shared_state_path("rate_limits"), "CREATE TABLE IF NOT EXISTS ...")
+        with store.transaction() as db:
+            db.execute("UPDATE ...")
+    """
+
+    def __init__(self, path: str, schema: str = ''):
+        self.path = path
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        if schema:
+            # Схема описывается через CREATE ... IF NOT EXISTS, поэтому её безопасно применять из каждого воркера
+            with self._lock:
+                self._connection.executescript(schema)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -5,6 +5,9 @@ from framework.api.tools.disk_tools import DiskTools
 from framework.api.tools.cluster_tools import ClusterTools
 from framework.api.tools.auth_tools import AuthTools
 from framework.api.tools.connection_tools import ConnectionTools
+from framework.api.tools.async_auth_tools import AsyncAuthTools
+from framework.api.tools.async_cluster_tools import AsyncClusterTools
+from framework.api.tools.async_pool_tools import AsyncPoolTools
 
 if TYPE_CHECKING:
     from ..core.context import TestContext
@@ -24,6 +27,9 @@ class ToolsManager:
         self.register_tool('cluster', ClusterTools)
         self.register_tool('disk', DiskTools)
         self.register_tool('pools', PoolTools)
+        self.register_tool('async_auth', AsyncAuthTools)
+        self.register_tool('async_cluster', AsyncClusterTools)
+        self.register_tool('async_pools', AsyncPoolTools)
 
 
     def register_tool(self, name: str, tool_class: Type[BaseTools]):
@@ -53,3 +59,15 @@ class ToolsManager:
     @property
     def connection(self) -> ConnectionTools:
         return self.get_tool('connection')
+
+    @property
+    def async_pool(self) -> AsyncPoolTools:
+        return self.get_tool('async_pools')
+
+    @property
+    def async_cluster(self) -> AsyncClusterTools:
+        return self.get_tool('async_cluster')
+
+    @property
+    def async_auth(self) -> AsyncAuthTools:
+        return self.get_tool('async_auth')
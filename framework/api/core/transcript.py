@@ -0,0 +1,101 @@
+import os
+import time
+from collections import deque
+from typing import List, Optional
+
+
+""" Журнал последних HTTP-запросов теста (кольцевой буфер).
+
+    На горячем пути клиент только складывает сырые данные запроса в буфер.
+    Преобразование в cURL и вложение в Allure/TestIT выполняется лишь для упавших тестов
+    или при включённом флаге API_DEBUG_TRANSCRIPT, поэтому успешные прогоны почти ничего не платят.
+
+Настройки (.env / переменные окружения):
+    - API_TRANSCRIPT_SIZE: сколько последних запросов хранить (по умолчанию 50).
+    - API_DEBUG_TRANSCRIPT: 1/true - логировать cURL каждого запроса и прикладывать журнал ко всем тестам.
+"""
+
+
+def is_debug_enabled() -> bool:
+    return os.getenv('API_DEBUG_TRANSCRIPT', '').lower() in ('1', 'true', 'yes')
+
+
+class RequestRecord:
+    """Сырые данные одного запроса. Ссылки на headers/json сохраняются без копирования."""
+
+    __slots__ = ('method', 'url', 'headers', 'params', 'json', 'cookies',
+                 'status_code', 'elapsed', 'timestamp')
+
+    def __init__(self, method, url, headers=None, params=None, json=None, cookies=None):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.params = params
+        self.json = json
+        self.cookies = cookies
+        self.status_code: Optional[int] = None
+        self.elapsed: Optional[float] = None
+        self.timestamp = time.time()
+
+    def to_curl(self) -> str:
+        # Импорт здесь, чтобы не было циклической зависимости с api_client
+        from framework.api.core.api_client import request_to_curl
+        return request_to_curl(self.method, self.url, self.headers, self.params, self.json, self.cookies)
+
+    def describe(self) -> str:
+        status = self.status_code if self.status_code is not None else 'no response'
+        elapsed = f"{self.elapsed:.2f}s" if self.elapsed is not None else '-'
+        return f"{self.method} {self.url} -> {status} ({elapsed})\n{self.to_curl()}"
+
+
+class RequestTranscript:
+    """Кольцевой буфер последних N запросов"""
+
+    def __init__(self, maxlen: Optional[int] = None):
+        self._records = deque(maxlen=maxlen or int(os.getenv('API_TRANSCRIPT_SIZE', 50)))
+
+    def record(self, method, url, headers=None, params=None, json=None, cookies=None) -> RequestRecord:
+        record = RequestRecord(method, url, headers, params, json, cookies)
+        # deque.append потокобезопасен, блокировка не нужна
+        self._records.append(record)
+        return record
+
+    def clear(self):
+        self._records.clear()
+
+    def records(self) -> List[RequestRecord]:
+        return list(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def render(self) -> str:
+        """Преобразует сохранённые запросы в текст с cURL командами"""
+        return '\n\n'.join(
+            f"[{index}] {record.describe()}" for index, record in enumerate(self.records(), start=1)
+        )
+
+    def attach(self, name: str = "HTTP transcript") -> Optional[str]:
+        """Прикладывает журнал к отчётам Allure и TestIT. Возвращает отрисованный текст."""
+        if not self._records:
+            return None
+
+        text = self.render()
+
+        try:
+            import allure
+            allure.attach(text, name=name, attachment_type=allure.attachment_type.TEXT)
+        except ImportError:
+            pass
+
+        try:
+            import testit
+            testit.addAttachments(text, is_text=True, name=f"{name}.txt")
+        except ImportError:
+            pass
+
+        return text
+
+
+# Общий журнал для всех клиентов процесса (по аналогии с logger)
+request_transcript = RequestTranscript()
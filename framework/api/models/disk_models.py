@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional, List, Dict, Set, Union
+from framework.api.resources.disks.disk_inventory import DiskInventory, Groups
 
 
 class DiskType(str, Enum):
@@ -65,7 +66,8 @@ class ClusterDisks:
     disks_info: Dict[str, dict]  # Информация о всех дисках
     free_disks: List[str]  # Список свободных дисков
     free_for_wc: List[str]  # Список дисков доступных для write cache
-    free_disks_by_size_and_type: Dict[tuple, List[str]]
+    free_disks_by_size_and_type: Groups  # Свободные диски по (размер, тип), только для чтения
+    inventory: Optional[DiskInventory] = None  # Индексы дисков, по ним стратегии выбирают диски
 
     # def get_disks_by_type(self, disk_type: str) -> List[str]:
     #     """Получение списка дисков определенного типа"""
@@ -96,6 +98,9 @@ class DiskSelection:
     rdc_disks: Union[Set[str], List[str]] = field(default_factory=set)
     spare_disks: Union[Set[str], List[str]] = field(default_factory=set)
 
+    def all_disks(self) -> Set[str]:
+        return {*self.main_disks, *self.wrc_disks, *self.rdc_disks, *self.spare_disks}
+
     def to_dict(self) -> Dict:
         return {
             'mainDisks': list(self.main_disks),
@@ -0,0 +1,119 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+""" Разница между двумя снимками дисков кластера.
+
+    Сравниваются исходные словари дисков из clusterInfo: равные словари сравниваются на уровне C,
+    поэтому разбирать по полям приходится только изменившиеся диски. Неизменившиеся диски нового снимка
+    заменяются объектами предыдущего (структурное разделение): история снимков не хранит копии
+    одинаковых дисков, а DiskInventory нового снимка пересобирает записи только для изменившихся.
+"""
+
+
+@dataclass(frozen=True)
+class DiskChange:
+    disk: str
+    field: str
+    before: Any
+    after: Any
+
+
+@dataclass(frozen=True)
+class ClusterDiff:
+    """
+    Изменения дисков между версиями снимка from_version и to_version.
+
+    Example:
+        diff = cluster_tools.diff(old_snapshot, cluster_tools.refresh())
+        diff.joined_pools()    # {'disk_1': ['pool_1']}
+        diff.flagged()         # {'disk_7': ('damaged',)}
+    """
+    from_version: Optional[int]
+    to_version: int
+    added: Tuple[str, ...] = ()
+    removed: Tuple[str, ...] = ()
+    changes: Tuple[DiskChange, ...] = ()
+    at: float = field(default_factory=time.time)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changes)
+
+    @property
+    def changed_disks(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(change.disk for change in self.changes))
+
+    def field_changes(self, name: str) -> Tuple[DiskChange, ...]:
+        return tuple(change for change in self.changes if change.field == name)
+
+    def joined_pools(self) -> Dict[str, List[str]]:
+        """Диск -> пулы, в которые он вошёл"""
+        return self._pool_moves(joined=True)
+
+    def left_pools(self) -> Dict[str, List[str]]:
+        """Диск -> пулы, из которых он вышел"""
+        return self._pool_moves(joined=False)
+
+    def _pool_moves(self, joined: bool) -> Dict[str, List[str]]:
+        moves = {}
+        for change in self.field_changes('pools'):
+            before, after = change.before or [], change.after or []
+            pools = [pool for pool in after if pool not in before] if joined else \
+                [pool for pool in before if pool not in after]
+            if pools:
+                moves[change.disk] = pools
+        return moves
+
+    def state_changes(self) -> Dict[str, Tuple[Any, Any]]:
+        return {change.disk: (change.before, change.after) for change in self.field_changes('state')}
+
+    def flagged(self) -> Dict[str, Tuple[str, ...]]:
+        """Диски, у которых появились флаги damaged/removed"""
+        flags: Dict[str, Tuple[str, ...]] = {}
+        for change in self.changes:
+            if change.field in ('damaged', 'removed') and change.after and not change.before:
+                flags[change.disk] = flags.get(change.disk, ()) + (change.field,)
+        return flags
+
+    def summary(self) -> str:
+        parts = [
+            f"{len(items)} {label}" for label, items in (
+                ('added', self.added), ('removed', self.removed), ('changed', self.changed_disks),
+                ('joined pools', self.joined_pools()), ('left pools', self.left_pools()),
+                ('flagged', self.flagged()),
+            ) if items
+        ]
+        return f"v{self.from_version} -> v{self.to_version}: {', '.join(parts) or 'no changes'}"
+
+
+def diff_disks(before: Mapping[str, dict], containers: List[Dict[str, dict]],
+               from_version: Optional[int], to_version: int) -> Tuple[ClusterDiff, Dict[str, dict]]:
+    """
+    Сравнивает диски предыдущего снимка с дисками нового ответа.
+
+    :param before: (dict): Диски предыдущего снимка по имени.
+    :param containers: (list): Словари `disks` нового ответа. Неизменившиеся диски в них заменяются
+        объектами из before - новый ответ разделяет их с предыдущим снимком.
+    :return: tuple: Разница и диски нового снимка по имени.
+    """
+    after: Dict[str, dict] = {}
+    changes: List[DiskChange] = []
+    added: List[str] = []
+
+    for container in containers:
+        for name, disk in container.items():
+            previous = before.get(name)
+            if previous is None:
+                added.append(name)
+            elif previous == disk:
+                disk = container[name] = previous
+            else:
+                changes.extend(
+                    DiskChange(name, key, previous.get(key), disk.get(key))
+                    for key in dict.fromkeys((*previous, *disk)) if previous.get(key) != disk.get(key)
+                )
+            after[name] = disk
+
+    removed = tuple(name for name in before if name not in after)
+    return ClusterDiff(from_version, to_version, tuple(added), removed, tuple(changes)), after
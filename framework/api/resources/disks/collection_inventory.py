@@ -0,0 +1,117 @@
+import json
+import os
+from typing import Callable, Dict, Optional
+from framework.api.core.cassette import MODE_REPLAY, cassette_mode
+from framework.api.core.client_registry import ClientRegistry
+from framework.api.core.context import TestContext
+from framework.api.core.logger import logger
+from framework.api.core.shared_state import SharedStore, is_xdist_worker, shared_state_path
+from framework.api.utils.extractors import TestExtractor
+from .cluster_diff import diff_disks
+from .disk_inventory import DiskInventory
+
+
+""" Инвентарь дисков кластера на этапе сбора тестов.
+
+    Конфигурации пулов, которые кластер не вмещает, раньше выяснялись только при создании пула:
+    тест ждал в disk_operation_with_retry и падал с "Insufficient disks". Чтобы отсеять их при сборе,
+    clusterInfo запрашивается один раз до запуска тестов (отдельным клиентом, с login и logout)
+    или берётся из сохранённого ответа, и по нему строится DiskInventory.
+
+    Под pytest-xdist ответ запрашивает первый воркер, остальные берут его из общего файла (shared_state.py):
+    списки тестов всех воркеров должны совпадать, а кластер между запросами воркеров может измениться.
+    Если запрос не удался, все воркеры одинаково работают без инвентаря (конфигурации не отсеиваются).
+    При воспроизведении кассет (API_CASSETTE_MODE=replay) кластер не запрашивается.
+
+    conftest запрашивает инвентарь, только если после отбора тестов (-k, -m) остались тесты с pool_config
+    или needs_disks, и не запрашивает его при --collect-only и --no-pool-feasibility. Если кластер недоступен,
+    сбор продолжается без проверки конфигураций.
+
+Настройки (.env / переменные окружения):
+    - API_COLLECTION_INVENTORY: 0 - не проверять конфигурации при сборе; путь к JSON-файлу
+      с ответом clusterInfo - брать инвентарь из него (по умолчанию clusterInfo запрашивается у кластера).
+"""
+
+_DISABLED = ('0', 'false', 'no')
+
+
+def collection_inventory_source() -> str:
+    # .env загружается в conftest уже после импорта фреймворка, поэтому читаем его при обращении
+    return os.getenv('API_COLLECTION_INVENTORY', '').strip()
+
+
+def inventory_from_cluster_info(data: dict) -> DiskInventory:
+    """Инвентарь по ответу clusterInfo - так же, как первый снимок ClusterTools"""
+    _, disks = diff_disks({}, TestExtractor.find_disks(data), None, 1)
+    return DiskInventory.from_disks(disks)
+
+
+def load_cluster_info(path: str) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def fetch_cluster_info(nodes: Dict[str, str], transports: Optional[Dict] = None) -> dict:
+    """
+    Запрашивает clusterInfo у первой ноды отдельным клиентом.
+
+    :param nodes: (dict): Ноды и их URL (ConnectionTools.get_available_nodes()).
+    :param transports: (dict, optional): Транспорты по нодам (эмулятор).
+    """
+    if not nodes:
+        raise ValueError("No nodes configured to fetch clusterInfo from")
+    registry = ClientRegistry(nodes, transports=transports)
+    try:
+        client = registry.get(sorted(nodes)[0])
+        context = TestContext(client=client, base_url=client.base_url)
+        auth = context.tools_manager.auth
+        auth.configure().login()
+        try:
+            return context.tools_manager.cluster.snapshot().data
+        finally:
+            auth.logout_and_clean()
+    finally:
+        registry.close()
+
+
+def shared_cluster_info(fetch: Callable[[], Optional[dict]]) -> Optional[dict]:
+    """Ответ clusterInfo, один на все воркеры xdist: запрашивает первый воркер, остальные читают его"""
+    if not is_xdist_worker():
+        return fetch()
+    store = SharedStore(shared_state_path('collection'),
+                        "CREATE TABLE IF NOT EXISTS cluster_info (id INTEGER PRIMARY KEY, body TEXT NOT NULL);")
+    try:
+        with store.transaction() as db:
+            row = db.execute("SELECT body FROM cluster_info WHERE id = 1").fetchone()
+        if row is None:
+            # Запрос - вне транзакции (он может идти дольше таймаута блокировки SQLite), сохраняется первый ответ
+            body = json.dumps(fetch())
+            with store.transaction() as db:
+                db.execute("INSERT OR IGNORE INTO cluster_info (id, body) VALUES (1, ?)", (body,))
+                row = db.execute("SELECT body FROM cluster_info WHERE id = 1").fetchone()
+        return json.loads(row[0])
+    finally:
+        store.close()
+
+
+def collection_inventory(nodes: Dict[str, str], transports: Optional[Dict] = None) -> Optional[DiskInventory]:
+    """
+    Инвентарь для проверки конфигураций при сборе или None, если проверка выключена или кластер недоступен.
+    """
+    source = collection_inventory_source()
+    if source.lower() in _DISABLED:
+        return None
+    if source:
+        return inventory_from_cluster_info(load_cluster_info(source))
+    if cassette_mode() == MODE_REPLAY:
+        return None
+
+    def fetch() -> Optional[dict]:
+        try:
+            return fetch_cluster_info(nodes, transports)
+        except Exception as e:
+            logger.warning(f"Cluster inventory for collection is unavailable, pool configs are not checked: {e}")
+            return None
+
+    data = shared_cluster_info(fetch)
+    return inventory_from_cluster_info(data) if data is not None else None
@@ -0,0 +1,282 @@
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping as MappingType, Optional, Tuple
+
+
+""" Инвентарь дисков кластера с индексами для выбора дисков.
+
+    Раньше TestExtractor копировал каждый диск в отдельный словарь из 17 ключей и строил списки
+    свободных дисков заново на каждый вызов, а стратегии выбора перебирали их целиком.
+    DiskInventory хранит диски компактными записями DiskRecord (__slots__, строки интернированы:
+    имена, типы, состояния и пулы повторяются тысячи раз) и поддерживает индексы при каждом изменении:
+    - свободные диски по (размер, тип);
+    - диски, доступные для write cache, по (размер, тип);
+    - состояние, пулы, полки (enclosure_id).
+
+    Индексы - словари, где dict используется как упорядоченное множество (как в эмуляторе):
+    порядок дисков совпадает с порядком в clusterInfo, добавление и удаление за O(1).
+    free_groups/wc_groups отдают представления только для чтения (MappingProxyType с кортежами дисков),
+    собранные один раз до следующего изменения инвентаря; с exclude пересобираются только группы,
+    в которые попали исключённые диски.
+"""
+
+# Ключи записи о диске. Первые 17 - поля, которые TestExtractor сохранял в disks_info
+DISK_FIELDS = (
+    'type', 'size', 'state', 'model', 'vendor', 'serial', 'dev_name', 'rotational', 'bus',
+    'partition_count', 'partitions', 'used_as_wc', 'rdcache', 'spare', 'pools', 'damaged', 'removed',
+    'enclosure_id', 'slot',
+)
+
+SizeType = Tuple[int, str]
+Groups = MappingType[SizeType, Tuple[str, ...]]
+
+
+def _intern(value):
+    """Строки, которые повторяются у многих дисков (тип, модель, пул...), хранятся в одном экземпляре"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class DiskRecord:
+    """
+    Диск кластера. Поддерживает обращение как к словарю (disk['size'], disk.get('pools')),
+    поэтому код, работавший с disks_info[disk_id][...], продолжает работать.
+    """
+
+    __slots__ = ('name',) + DISK_FIELDS
+
+    def __init__(self, name: str, data: dict):
+        get = data.get
+        self.name = sys.intern(name)
+        self.type = _intern(get('type'))
+        self.size = get('size')
+        self.state = _intern(get('state'))
+        self.model = _intern(get('model'))
+        self.vendor = _intern(get('vendor'))
+        self.serial = get('serial')
+        self.dev_name = get('dev_name')
+        self.rotational = get('rotational')
+        self.bus = _intern(get('bus'))
+        self.partition_count = get('partition_count')
+        self.partitions = get('partitions') or []
+        # Диск без поля used_as_wc не используется как write cache и может быть свободным
+        self.used_as_wc = get('used_as_wc', 0)
+        self.rdcache = get('rdcache')
+        self.spare = get('spare')
+        self.pools = tuple(map(_intern, get('pools') or ()))
+        self.damaged = get('damaged')
+        self.removed = get('removed')
+        self.enclosure_id = _intern(get('enclosure_id'))
+        self.slot = get('slot')
+
+    @property
+    def is_free(self) -> bool:
+        """Не входит в пулы и не используется как write cache"""
+        return not self.pools and self.used_as_wc == 0
+
+    @property
+    def is_free_for_wc(self) -> bool:
+        return self.used_as_wc == 1
+
+    @property
+    def size_type(self) -> SizeType:
+        return self.size, self.type
+
+    def __getitem__(self, key: str):
+        if key not in DISK_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in DISK_FIELDS else default
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in DISK_FIELDS}
+
+    def __eq__(self, other):
+        if not isinstance(other, DiskRecord):
+            return NotImplemented
+        return self.name == other.name and all(getattr(self, key) == getattr(other, key) for key in DISK_FIELDS)
+
+    def __repr__(self):
+        return f"DiskRecord({self.name!r}, {self.size}, {self.type}, pools={list(self.pools)})"
+
+
+class DiskInventory(Mapping):
+    """
+    Диски кластера по имени и индексы по ним. Только для чтения снаружи: меняется через add/remove.
+
+    Example:
+        inventory = DiskInventory.from_disks(cluster_info['disks'])
+        inventory['disk_1']['size']
+        inventory.free_groups(disk_type='SSD')      # {(size, 'SSD'): (disk, ...)}
+        inventory.in_pool('pool_1')
+    """
+
+    def __init__(self):
+        self._disks: Dict[str, DiskRecord] = {}
+        self._free: Dict[str, None] = {}
+        self._free_by_size_type: Dict[SizeType, Dict[str, None]] = {}
+        self._wc_by_size_type: Dict[SizeType, Dict[str, None]] = {}
+        self._by_state: Dict[str, Dict[str, None]] = {}
+        self._by_pool: Dict[str, Dict[str, None]] = {}
+        self._by_enclosure: Dict[str, Dict[str, None]] = {}
+        # Представления групп для free_groups/wc_groups, сбрасываются при изменении индексов
+        self._group_views: Dict[str, Groups] = {}
+
+    @classmethod
+    def from_disks(cls, disks: Dict[str, dict]) -> 'DiskInventory':
+        inventory = cls()
+        inventory.update(disks)
+        return inventory
+
+    # --- Изменение ---
+
+    def add(self, name: str, data: dict) -> DiskRecord:
+        """Добавляет диск или заменяет запись о нём (индексы обновляются)"""
+        if name in self._disks:
+            self.remove(name)
+        record = DiskRecord(name, data)
+        self._disks[record.name] = record
+        self._index(record)
+        return record
+
+    def update(self, disks: Dict[str, dict]):
+        for name, data in disks.items():
+            self.add(name, data)
+
+    def with_changes(self, disks: Dict[str, dict], updated: Iterable[str]) -> 'DiskInventory':
+        """
+        Новый инвентарь по дискам нового снимка (см. cluster_diff.diff_disks). Записи пересоздаются
+        только для дисков updated, остальные общие с этим инвентарём. Порядок дисков - как в disks.
+        """
+        updated = set(updated)
+        inventory = DiskInventory()
+        for name, data in disks.items():
+            record = self._disks.get(name) if name not in updated else None
+            if record is None:
+                record = DiskRecord(name, data)
+            inventory._disks[record.name] = record
+            inventory._index(record)
+        return inventory
+
+    def remove(self, name: str) -> Optional[DiskRecord]:
+        record = self._disks.pop(name, None)
+        if record is not None:
+            self._unindex(record)
+        return record
+
+    def _index(self, record: DiskRecord):
+        name = record.name
+        self._group_views.clear()
+        if record.is_free:
+            self._free[name] = None
+            if record.size and record.type:
+                self._free_by_size_type.setdefault(record.size_type, {})[name] = None
+        if record.is_free_for_wc:
+            self._wc_by_size_type.setdefault(record.size_type, {})[name] = None
+        self._by_state.setdefault(record.state, {})[name] = None
+        for pool in record.pools:
+            self._by_pool.setdefault(pool, {})[name] = None
+        self._by_enclosure.setdefault(record.enclosure_id, {})[name] = None
+
+    def _unindex(self, record: DiskRecord):
+        name = record.name
+        self._group_views.clear()
+        self._free.pop(name, None)
+        _discard(self._free_by_size_type, record.size_type, name)
+        _discard(self._wc_by_size_type, record.size_type, name)
+        _discard(self._by_state, record.state, name)
+        for pool in record.pools:
+            _discard(self._by_pool, pool, name)
+        _discard(self._by_enclosure, record.enclosure_id, name)
+
+    # --- Mapping ---
+
+    def __getitem__(self, name: str) -> DiskRecord:
+        return self._disks[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._disks
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._disks)
+
+    def __len__(self) -> int:
+        return len(self._disks)
+
+    def __repr__(self):
+        return f"DiskInventory({len(self._disks)} disks, {len(self._free)} free, {len(self._by_pool)} pools)"
+
+    # --- Запросы ---
+
+    def free_disks(self) -> List[str]:
+        return list(self._free)
+
+    def free_for_wc(self) -> List[str]:
+        return [name for disks in self._wc_by_size_type.values() for name in disks]
+
+    def free_groups(self, disk_type: Optional[str] = None, disk_size: Optional[int] = None,
+                    exclude=()) -> Groups:
+        """
+        Свободные диски по (размер, тип) с фильтром по типу и размеру, без дисков из exclude.
+        Без фильтров и exclude - общее представление без копирования. Изменять результат нельзя.
+        """
+        return self._groups('free', self._free_by_size_type, disk_type, disk_size, exclude)
+
+    def wc_groups(self, disk_type: Optional[str] = None, disk_size: Optional[int] = None,
+                  exclude=()) -> Groups:
+        """Диски, доступные для write cache, по (размер, тип). См. free_groups"""
+        return self._groups('wc', self._wc_by_size_type, disk_type, disk_size, exclude)
+
+    def free_count(self, size_type: SizeType) -> int:
+        return len(self._free_by_size_type.get(size_type, ()))
+
+    def in_state(self, state: str) -> List[str]:
+        return list(self._by_state.get(state, ()))
+
+    def in_pool(self, pool: str) -> List[str]:
+        return list(self._by_pool.get(pool, ()))
+
+    def pools(self) -> List[str]:
+        return list(self._by_pool)
+
+    def in_enclosure(self, enclosure_id: str) -> List[str]:
+        return list(self._by_enclosure.get(enclosure_id, ()))
+
+    def free_by_size(self) -> Dict[int, List[str]]:
+        by_size: Dict[int, List[str]] = {}
+        for (size, _), disks in self._free_by_size_type.items():
+            by_size.setdefault(size, []).extend(disks)
+        return by_size
+
+    def _groups(self, name: str, index: Dict[SizeType, Dict[str, None]], disk_type: Optional[str],
+                disk_size: Optional[int], exclude) -> Groups:
+        view = self._group_views.get(name)
+        if view is None:
+            view = self._group_views[name] = MappingProxyType({key: tuple(disks) for key, disks in index.items()})
+        # Исключённые диски обычно единицы - ищем их группы по записям, а не перебираем диски групп
+        if exclude and not isinstance(exclude, (set, frozenset)):
+            exclude = set(exclude)
+        touched = set()
+        for disk in exclude:
+            record = self._disks.get(disk)
+            if record is not None and disk in index.get(record.size_type, ()):
+                touched.add(record.size_type)
+        if disk_type is None and disk_size is None and not touched:
+            return view
+        # Групп (размер, тип) на кластере единицы, перебираются они, а не диски
+        return MappingProxyType({
+            key: tuple(disk for disk in disks if disk not in exclude) if key in touched else disks
+            for key, disks in view.items()
+            if (disk_size is None or key[0] == disk_size) and (disk_type is None or key[1] == disk_type)
+        })
+
+
+def _discard(index: Dict, key, name: str):
+    disks = index.get(key)
+    if disks is not None:
+        disks.pop(name, None)
+        if not disks:
+            del index[key]
+
@@ -0,0 +1,306 @@
+import os
+import time
+from contextlib import contextmanager
+from threading import Event, Lock, Thread
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from framework.api.core.logger import logger
+from framework.api.core.shared_state import SharedStore, is_xdist_worker, shared_state_path
+
+
+""" Резервирование дисков между параллельными тестами.
+
+    Стратегия выбора дисков видит свободные диски по снимку clusterInfo, но между выбором и запросом
+    на создание пула те же диски может выбрать другой тест (поток, воркер xdist) - один из запросов падает,
+    и disk_operation_with_retry ждёт и повторяет. Теперь выбранные диски атомарно резервируются в журнале,
+    а диски, зарезервированные другими тестами, стратегия не выбирает.
+
+    Владелец резерва - тест (воркер и nodeid). Резерв снимается:
+    - при удалении пула, созданного на этих дисках (PoolTools.delete_pool);
+    - если запрос на создание пула не прошёл;
+    - в teardown теста (framework_context);
+    - по истечении API_DISK_LEASE - если воркер упал, не сняв резерв.
+
+    Пока тест идёт, его резервы продлеваются фоновым потоком (keep_alive в framework_context)
+    каждую треть API_DISK_LEASE, поэтому длинный тест резерв не теряет. Истекает только резерв владельца,
+    процесс которого перестал его продлевать.
+
+    Под pytest-xdist журнал общий для всех воркеров прогона (SQLite, см. shared_state.py),
+    иначе - в памяти процесса.
+
+Настройки (.env / переменные окружения):
+    - API_DISK_LEDGER: 0 - не резервировать диски (по умолчанию включено).
+    - API_DISK_LEASE: сколько секунд резерв действует без продления (по умолчанию 900).
+"""
+
+# Резерв: (владелец, пул или None, время резервирования)
+Reservation = Tuple[str, Optional[str], float]
+
+
+def ledger_owner(context) -> str:
+    """Владелец резервов для контекста: текущий тест на текущем воркере"""
+    node = getattr(getattr(context, 'request', None), 'node', None)
+    return node_owner(getattr(node, 'nodeid', '') or f"context-{id(context)}")
+
+
+def node_owner(nodeid: str) -> str:
+    """Владелец резервов теста nodeid на текущем воркере - до того, как у теста появился контекст"""
+    return f"{os.getenv('PYTEST_XDIST_WORKER', 'main')} {nodeid}"
+
+
+class _MemoryReservations:
+    """Резервы в памяти процесса"""
+
+    def __init__(self):
+        self._reservations: Dict[str, Reservation] = {}
+        self._lock = Lock()
+
+    def claim(self, owner: str, disks: List[str], now: float, lease: float) -> List[str]:
+        with self._lock:
+            conflicts = [
+                disk for disk in disks
+                if disk in self._reservations and _is_foreign(self._reservations[disk], owner, now, lease)
+            ]
+            if not conflicts:
+                for disk in disks:
+                    self._reservations[disk] = (owner, None, now)
+            return conflicts
+
+    def reserved(self, owner: str, now: float, lease: float) -> Set[str]:
+        with self._lock:
+            return {disk for disk, reservation in self._reservations.items()
+                    if _is_foreign(reservation, owner, now, lease)}
+
+    def held(self, owner: str) -> Set[str]:
+        with self._lock:
+            return {disk for disk, (disk_owner, pool, _) in self._reservations.items()
+                    if disk_owner == owner and pool is None}
+
+    def renew(self, owner: str, now: float):
+        with self._lock:
+            for disk, (disk_owner, disk_pool, _) in self._reservations.items():
+                if disk_owner == owner:
+                    self._reservations[disk] = (owner, disk_pool, now)
+
+    def assign(self, owner: str, disks: List[str], pool: str):
+        with self._lock:
+            for disk in disks:
+                reservation = self._reservations.get(disk)
+                if reservation is not None and reservation[0] == owner:
+                    self._reservations[disk] = (owner, pool, reservation[2])
+
+    def release(self, owner: Optional[str] = None, disks: Optional[List[str]] = None, pool: Optional[str] = None):
+        disks = set(disks) if disks is not None else None
+        with self._lock:
+            for disk, (disk_owner, disk_pool, _) in list(self._reservations.items()):
+                if (owner is None or disk_owner == owner) and (disks is None or disk in disks) \
+                        and (pool is None or disk_pool == pool):
+                    del self._reservations[disk]
+
+
+class _SharedReservations:
+    """Резервы в SQLite, общие для воркеров pytest-xdist"""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS reservations ("
+        "disk TEXT PRIMARY KEY, owner TEXT NOT NULL, pool TEXT, reserved_at REAL NOT NULL);"
+    )
+
+    def __init__(self, path: str):
+        self._store = SharedStore(path, self.SCHEMA)
+
+    def claim(self, owner: str, disks: List[str], now: float, lease: float) -> List[str]:
+        with self._store.transaction() as db:
+            conflicts = [
+                disk for (disk,) in db.execute(
+                    f"SELECT disk FROM reservations WHERE disk IN ({_placeholders(disks)}) "
+                    f"AND owner != ? AND reserved_at > ?", (*disks, owner, now - lease)
+                )
+            ]
+            if not conflicts:
+                db.executemany(
+                    "INSERT OR REPLACE INTO reservations (disk, owner, pool, reserved_at) VALUES (?, ?, NULL, ?)",
+                    [(disk, owner, now) for disk in disks]
+                )
+            return conflicts
+
+    def reserved(self, owner: str, now: float, lease: float) -> Set[str]:
+        with self._store.transaction() as db:
+            rows = db.execute("SELECT disk FROM reservations WHERE owner != ? AND reserved_at > ?",
+                              (owner, now - lease))
+            return {disk for (disk,) in rows}
+
+    def held(self, owner: str) -> Set[str]:
+        with self._store.transaction() as db:
+            rows = db.execute("SELECT disk FROM reservations WHERE owner = ? AND pool IS NULL", (owner,))
+            return {disk for (disk,) in rows}
+
+    def renew(self, owner: str, now: float):
+        with self._store.transaction() as db:
+            db.execute("UPDATE reservations SET reserved_at = ? WHERE owner = ?", (now, owner))
+
+    def assign(self, owner: str, disks: List[str], pool: str):
+        with self._store.transaction() as db:
+            db.execute(f"UPDATE reservations SET pool = ? WHERE owner = ? AND disk IN ({_placeholders(disks)})",
+                       (pool, owner, *disks))
+
+    def release(self, owner: Optional[str] = None, disks: Optional[List[str]] = None, pool: Optional[str] = None):
+        conditions, params = [], []
+        if owner is not None:
+            conditions.append("owner = ?")
+            params.append(owner)
+        if disks is not None:
+            conditions.append(f"disk IN ({_placeholders(disks)})")
+            params.extend(disks)
+        if pool is not None:
+            conditions.append("pool = ?")
+            params.append(pool)
+        with self._store.transaction() as db:
+            db.execute(f"DELETE FROM reservations WHERE {' AND '.join(conditions) or '1'}", params)
+
+
+def _is_foreign(reservation: Reservation, owner: str, now: float, lease: float) -> bool:
+    """Резерв другого владельца, срок которого не истёк"""
+    return reservation[0] != owner and reservation[2] > now - lease
+
+
+def _placeholders(items: List[str]) -> str:
+    return ', '.join('?' * len(items))
+
+
+class DiskLedger:
+    """
+    Журнал резервов дисков.
+
+    Example:
+        owner = ledger_owner(context)
+        used = disk_ledger.reserved_by_others(owner)     # не выбирать эти диски
+        if not disk_ledger.claim(owner, selected):       # [] - все диски зарезервированы за owner
+            disk_ledger.assign(owner, selected, pool_name)
+        disk_ledger.release_pool(pool_name)
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, shared: Optional[bool] = None):
+        """
+        :param enabled: (bool, optional): По умолчанию из API_DISK_LEDGER.
+        :param shared: (bool, optional): Хранить резервы в SQLite для воркеров xdist.
+            По умолчанию - если процесс является воркером xdist.
+        """
+        self._enabled = enabled
+        self._shared = shared
+        self._backend = None
+        self._backend_lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        # .env загружается в conftest уже после импорта фреймворка, поэтому читаем его при обращении
+        if self._enabled is None:
+            return os.getenv('API_DISK_LEDGER', '1').strip().lower() not in ('0', 'false', 'no')
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: Optional[bool]):
+        self._enabled = value
+
+    @property
+    def shared(self) -> Optional[bool]:
+        return self._shared
+
+    @shared.setter
+    def shared(self, value: Optional[bool]):
+        with self._backend_lock:
+            self._shared = value
+            self._backend = None
+
+    @staticmethod
+    def lease() -> float:
+        return float(os.getenv('API_DISK_LEASE', 900))
+
+    def claim(self, owner: str, disks: Iterable[str]) -> List[str]:
+        """
+        Атомарно резервирует диски за owner: все или ни одного.
+        :return: list: Диски, уже зарезервированные другими владельцами ([] - резерв выполнен).
+        """
+        disks = sorted(set(disks))
+        if not self.enabled or not disks:
+            return []
+        conflicts = self._get_backend().claim(owner, disks, time.time(), self.lease())
+        if conflicts:
+            logger.info(f"Disks reserved by other tests: {conflicts}")
+        return conflicts
+
+    def reserved_by_others(self, owner: str) -> Set[str]:
+        if not self.enabled:
+            return set()
+        return self._get_backend().reserved(owner, time.time(), self.lease())
+
+    def held_by(self, owner: str) -> Set[str]:
+        """Диски, зарезервированные за owner и ещё не отданные пулу (например, маркером needs_disks)"""
+        if not self.enabled:
+            return set()
+        return self._get_backend().held(owner)
+
+    def assign(self, owner: str, disks: Iterable[str], pool: str):
+        """Привязывает резерв к созданному пулу: он снимется при удалении пула"""
+        disks = sorted(set(disks))
+        if self.enabled and disks:
+            self._get_backend().assign(owner, disks, pool)
+
+    def renew(self, owner: str):
+        """Продлевает все резервы owner на API_DISK_LEASE от текущего момента"""
+        if self.enabled:
+            self._get_backend().renew(owner, time.time())
+
+    @contextmanager
+    def keep_alive(self, owner: str):
+        """
+        Продлевает резервы owner, пока выполняется блок with.
+
+        Example:
+            with disk_ledger.keep_alive(owner):
+                run_test()
+        """
+        if not self.enabled:
+            yield
+            return
+        stop = Event()
+        thread = Thread(target=self._renew_until, args=(owner, stop), daemon=True, name=f"disk-lease {owner}")
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _renew_until(self, owner: str, stop: Event):
+        while not stop.wait(self.lease() / 3):
+            try:
+                self.renew(owner)
+            except Exception as e:
+                logger.warning(f"Disk reservations of {owner} were not renewed: {e}")
+
+    def release(self, owner: str, disks: Iterable[str]):
+        disks = sorted(set(disks))
+        if self.enabled and disks:
+            self._get_backend().release(owner=owner, disks=disks)
+
+    def release_pool(self, pool: str):
+        if self.enabled:
+            self._get_backend().release(pool=pool)
+
+    def release_owner(self, owner: str):
+        if self.enabled:
+            self._get_backend().release(owner=owner)
+
+    def _get_backend(self):
+        # Создаётся лениво: переменные окружения xdist выставляются после импорта модулей фреймворка
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    shared = is_xdist_worker() if self._shared is None else self._shared
+                    self._backend = _SharedReservations(shared_state_path('disks')) if shared \
+                        else _MemoryReservations()
+        return self._backend
+
+
+# Общий журнал резервов процесса (по аналогии с rate_limiter)
+disk_ledger = DiskLedger()
@@ -0,0 +1,150 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from framework.api.core.logger import logger
+from .disk_inventory import DiskInventory
+from .disk_ledger import disk_ledger
+
+
+""" Допуск тестов к кластеру по заявленной потребности в дисках (маркер needs_disks).
+
+    Параллельные наборы с пулами не знали, сколько дисков займут соседние тесты: все воркеры начинали
+    создавать пулы сразу, часть получала "Insufficient disks" и уходила в повторы disk_operation_with_retry.
+    Тест с маркером @pytest.mark.needs_disks(hdd=4, ssd=2, wc=2, size=...) резервирует за собой в disk_ledger
+    столько свободных дисков до конца теста, а стратегии выбора дисков берут диски пулов теста сначала из этого
+    резерва. Диски одного вида подбираются из одной группы размера и типа - как их возьмёт пул.
+
+    Допуск - часть планирования, а не теста (conftest):
+    - при сборе тесты с needs_disks ставятся после остальных, большие требования - первыми,
+      а требования, которые кластер не выполнит даже пустым, пропускаются;
+    - перед setup теста hold_disks ждёт дисков по инвентарю сбора (collection_inventory.py) и журналу резервов,
+      не обращаясь к кластеру: тест не логинится и не держит сессию, пока ждёт;
+    - фикстура disk_needs сверяет резерв с текущим инвентарём кластера одной попыткой (claim_disks).
+
+Настройки (.env / переменные окружения):
+    - API_DISK_WAIT_TIMEOUT: сколько секунд тест ждёт диски (по умолчанию 600).
+    - API_DISK_WAIT_INTERVAL: пауза между проверками журнала резервов, секунды (по умолчанию 2).
+"""
+
+# Параметр маркера -> тип диска
+DISK_KINDS = {'hdd': 'HDD', 'ssd': 'SSD', 'wc': 'SSD'}
+
+
+def wait_timeout() -> float:
+    return float(os.getenv('API_DISK_WAIT_TIMEOUT', 600))
+
+
+def wait_interval() -> float:
+    return float(os.getenv('API_DISK_WAIT_INTERVAL', 2))
+
+
+@dataclass(frozen=True)
+class DiskNeeds:
+    """
+    Сколько свободных дисков нужно тесту.
+
+    :param hdd: Количество HDD.
+    :param ssd: Количество SSD (свободных, если их не хватает - доступных для write cache).
+    :param wc: Количество SSD, доступных для write cache (для wrcDisks пула).
+    :param size: Минимальный размер диска в байтах.
+    """
+    hdd: int = 0
+    ssd: int = 0
+    wc: int = 0
+    size: Optional[int] = None
+
+    @classmethod
+    def from_marker(cls, marker) -> 'DiskNeeds':
+        if marker.args:
+            raise ValueError("needs_disks accepts only keyword arguments: hdd, ssd, wc, size")
+        unknown = set(marker.kwargs) - {'hdd', 'ssd', 'wc', 'size'}
+        if unknown:
+            raise ValueError(f"Unknown needs_disks arguments: {sorted(unknown)}")
+        return cls(**marker.kwargs)
+
+    def counts(self) -> Dict[str, int]:
+        return {kind: getattr(self, kind) for kind in DISK_KINDS if getattr(self, kind)}
+
+    def total(self) -> int:
+        return sum(self.counts().values())
+
+    def __str__(self):
+        needs = ', '.join(f"{kind}={count}" for kind, count in self.counts().items())
+        return f"{needs}, size>={self.size}" if self.size else needs
+
+    def pick(self, inventory: DiskInventory, exclude: Iterable[str] = ()) -> Optional[List[str]]:
+        """
+        Свободные диски, которых хватает на требование, или None.
+        Диски одного вида берутся из одной группы размера и типа - наименьшей подходящей.
+        """
+        exclude = set(exclude)
+        picked = []
+        for kind, count in self.counts().items():
+            group = next((disks for disks in self._groups(inventory, kind, exclude) if len(disks) >= count), None)
+            if group is None:
+                return None
+            picked.extend(group[:count])
+            exclude.update(group[:count])
+        return picked
+
+    def is_possible(self, inventory: DiskInventory) -> bool:
+        """Выполнимо ли требование на кластере без пулов (поломанные и извлечённые диски не считаются)"""
+        for kind, count in self.counts().items():
+            groups = {}
+            for name in inventory:
+                disk = inventory[name]
+                if self._usable(disk, kind):
+                    groups[disk.size_type] = groups.get(disk.size_type, 0) + 1
+            if max(groups.values(), default=0) < count:
+                return False
+        return True
+
+    def _groups(self, inventory: DiskInventory, kind: str, exclude: set) -> List[List[str]]:
+        # SSD - сначала просто свободные группы, группы для write cache - последними: они нужны кэшам
+        sources = [inventory.wc_groups('SSD', exclude=exclude)] if kind == 'wc' \
+            else [inventory.free_groups(DISK_KINDS[kind], exclude=exclude)]
+        if kind == 'ssd':
+            sources.append(inventory.wc_groups('SSD', exclude=exclude))
+        return [list(disks) for by_size_type in sources
+                for (size, _), disks in sorted(by_size_type.items()) if self._fits(size)]
+
+    def _usable(self, disk, kind: str) -> bool:
+        return disk.type == DISK_KINDS[kind] and self._fits(disk.size) and not disk.damaged and not disk.removed \
+            and (kind != 'wc' or disk.is_free_for_wc)
+
+    def _fits(self, size: Optional[int]) -> bool:
+        return not self.size or (size or 0) >= self.size
+
+
+def claim_disks(needs: DiskNeeds, inventory: DiskInventory, owner: str) -> Optional[List[str]]:
+    """
+    Одна попытка: подбирает диски под требование мимо резервов других тестов и резервирует их за owner.
+    :return: list: Зарезервированные диски или None, если дисков сейчас нет.
+    """
+    picked = needs.pick(inventory, disk_ledger.reserved_by_others(owner))
+    if picked is None or disk_ledger.claim(owner, picked):
+        return None
+    return picked
+
+
+def hold_disks(needs: DiskNeeds, inventory: DiskInventory, owner: str, timeout: Optional[float] = None,
+               interval: Optional[float] = None) -> List[str]:
+    """
+    Ждёт, пока другие тесты снимут резервы, и резервирует диски за owner. Кластер не запрашивается:
+    свободные диски берутся из inventory (снимка при сборе), занятые - из журнала резервов.
+
+    :return: list: Зарезервированные диски.
+    :raises TimeoutError: Если диски не освободились за timeout.
+    """
+    timeout = wait_timeout() if timeout is None else timeout
+    interval = wait_interval() if interval is None else interval
+    deadline = time.monotonic() + timeout
+    while True:
+        picked = claim_disks(needs, inventory, owner)
+        if picked is not None:
+            return picked
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Other tests did not release disks for needs_disks({needs}) within {timeout}s")
+        logger.info(f"Waiting for other tests to release disks: needs_disks({needs})")
+        time.sleep(interval)
@@ -1,4 +1,8 @@
+from typing import Iterable
+from framework.api.models.disk_models import DiskSelection
 from framework.api.models.pool_models import PoolConfig, PoolData
+from .disk_inventory import DiskInventory
+from .disk_ledger import ledger_owner
 from ..pools.disk_selection_strategies.auto import AutoConfigureStrategy
 from ..pools.disk_selection_strategies.manual import ManualConfigureStrategy
 from ..pools.disk_selection_strategies.expansion import ExpansionStrategy
@@ -12,22 +16,33 @@ class DiskSelector:
         self._manual_strategy = ManualConfigureStrategy
         self._expansion_strategy = ExpansionStrategy
 
-    def select_disks_auto(self, cluster_data: dict, pool_config: PoolConfig) -> dict:
+    @property
+    def owner(self) -> str:
+        """Владелец резервов дисков (disk_ledger) - текущий тест контекста инструмента"""
+        return ledger_owner(getattr(self._disk_tools, '_context', None))
+
+    def select_disks_auto(self, cluster_data: dict, pool_config: PoolConfig, exclude: Iterable[str] = ()) -> dict:
         """Автоматический выбор дисков для нового пула"""
         strategy = self._auto_strategy(self)
-        return strategy.select_disks(cluster_data, pool_config)
+        return strategy.select_disks(cluster_data, pool_config, exclude)
 
-    def select_disks_manual(self, cluster_data: dict, pool_config: PoolConfig) -> dict:
+    def select_disks_manual(self, cluster_data: dict, pool_config: PoolConfig, exclude: Iterable[str] = ()) -> dict:
         """Ручной выбор дисков для нового пула"""
         strategy = self._manual_strategy(self)
-        return strategy.select_disks(cluster_data, pool_config)
+        return strategy.select_disks(cluster_data, pool_config, exclude)
 
     def select_disks_for_expansion(self, cluster_data: dict, pool_data: PoolData) -> dict:
         """Выбор дисков для расширения существующего пула"""
         strategy = self._expansion_strategy(self)
         return strategy.select_disks(cluster_data, pool_data)
 
-    def select_disks(self, cluster_data: dict, pool_config: PoolConfig) -> dict:
+    def select_disks(self, cluster_data: dict, pool_config: PoolConfig, exclude: Iterable[str] = ()) -> dict:
+        """Выбор дисков для нового пула; диски из exclude не выбираются (например, выбранные для соседних пулов)"""
         if pool_config.auto_configure:
-            return self.select_disks_auto(cluster_data, pool_config)
-        return self.select_disks_manual(cluster_data, pool_config)
+            return self.select_disks_auto(cluster_data, pool_config, exclude)
+        return self.select_disks_manual(cluster_data, pool_config, exclude)
+
+    def dry_run(self, inventory: DiskInventory, pool_config: PoolConfig, exclude: Iterable[str] = ()) -> DiskSelection:
+        """Выбор дисков для пула без резерва и без изменения pool_config. См. DiskSelectionStrategy.dry_run"""
+        strategy_class = self._auto_strategy if pool_config.auto_configure else self._manual_strategy
+        return strategy_class(self).dry_run(inventory, pool_config, exclude)
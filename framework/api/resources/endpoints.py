@@ -1,10 +1,21 @@
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+
 class ApiEndpoints:
     """API endpoints constants"""
 
+    class Auth:
+        LOGIN = "/login"
+        REFRESH_TOKENS = "/refresh_tokens"
+        LOGOUT = "/logout"
+
     class Cluster:
         BASE = "/cluster"
         STATUS = "/cluster/status"
         CLUSTER_INFO = "/nodes/clusterInfo"
+        HEALTH = "/health"
 
     class Pools:
         BASE = "/pools"                                             # Получить список пулов
@@ -31,4 +42,35 @@ class ApiEndpoints:
 
 
     class Volumes:
-        CREATE_VOLUME = "/pools/{pool_name}/volumes"                # Создание тома
\ No newline at end of file
+        CREATE_VOLUME = "/pools/{pool_name}/volumes"                # Создание тома
+
+    @staticmethod
+    def templates() -> List[str]:
+        """Все шаблоны эндпоинтов из вложенных классов"""
+        return sorted({
+            value
+            for group in vars(ApiEndpoints).values() if isinstance(group, type)
+            for name, value in vars(group).items() if not name.startswith('_') and isinstance(value, str)
+        })
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def template_for(path: str) -> str:
+        """
+        Шаблон эндпоинта для конкретного пути: "/pools/abc/expand" -> "/pools/{pool_name}/expand".
+        Точные совпадения имеют приоритет над шаблонами с параметрами. Неизвестный путь возвращается как есть.
+        """
+        for template, pattern in _compiled_templates():
+            if pattern.fullmatch(path):
+                return template
+        return path
+
+
+@lru_cache(maxsize=1)
+def _compiled_templates() -> List[Tuple[str, re.Pattern]]:
+    compiled = [
+        (template, re.compile(re.sub(r'\\{[^/]+?\\}', '[^/]+', re.escape(template))))
+        for template in ApiEndpoints.templates()
+    ]
+    # Сначала шаблоны без параметров, затем с меньшим числом параметров
+    return sorted(compiled, key=lambda item: item[0].count('{'))
@@ -7,9 +7,11 @@
 Обеспечивает потокобезопасность при выборе дисков
 отвечает на вопрос: "КАК выбрать" (логика выбора)
 '''
+from typing import List
 from framework.api.models.disk_models import DiskSelection, ClusterDisks, DiskType
 from framework.api.models.pool_models import PoolConfig
 from .base import DiskSelectionStrategy
+from .planner import RoleRequest
 
 
 class AutoConfigureStrategy(DiskSelectionStrategy):
@@ -20,86 +22,52 @@ class AutoConfigureStrategy(DiskSelectionStrategy):
         # Создание объекта выбранных дисков
         selection = DiskSelection(set(), set(), set(), set())
 
-        # Блокировка для обеспечения потокобезопасности
-        with self._lock:
-            # Выбор основных дисков
-            self._select_main_disks(cluster_disks, pool_config, selection)
+        # Диски всех ролей подбираются вместе: ранняя роль не займёт группу, нужную следующей
+        plan = self._plan_roles(cluster_disks, self._roles(pool_config))
 
-            # Выбор запасных дисков
-            self._select_spare_disks(cluster_disks, pool_config, selection)
+        # Выбор основных дисков
+        if 'main' in plan:
+            main = plan['main']
+            selection.main_disks = set(main.disks)
+            pool_config.mainDisksSize = main.size
+            pool_config.mainDisksType = main.type
 
-            # Выбор write cache дисков
-            if pool_config.wrCacheDiskCount:
-                self._select_wrc_disks(cluster_disks, pool_config, selection)
+        # Выбор запасных дисков. Диски должны быть идентичны main дискам.
+        if 'spare' in plan:
+            spare = plan['spare']
+            selection.spare_disks = set(spare.disks)
+            pool_config.spareDiskType = spare.type
+            pool_config.spareDiskSize = spare.size
 
-            # Выбор read cache дисков
-            if pool_config.rdCacheDiskCount:
-                self._select_rdc_disks(cluster_disks, pool_config, selection)
-
-            # Логирование результатов
-            # self._log_selection_results(selection)
-
-            return selection
-
-    # Выбор основных дисков
-    def _select_main_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
-                           selection: DiskSelection) -> None:
-        disk_group = self._select_disk_group(
-            cluster_disks=cluster_disks,
-            disk_type=DiskType(pool_config.mainDisksType) if pool_config.mainDisksType else None,
-            disk_size=pool_config.mainDisksSize,
-            count=pool_config.mainDisksCount
-        )
-
-        selection.main_disks = disk_group['disks']
-        pool_config.mainDisksSize = disk_group['size']
-        pool_config.mainDisksType = disk_group['type']
-        self._used_disks.update(disk_group['disks'])
-
-    # Выбор spare дисков. Диски должны быть идентичны main дискам.
-    def _select_spare_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
-                            selection: DiskSelection) -> None:
-        if not pool_config.spareCacheDiskCount:
-            return
-
-        disk_group = self._select_disk_group(
-            cluster_disks=cluster_disks,
-            disk_type=pool_config.spareDiskType if hasattr(pool_config, 'spareDiskType') else pool_config.mainDisksType,
-            disk_size=pool_config.mainDisksSize,
-            count=pool_config.spareCacheDiskCount
-        )
-
-        selection.spare_disks = disk_group['disks']
-        pool_config.spareDiskType = disk_group['type']
-        pool_config.spareDiskSize = disk_group['size']
-        self._used_disks.update(disk_group['disks'])
-
-    def _select_wrc_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
-                          selection: DiskSelection) -> None:
         # Выбор write cache дисков
-        wrc_group = self._select_disk_group(
-            cluster_disks=cluster_disks,
-            count=pool_config.wrCacheDiskCount,
-            disk_type=pool_config.wrcDiskType if hasattr(pool_config, 'wrcDiskType') else DiskType.SSD,
-            for_cache=True
-        )
-
-        selection.wrc_disks = wrc_group['disks']
-        pool_config.wrcDiskType = wrc_group['type']
-        pool_config.wrcDiskSize = wrc_group['size']
-        self._used_disks.update(wrc_group['disks'])
+        if 'wrc' in plan:
+            wrc = plan['wrc']
+            selection.wrc_disks = set(wrc.disks)
+            pool_config.wrcDiskType = wrc.type
+            pool_config.wrcDiskSize = wrc.size
 
-
-    def _select_rdc_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
-                          selection: DiskSelection) -> None:
         # Выбор read cache дисков
-        rdc_group = self._select_disk_group(
-            cluster_disks=cluster_disks,
-            count=pool_config.rdCacheDiskCount,
-            disk_type=pool_config.rdcDiskType if hasattr(pool_config, 'rdcDiskType') else DiskType.SSD,
-        )
-        selection.rdc_disks = rdc_group['disks']
-        pool_config.rdcDiskType = rdc_group['type']
-        pool_config.rdcDiskSize = rdc_group['size']
-        self._used_disks.update(rdc_group['disks'])
-
+        if 'rdc' in plan:
+            rdc = plan['rdc']
+            selection.rdc_disks = set(rdc.disks)
+            pool_config.rdcDiskType = rdc.type
+            pool_config.rdcDiskSize = rdc.size
+
+        # Логирование результатов
+        # self._log_selection_results(selection)
+
+        return selection
+
+    @staticmethod
+    def _roles(pool_config: PoolConfig) -> List[RoleRequest]:
+        """Требования ролей к дискам, как их трактует автоконфигурация на сервере"""
+        return [
+            RoleRequest('main', pool_config.mainDisksCount or 0, pool_config.mainDisksType, pool_config.mainDisksSize),
+            RoleRequest('spare', pool_config.spareCacheDiskCount or 0, pool_config.spareDiskType,
+                        pool_config.spareDiskSize, same_as='main' if pool_config.mainDisksCount else None),
+            # Write cache - только SSD, доступные для кэша
+            RoleRequest('wrc', pool_config.wrCacheDiskCount or 0, DiskType.SSD, pool_config.wrcDiskSize,
+                        for_cache=True),
+            RoleRequest('rdc', pool_config.rdCacheDiskCount or 0, pool_config.rdcDiskType or DiskType.SSD,
+                        pool_config.rdcDiskSize),
+        ]
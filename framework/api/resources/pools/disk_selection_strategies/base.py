@@ -1,28 +1,92 @@
+import copy
 from abc import ABC, abstractmethod
-from typing import Dict, Set, Optional, List, Union
+from dataclasses import replace
+from typing import Dict, Iterable, Set, Optional, List, Union
 from framework.api.models.disk_models import DiskSelection, ClusterDisks, DiskType
 from framework.api.models.pool_models import PoolConfig, PoolData
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.resources.disks.disk_ledger import disk_ledger
 from framework.api.core.logger import logger
-from threading import Lock
+from .planner import DiskPlan, DiskPlanner, RoleRequest
 
 
 class DiskSelectionStrategy(ABC):
+    # Сколько раз выбрать диски заново, если выбранные успел зарезервировать другой тест
+    CLAIM_ATTEMPTS = 3
+
     def __init__(self, disk_selector):
         self._disk_selector = disk_selector
         self._pool_config = None
-        self._used_disks = set()
-        self._lock = Lock()
+        # Диски, которые текущий выбор не может взять: резервы других тестов, exclude и диски уже выбранных ролей.
+        # Задаётся заново в начале каждого выбора (_run_selection)
+        self._used_disks: Set[str] = set()
 
-    def select_disks(self, cluster_data: dict, config: Union[PoolConfig, PoolData]) -> dict:
-        """Base method for disk selection"""
+    def select_disks(self, cluster_data: dict, config: Union[PoolConfig, PoolData],
+                     exclude: Iterable[str] = ()) -> dict:
+        """Base method for disk selection. Диски из exclude не выбираются"""
         cluster_disks = self._create_cluster_disks(cluster_data)
         # Сохраняем конфигурацию только если это PoolConfig (чтобы auto и manual использовали PoolConfig)
         if isinstance(config, PoolConfig):
             self._pool_config = config
-        selection = self._select_disks_impl(cluster_disks, config)
+        selection = self._select_and_claim(cluster_disks, config, exclude)
         self._log_selection_results(selection)
         return selection.to_dict()
 
+    def dry_run(self, inventory: DiskInventory, config: PoolConfig, exclude: Iterable[str] = ()) -> DiskSelection:
+        """
+        Выбор дисков без резерва в disk_ledger и без изменения config - например, чтобы проверить,
+        поместится ли пул рядом с другими. ValueError - дисков не хватает.
+        """
+        config = copy.deepcopy(config)
+        self._pool_config = config
+        cluster_disks = ClusterDisks(
+            disks_info=inventory,
+            free_disks=inventory.free_disks(),
+            free_for_wc=inventory.free_for_wc(),
+            free_disks_by_size_and_type=inventory.free_groups(),
+            inventory=inventory
+        )
+        return self._run_selection(cluster_disks, config, exclude)
+
+    def _select_and_claim(self, cluster_disks: ClusterDisks, config: Union[PoolConfig, PoolData],
+                          exclude: Iterable[str] = ()) -> DiskSelection:
+        """
+        Выбирает диски мимо зарезервированных другими тестами и резервирует выбранные (см. disk_ledger).
+        Если между выбором и резервом диски заняли - выбирает заново без них.
+        """
+        owner = self._disk_selector.owner
+        exclude = set(exclude)
+        held = disk_ledger.held_by(owner) - exclude
+        conflicts = []
+        for _ in range(self.CLAIM_ATTEMPTS):
+            # Резервы других тестов читаются из журнала на каждой попытке: конфликт прошлой попытки уже в нём
+            unavailable = disk_ledger.reserved_by_others(owner) | exclude
+            selection = self._select_from_held(cluster_disks, config, unavailable, held) if held else None
+            if selection is None:
+                selection = self._run_selection(cluster_disks, config, unavailable)
+            conflicts = disk_ledger.claim(owner, selection.all_disks())
+            if not conflicts:
+                return selection
+        raise ValueError(f"Selected disks were reserved by other tests: {conflicts}")
+
+    def _select_from_held(self, cluster_disks: ClusterDisks, config: Union[PoolConfig, PoolData],
+                          unavailable: Set[str], held: Set[str]) -> Optional[DiskSelection]:
+        """
+        Выбор только из дисков, уже зарезервированных за владельцем (needs_disks): пул занимает резерв теста,
+        а не чужие свободные диски. None - резерва на пул не хватает.
+        """
+        try:
+            return self._run_selection(cluster_disks, config, (set(cluster_disks.inventory) - held) | unavailable)
+        except ValueError as e:
+            logger.info(f"Reserved disks do not fit the pool, selecting from all free disks: {e}")
+            return None
+
+    def _run_selection(self, cluster_disks: ClusterDisks, config: Union[PoolConfig, PoolData],
+                       unavailable: Iterable[str]) -> DiskSelection:
+        """Один выбор дисков: unavailable и диски, выбранные для ролей по ходу выбора, не берутся"""
+        self._used_disks = set(unavailable)
+        return self._select_disks_impl(cluster_disks, config)
+
     @abstractmethod
     def _select_disks_impl(self, cluster_disks: ClusterDisks, pool_config: PoolConfig) -> DiskSelection:
         pass
@@ -50,48 +114,35 @@ class DiskSelectionStrategy(ABC):
 
         return selected_group
 
+    def _plan_roles(self, cluster_disks: ClusterDisks, roles: List[RoleRequest]) -> DiskPlan:
+        """
+        Подбирает диски всем ролям пула сразу (см. planner.py) мимо уже использованных дисков.
+        При performance_type=0 все роли - на SSD, как в _select_disk_group.
+        """
+        if self._determine_priority_type() == DiskType.SSD:
+            roles = [replace(role, disk_type=DiskType.SSD) for role in roles]
+        plan = DiskPlanner(cluster_disks.inventory, exclude=self._used_disks).plan(roles)
+        if plan is None:
+            raise ValueError(f"Insufficient disks for pool roles: {', '.join(map(str, roles))}")
+        self._used_disks.update(plan.disks())
+        return plan
+
     def _filter_wrc_disks(self, cluster_disks: ClusterDisks,
                           disk_type: Optional[DiskType],
                           disk_size: Optional[int]) -> Dict:
-        filtered = {}
-        for disk_id in cluster_disks.free_for_wc:
-            if disk_id in self._used_disks:
-                continue
-
-            disk_info = cluster_disks.disks_info[disk_id]
-            if disk_info['type'] != DiskType.SSD:
-                continue
-
-            if disk_size and disk_info['size'] != disk_size:
-                continue
-
-            size = disk_info['size']
-            filtered.setdefault((size, DiskType.SSD), []).append(disk_id)
-
-        return filtered
+        # Write cache - только SSD; группы без свободных дисков не возвращаем
+        groups = cluster_disks.inventory.wc_groups(DiskType.SSD, disk_size or None, exclude=self._used_disks)
+        return {size_type: disks for size_type, disks in groups.items() if disks}
 
     def _filter_available_disks(self, cluster_disks: ClusterDisks,
                                 disk_type: Optional[DiskType],
                                 disk_size: Optional[int],
                                 for_cache: bool) -> Dict:
-        filtered = {}
-        for (size, type_), disks in cluster_disks.free_disks_by_size_and_type.items():
-            if self._matches_criteria(size, type_, disk_size, disk_type, disks, for_cache):
-                filtered[(size, type_)] = [d for d in disks if d not in self._used_disks]
-        return filtered
-
-    def _matches_criteria(self, size: int, type_: str,
-                          required_size: Optional[int],
-                          required_type: Optional[DiskType],
-                          disks: List[str],
-                          for_cache: bool) -> bool:
-        if required_size and size != required_size:
-            return False
-        if required_type and type_ != required_type:
-            return False
-        if for_cache and type_ != DiskType.SSD:
-            return False
-        return True
+        if for_cache:
+            if disk_type and disk_type != DiskType.SSD:
+                return {}
+            disk_type = DiskType.SSD
+        return cluster_disks.inventory.free_groups(disk_type or None, disk_size or None, exclude=self._used_disks)
 
     def _select_optimal_group(self, available_groups: Dict, count: int) -> Dict:
         for (size, type_), disks in sorted(available_groups.items()):
@@ -105,11 +156,16 @@ class DiskSelectionStrategy(ABC):
 
     def _create_cluster_disks(self, cluster_data: dict) -> ClusterDisks:
         logger.info(f"Received cluster_data: {cluster_data}")
+        inventory = cluster_data.get('inventory')
+        if inventory is None:
+            # cluster_data собран не TestExtractor (например, вручную) - строим индексы по disks_info
+            inventory = DiskInventory.from_disks(cluster_data['disks_info'])
         return ClusterDisks(
-            disks_info=cluster_data['disks_info'],
+            disks_info=inventory,
             free_disks=cluster_data['free_disks'],
             free_for_wc=cluster_data['free_for_wc'],
-            free_disks_by_size_and_type=cluster_data['free_disks_by_size_and_type']
+            free_disks_by_size_and_type=cluster_data['free_disks_by_size_and_type'],
+            inventory=inventory
         )
 
     def _determine_priority_type(self) -> Optional[DiskType]:
@@ -8,9 +8,8 @@ class ExpansionStrategy(DiskSelectionStrategy):
     def _select_disks_impl(self, cluster_disks: ClusterDisks, current_pool: PoolData) -> DiskSelection:
         selection = DiskSelection(set(), set(), set(), set())
 
-        with self._lock:
-            self._select_expansion_disks(cluster_disks, current_pool, selection)
-            return selection
+        self._select_expansion_disks(cluster_disks, current_pool, selection)
+        return selection
 
 
     def _select_expansion_disks(self, cluster_disks: ClusterDisks,
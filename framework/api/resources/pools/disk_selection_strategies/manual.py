@@ -2,6 +2,7 @@ from typing import List
 from framework.api.models.disk_models import DiskSelection, ClusterDisks, DiskType
 from framework.api.models.pool_models import PoolConfig
 from .base import DiskSelectionStrategy
+from .planner import RoleRequest
 
 
 class ManualConfigureStrategy(DiskSelectionStrategy):
@@ -11,109 +12,79 @@ class ManualConfigureStrategy(DiskSelectionStrategy):
         # Создаем объект для хранения выбранных дисков
         selection = DiskSelection(set(), set(), set(), set())
 
-        # Блокируем доступ к общим ресурсам на время выполнения
-        with self._lock:
-            # Последовательно выбираем диски каждого типа, если они указаны в конфигурации
-            if pool_config.mainDisks:
-                self._select_main_disks(cluster_disks, pool_config, selection)
-
-            if pool_config.spareDisks:
-                self._select_spare_disks(cluster_disks, pool_config, selection)
-
-            if pool_config.wrcDisks:
-                self._select_wrc_disks(cluster_disks, pool_config, selection)
-
-            if pool_config.rdcDisks:
-                self._select_rdc_disks(cluster_disks, pool_config, selection)
-
-            # Логируем результаты выбора
-            # self._log_selection_results(selection)
-            return selection
-
-    def _select_main_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
+        # Сначала проверяем диски, указанные списком: их не выбираем для других ролей
+        self._take_listed_disks(cluster_disks, pool_config, selection)
+
+        # Диски ролей, заданных количеством, подбираются вместе
+        plan = self._plan_roles(cluster_disks, self._roles(cluster_disks, pool_config, selection))
+
+        if 'main' in plan:
+            selection.main_disks = set(plan['main'].disks)
+            pool_config.mainDisksSize = plan['main'].size
+            pool_config.mainDisksType = plan['main'].type
+        if 'spare' in plan:
+            selection.spare_disks = set(plan['spare'].disks)
+        if 'wrc' in plan:
+            selection.wrc_disks = set(plan['wrc'].disks)
+            pool_config.wrcDiskSize = plan['wrc'].size
+        if 'rdc' in plan:
+            selection.rdc_disks = set(plan['rdc'].disks)
+            pool_config.rdcDiskSize = plan['rdc'].size
+
+        # Логируем результаты выбора
+        # self._log_selection_results(selection)
+        return selection
+
+    def _take_listed_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
                            selection: DiskSelection) -> None:
-        # Проверяем режим выбора дисков: список конкретных дисков или количество
+        """Проверяет диски ролей, заданных списком, и сохраняет их размеры в конфигурации"""
         if isinstance(pool_config.mainDisks, list):
-            # Проверяем и добавляем указанные диски
             selection.main_disks = set(self._validate_manual_disks(cluster_disks, pool_config.mainDisks))
+            self._used_disks.update(selection.main_disks)
             # Получаем информацию о первом диске для определения размера и типа
             disk_info = cluster_disks.disks_info[next(iter(selection.main_disks))]
             pool_config.mainDisksSize = disk_info['size']
             pool_config.mainDisksType = DiskType(disk_info['type'])
-        else:
-            # Автоматически выбираем указанное количество HDD дисков
-            disk_group = self._select_disk_group(
-                cluster_disks=cluster_disks,
-                disk_type=DiskType.HDD,
-                count=pool_config.mainDisks,
-                disk_size=None
-            )
-            selection.main_disks = disk_group['disks']
-            pool_config.mainDisksSize = disk_group['size']
-            pool_config.mainDisksType = disk_group['type']
-
-        # Добавляем выбранные диски в множество использованных
-        self._used_disks.update(selection.main_disks)
-
-    def _select_spare_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
-                            selection: DiskSelection) -> None:
+
         if isinstance(pool_config.spareDisks, list):
-            # Проверяем и добавляем указанные запасные диски
             selection.spare_disks = set(self._validate_manual_disks(cluster_disks, pool_config.spareDisks))
-        else:
-            # Получаем характеристики из первого основного диска
-            first_main_disk = next(iter(selection.main_disks))
-            main_disk_info = cluster_disks.disks_info[first_main_disk]
-
-            # Выбираем запасные диски того же типа и размера
-            disk_group = self._select_disk_group(
-                cluster_disks=cluster_disks,
-                disk_type=DiskType(main_disk_info['type']),
-                count=pool_config.spareDisks,
-                disk_size=main_disk_info['size']
-            )
-            selection.spare_disks = disk_group['disks']
-
-        self._used_disks.update(selection.spare_disks)
-
-    def _select_wrc_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
-                          selection: DiskSelection) -> None:
+            self._used_disks.update(selection.spare_disks)
+
         if isinstance(pool_config.wrcDisks, list):
-            # Проверяем и добавляем указанные WRC диски
             selection.wrc_disks = set(self._validate_manual_disks(cluster_disks, pool_config.wrcDisks))
-            # Сохраняем размер дисков в конфигурации
+            self._used_disks.update(selection.wrc_disks)
             pool_config.wrcDiskSize = cluster_disks.disks_info[next(iter(selection.wrc_disks))]['size']
-        else:
-            # Автоматически выбираем указанное количество SSD дисков для WRC
-            disk_group = self._select_disk_group(
-                cluster_disks=cluster_disks,
-                disk_type=DiskType.SSD,
-                count=pool_config.wrcDisks,
-                for_cache=True
-            )
-            selection.wrc_disks = disk_group['disks']
-            pool_config.wrcDiskSize = disk_group['size']
-
-        self._used_disks.update(selection.wrc_disks)
-
-    def _select_rdc_disks(self, cluster_disks: ClusterDisks, pool_config: PoolConfig,
-                          selection: DiskSelection) -> None:
+
         if isinstance(pool_config.rdcDisks, list):
-            # Проверяем и добавляем указанные RDC диски
             selection.rdc_disks = set(self._validate_manual_disks(cluster_disks, pool_config.rdcDisks))
-            # Сохраняем размер дисков в конфигурации
+            self._used_disks.update(selection.rdc_disks)
             pool_config.rdcDiskSize = cluster_disks.disks_info[next(iter(selection.rdc_disks))]['size']
-        else:
-            # Автоматически выбираем указанное количество SSD дисков для RDC
-            disk_group = self._select_disk_group(
-                cluster_disks=cluster_disks,
-                disk_type=DiskType.SSD,
-                count=pool_config.rdcDisks
-            )
-            selection.rdc_disks = disk_group['disks']
-            pool_config.rdcDiskSize = disk_group['size']
-
-        self._used_disks.update(selection.rdc_disks)
+
+    @staticmethod
+    def _roles(cluster_disks: ClusterDisks, pool_config: PoolConfig, selection: DiskSelection) -> List[RoleRequest]:
+        """Требования ролей, заданных количеством дисков"""
+        roles = []
+        if isinstance(pool_config.mainDisks, int):
+            # Основные диски по умолчанию - HDD
+            roles.append(RoleRequest('main', pool_config.mainDisks, DiskType.HDD))
+
+        if isinstance(pool_config.spareDisks, int):
+            # Запасные диски того же типа и размера, что и основные
+            if isinstance(pool_config.mainDisks, int) and pool_config.mainDisks:
+                roles.append(RoleRequest('spare', pool_config.spareDisks, same_as='main'))
+            elif selection.main_disks:
+                main_disk_info = cluster_disks.disks_info[next(iter(selection.main_disks))]
+                roles.append(RoleRequest('spare', pool_config.spareDisks,
+                                         main_disk_info['type'], main_disk_info['size']))
+            else:
+                roles.append(RoleRequest('spare', pool_config.spareDisks))
+
+        if isinstance(pool_config.wrcDisks, int):
+            roles.append(RoleRequest('wrc', pool_config.wrcDisks, DiskType.SSD, for_cache=True))
+
+        if isinstance(pool_config.rdcDisks, int):
+            roles.append(RoleRequest('rdc', pool_config.rdcDisks, DiskType.SSD))
+        return roles
 
     def _validate_manual_disks(self, cluster_disks: ClusterDisks, disk_ids: List[str]) -> List[str]:
         """Валидация вручную выбранных дисков"""
@@ -0,0 +1,207 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from framework.api.resources.disks.disk_inventory import DiskInventory
+
+
+""" Совместный подбор дисков для всех ролей пула (main, spare, WRC, RDC).
+
+    Стратегии выбирали роли по очереди: каждая роль брала первую по сортировке группу (размер, тип),
+    где хватало дисков. Ранняя роль могла занять группу, без которой не собрать следующую (например, main
+    забирал ровно два SSD группы, а spare того же размера и типа уже не находился) - запрос падал,
+    и disk_operation_with_retry ждал и повторял его на том же кластере.
+
+    DiskPlanner перебирает с возвратом назначения групп всем ролям сразу. Групп (размер, тип) на кластере
+    единицы, ролей не больше четырёх, поэтому перебор полный, а из допустимых планов выбирается лучший:
+    - capacity: после пула остаётся больше всего свободной ёмкости (в байтах), затем - меньше опустевших групп;
+    - first_fit: каждая роль берёт первую по сортировке группу, как раньше, но с учётом следующих ролей.
+
+Настройки (.env / переменные окружения):
+    - API_DISK_PLAN_OBJECTIVE: capacity (по умолчанию) или first_fit.
+"""
+
+OBJECTIVES = ('capacity', 'first_fit')
+
+# Источник дисков группы: свободные диски или диски, доступные для write cache
+FREE, WRITE_CACHE = 'free', 'wc'
+
+# Группа дисков: (источник, размер, тип)
+BucketKey = Tuple[str, int, str]
+
+
+def plan_objective() -> str:
+    # .env загружается в conftest уже после импорта фреймворка, поэтому читаем его при обращении
+    objective = os.getenv('API_DISK_PLAN_OBJECTIVE', 'capacity').strip().lower()
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Invalid API_DISK_PLAN_OBJECTIVE '{objective}': expected one of {OBJECTIVES}")
+    return objective
+
+
+@dataclass(frozen=True)
+class RoleRequest:
+    """
+    Требование роли пула к дискам.
+
+    :param same_as: Роль, с дисками которой должны совпадать тип и размер, если они не заданы явно:
+        spare - с main.
+    """
+    role: str
+    count: int
+    disk_type: Optional[str] = None
+    disk_size: Optional[int] = None
+    for_cache: bool = False
+    same_as: Optional[str] = None
+
+    def __str__(self):
+        disk_type = getattr(self.disk_type, 'value', self.disk_type)
+        return f"{self.role}={self.count} (type={disk_type}, size={self.disk_size})"
+
+
+@dataclass(frozen=True)
+class RoleAssignment:
+    role: str
+    size: int
+    type: str
+    disks: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class DiskPlan:
+    assignments: Dict[str, RoleAssignment]
+    consumed: int
+
+    def __getitem__(self, role: str) -> RoleAssignment:
+        return self.assignments[role]
+
+    def __contains__(self, role: str) -> bool:
+        return role in self.assignments
+
+    def disks(self) -> Set[str]:
+        return {disk for assignment in self.assignments.values() for disk in assignment.disks}
+
+
+class DiskPlanner:
+    """
+    Подбор групп дисков для всех ролей пула сразу.
+
+    Example:
+        planner = DiskPlanner(inventory, exclude=disk_ledger.reserved_by_others(owner))
+        plan = planner.plan([
+            RoleRequest('main', 2, disk_type='SSD'),
+            RoleRequest('spare', 1, same_as='main'),
+            RoleRequest('wrc', 2, for_cache=True),
+        ])
+        plan['main'].disks, plan['main'].size     # None - ролям не хватает дисков
+        planner.without(plan.disks())             # кластер после создания пула
+    """
+
+    def __init__(self, inventory: DiskInventory, exclude: Iterable[str] = (), objective: Optional[str] = None):
+        """
+        :param exclude: Диски, которые нельзя выбирать (заняты другими тестами, выбраны вручную).
+        :param objective: capacity или first_fit. По умолчанию из API_DISK_PLAN_OBJECTIVE.
+        """
+        if objective is not None and objective not in OBJECTIVES:
+            raise ValueError(f"Invalid objective '{objective}': expected one of {OBJECTIVES}")
+        self._inventory = inventory
+        self._exclude = frozenset(exclude)
+        self._objective = objective or plan_objective()
+        self._buckets: Dict[BucketKey, List[str]] = {}
+        for source, groups in ((FREE, inventory.free_groups(exclude=self._exclude)),
+                               (WRITE_CACHE, inventory.wc_groups(exclude=self._exclude))):
+            for (size, disk_type), disks in groups.items():
+                if disks:
+                    self._buckets[(source, size, disk_type)] = disks
+        # Порядок first_fit - как у _select_optimal_group: по (размер, тип)
+        self._rank = {key: rank for rank, key in enumerate(sorted(self._buckets, key=lambda key: key[1:]))}
+
+    @property
+    def objective(self) -> str:
+        return self._objective
+
+    def without(self, disks: Iterable[str]) -> 'DiskPlanner':
+        """Планировщик по тому же инвентарю без дисков disks (например, занятых созданным пулом)"""
+        return DiskPlanner(self._inventory, self._exclude | set(disks), self._objective)
+
+    def available(self, disk_type: Optional[str] = None, disk_size: Optional[int] = None,
+                  for_cache: bool = False) -> int:
+        """Сколько дисков доступно в группах, подходящих под тип и размер"""
+        source = WRITE_CACHE if for_cache else FREE
+        return sum(len(disks) for key, disks in self._buckets.items()
+                   if key[0] == source and _matches(key, disk_type, disk_size))
+
+    def plan(self, roles: Sequence[RoleRequest]) -> Optional[DiskPlan]:
+        """
+        Лучший план для ролей или None, если дисков не хватает. Роли с count=0 пропускаются.
+        """
+        roles = _ordered([role for role in roles if role.count])
+        best_score, best = None, None
+        taken: Dict[BucketKey, int] = {}
+        chosen: Dict[str, BucketKey] = {}
+
+        def search(index: int) -> bool:
+            """True - искать дальше не нужно (first_fit нашёл первый план)"""
+            nonlocal best_score, best
+            if index == len(roles):
+                score = self._score(roles, chosen, taken)
+                if best_score is None or score < best_score:
+                    best_score, best = score, dict(chosen)
+                return self._objective == 'first_fit'
+            role = roles[index]
+            for key in self._candidates(role, chosen):
+                if len(self._buckets[key]) - taken.get(key, 0) < role.count:
+                    continue
+                taken[key] = taken.get(key, 0) + role.count
+                chosen[role.role] = key
+                done = search(index + 1)
+                taken[key] -= role.count
+                del chosen[role.role]
+                if done:
+                    return True
+            return False
+
+        search(0)
+        return self._build_plan(roles, best) if best is not None else None
+
+    def _candidates(self, role: RoleRequest, chosen: Dict[str, BucketKey]) -> List[BucketKey]:
+        disk_type, disk_size = role.disk_type, role.disk_size
+        if role.same_as is not None:
+            _, linked_size, linked_type = chosen[role.same_as]
+            disk_type, disk_size = disk_type or linked_type, disk_size or linked_size
+        source = WRITE_CACHE if role.for_cache else FREE
+        return sorted((key for key in self._buckets if key[0] == source and _matches(key, disk_type, disk_size)),
+                      key=self._rank.__getitem__)
+
+    def _score(self, roles: List[RoleRequest], chosen: Dict[str, BucketKey], taken: Dict[BucketKey, int]) -> tuple:
+        ranks = tuple(self._rank[chosen[role.role]] for role in roles)
+        if self._objective == 'first_fit':
+            return ranks
+        consumed = sum(key[1] * count for key, count in taken.items())
+        exhausted = sum(1 for key, count in taken.items() if count and count == len(self._buckets[key]))
+        return consumed, exhausted, ranks
+
+    def _build_plan(self, roles: List[RoleRequest], chosen: Dict[str, BucketKey]) -> DiskPlan:
+        # Роли из одной группы получают диски подряд, в порядке clusterInfo
+        offsets: Dict[BucketKey, int] = {}
+        assignments = {}
+        for role in roles:
+            key = chosen[role.role]
+            start = offsets.get(key, 0)
+            offsets[key] = start + role.count
+            assignments[role.role] = RoleAssignment(
+                role.role, key[1], key[2], tuple(self._buckets[key][start:start + role.count])
+            )
+        consumed = sum(key[1] * count for key, count in offsets.items())
+        return DiskPlan(assignments, consumed)
+
+
+def _matches(key: BucketKey, disk_type: Optional[str], disk_size: Optional[int]) -> bool:
+    return (not disk_size or key[1] == disk_size) and (not disk_type or key[2] == disk_type)
+
+
+def _ordered(roles: List[RoleRequest]) -> List[RoleRequest]:
+    """Роли, зависящие от других (same_as), - после них"""
+    names = {role.role for role in roles}
+    for role in roles:
+        if role.same_as is not None and role.same_as not in names:
+            raise ValueError(f"Role '{role.role}' depends on unknown role '{role.same_as}'")
+    return [role for role in roles if role.same_as is None] + [role for role in roles if role.same_as is not None]
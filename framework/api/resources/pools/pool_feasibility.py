@@ -0,0 +1,83 @@
+import itertools
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Tuple
+from framework.api.models.pool_models import PoolConfig
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.resources.disks.disk_selector import DiskSelector
+
+
+""" Проверка конфигураций пулов на инвентаре кластера до запуска тестов.
+
+    PoolFeasibility прогоняет конфигурацию через те же стратегии выбора дисков, что и создание пула
+    (DiskSelector.dry_run), на одном снимке инвентаря, снятом при сборе тестов (collection_inventory.py).
+    Конфигурация, для которой дисков не хватает даже на пустом от резервов кластере, не создастся и в тесте:
+    conftest пропускает такие тесты сразу с причиной, а конфигурации маркера pool_matrix снимает с запуска.
+
+    expand_pool_matrix раскрывает оси матрицы (параметры PoolConfig со списком значений) в конфигурации
+    с читаемыми id для параметризации.
+"""
+
+
+def expand_pool_matrix(**axes) -> List[Tuple[str, PoolConfig]]:
+    """
+    Декартово произведение осей матрицы конфигураций.
+
+    Параметр со списком (или кортежем) значений - ось, остальные параметры общие для всех конфигураций.
+    Список имён дисков как значение оси передаётся вложенным списком: mainDisks=[["disk_1", "disk_2", "disk_3"]].
+
+    Example:
+        expand_pool_matrix(auto_configure=False, raid_type="raid5", mainDisks=[3, 4], spareDisks=[0, 1])
+        # [("mainDisks=3-spareDisks=0", PoolConfig(...)), ("mainDisks=3-spareDisks=1", PoolConfig(...)), ...]
+
+    :return: list: Пары (id, конфигурация) в порядке осей.
+    """
+    base = {key: value for key, value in axes.items() if not isinstance(value, (list, tuple))}
+    matrix = {key: value for key, value in axes.items() if isinstance(value, (list, tuple))}
+    config = PoolConfig(**base)
+    configs = []
+    for values in itertools.product(*matrix.values()):
+        point = dict(zip(matrix, values))
+        config_id = '-'.join(f"{key}={value}" for key, value in point.items()) or config.raid_type
+        configs.append((config_id, replace(config, **point)))
+    return configs
+
+
+class PoolFeasibility:
+    """
+    Помещаются ли конфигурации пулов на кластер. Результаты кэшируются по конфигурации.
+
+    Example:
+        feasibility = PoolFeasibility(cluster_tools.snapshot().inventory)
+        reason = feasibility.reason(pool_config)     # None - конфигурация помещается
+        configs = feasibility.feasible(configs)
+    """
+
+    def __init__(self, inventory: DiskInventory, selector: Optional[DiskSelector] = None):
+        """
+        :param inventory: Диски кластера, на котором будут запускаться тесты.
+        :param selector: (DiskSelector, optional): Чем подбирать диски. По умолчанию - DiskSelector без инструмента.
+        """
+        self._inventory = inventory
+        self._selector = selector or DiskSelector(None)
+        self._reasons: Dict[str, Optional[str]] = {}
+
+    @property
+    def inventory(self) -> DiskInventory:
+        return self._inventory
+
+    def reason(self, config: PoolConfig) -> Optional[str]:
+        """Почему конфигурация не помещается на кластер, или None, если помещается"""
+        key = repr(config)
+        if key not in self._reasons:
+            try:
+                self._selector.dry_run(self._inventory, config)
+                self._reasons[key] = None
+            except ValueError as e:
+                self._reasons[key] = str(e)
+        return self._reasons[key]
+
+    def is_feasible(self, config: PoolConfig) -> bool:
+        return self.reason(config) is None
+
+    def feasible(self, configs: Iterable[PoolConfig]) -> List[PoolConfig]:
+        return [config for config in configs if self.is_feasible(config)]
@@ -0,0 +1,147 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+from framework.api.core.logger import logger
+from framework.api.models.pool_models import PoolConfig
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.resources.disks.disk_selector import DiskSelector
+
+
+""" Расписание матрицы конфигураций пулов волнами.
+
+    Параметризованные наборы (test_create_zfs_pool_manual_raid5/6/7...) создают и удаляют пулы по одному,
+    хотя кластер вмещает несколько пулов сразу. PoolMatrix моделирует расход дисков по инвентарю:
+    для каждой конфигурации диски подбираются теми же стратегиями, что и при создании (DiskSelector.dry_run),
+    и конфигурации раскладываются по волнам - наборам пулов, которые помещаются на кластер вместе.
+
+    Раскладка - first fit decreasing: конфигурации по убыванию числа дисков, каждая - в первую волну,
+    где для неё хватает дисков. Внутри волны конфигурации идут в исходном порядке.
+    Пулы auto_configure и ручные в одну волну не попадают: при автоконфигурации диски выбирает сервер
+    (первые свободные нужного размера и типа) и может занять диски, выбранные для ручного пула той же волны.
+    Пулы волны создаются одним параллельным пакетом и удаляются перед следующей волной (PoolTools.run_waves).
+
+Настройки (.env / переменные окружения):
+    - API_POOL_WAVE_SIZE: максимум пулов в волне (по умолчанию 0 - без ограничения).
+"""
+
+
+def default_wave_size() -> Optional[int]:
+    return int(os.getenv('API_POOL_WAVE_SIZE', 0)) or None
+
+
+@dataclass(frozen=True)
+class PoolWave:
+    """Конфигурации, пулы которых помещаются на кластер вместе, и диски, которые они займут"""
+    index: int
+    keys: Tuple[Hashable, ...]
+    configs: Tuple[PoolConfig, ...]
+    disks: FrozenSet[str]
+
+    def __len__(self):
+        return len(self.configs)
+
+
+@dataclass(frozen=True)
+class PoolSchedule:
+    waves: Tuple[PoolWave, ...] = ()
+    # Ключ конфигурации -> почему она не помещается на кластер даже одна
+    unplaceable: Dict[Hashable, str] = field(default_factory=dict)
+
+    def wave_of(self, key: Hashable) -> Optional[PoolWave]:
+        return next((wave for wave in self.waves if key in wave.keys), None)
+
+    def summary(self) -> str:
+        configs = sum(len(wave) for wave in self.waves)
+        sizes = ', '.join(str(len(wave)) for wave in self.waves)
+        text = f"{configs} pool configs in {len(self.waves)} waves ({sizes})"
+        return f"{text}, {len(self.unplaceable)} do not fit the cluster" if self.unplaceable else text
+
+
+class PoolMatrix:
+    """
+    Набор конфигураций пулов, которые нужно прогнать на одном кластере.
+
+    Example:
+        matrix = PoolMatrix(configs)
+        schedule = matrix.schedule(cluster_tools.snapshot().inventory)
+        for wave in schedule.waves:
+            pool_tools.create_pools(wave.configs)
+    """
+
+    def __init__(self, configs: Iterable[PoolConfig] = (), max_wave_size: Optional[int] = None,
+                 selector: Optional[DiskSelector] = None):
+        """
+        :param max_wave_size: (int, optional): Максимум пулов в волне. По умолчанию из API_POOL_WAVE_SIZE.
+        :param selector: (DiskSelector, optional): Чем подбирать диски. По умолчанию - DiskSelector без инструмента.
+        """
+        self._entries: List[Tuple[Hashable, PoolConfig]] = []
+        self._max_wave_size = max_wave_size
+        self._selector = selector or DiskSelector(None)
+        for config in configs:
+            self.add(config)
+
+    def add(self, config: PoolConfig, key: Optional[Hashable] = None) -> Hashable:
+        """Добавляет конфигурацию; key - как её найти в расписании (по умолчанию порядковый номер)"""
+        key = len(self._entries) if key is None else key
+        self._entries.append((key, config))
+        return key
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, inventory: DiskInventory, exclude: Iterable[str] = ()) -> PoolSchedule:
+        """
+        Раскладывает конфигурации по волнам.
+
+        :param inventory: Диски кластера, на котором будут создаваться пулы.
+        :param exclude: Диски, которые нельзя занимать (например, зарезервированные другими тестами).
+        """
+        exclude = frozenset(exclude)
+        max_wave_size = self._max_wave_size or default_wave_size()
+        unplaceable: Dict[Hashable, str] = {}
+        demands = []
+        for position, (key, config) in enumerate(self._entries):
+            try:
+                disks = self._selector.dry_run(inventory, config, exclude).all_disks()
+            except ValueError as e:
+                unplaceable[key] = str(e)
+                continue
+            demands.append((position, key, config, disks))
+
+        drafts: List[_WaveDraft] = []
+        for position, key, config, disks in sorted(demands, key=lambda demand: -len(demand[3])):
+            for draft in drafts:
+                if draft.auto_configure != config.auto_configure or \
+                        (max_wave_size and len(draft.entries) >= max_wave_size):
+                    continue
+                try:
+                    selected = self._selector.dry_run(inventory, config, exclude | draft.disks).all_disks()
+                except ValueError:
+                    continue
+                draft.add(position, key, config, selected)
+                break
+            else:
+                draft = _WaveDraft(config.auto_configure)
+                draft.add(position, key, config, disks)
+                drafts.append(draft)
+
+        schedule = PoolSchedule(tuple(draft.build(index) for index, draft in enumerate(drafts)), unplaceable)
+        logger.info(f"Pool matrix: {schedule.summary()}")
+        return schedule
+
+
+@dataclass
+class _WaveDraft:
+    """Волна в процессе раскладки: (позиция в матрице, ключ, конфигурация) и занятые диски"""
+    auto_configure: bool
+    entries: List[Tuple[int, Hashable, PoolConfig]] = field(default_factory=list)
+    disks: FrozenSet[str] = frozenset()
+
+    def add(self, position: int, key: Hashable, config: PoolConfig, disks: Iterable[str]):
+        self.entries.append((position, key, config))
+        self.disks = self.disks | frozenset(disks)
+
+    def build(self, index: int) -> PoolWave:
+        entries = sorted(self.entries, key=lambda entry: entry[0])
+        return PoolWave(index, tuple(key for _, key, _ in entries), tuple(config for _, _, config in entries),
+                        self.disks)
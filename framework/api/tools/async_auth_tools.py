@@ -0,0 +1,158 @@
+import asyncio
+from httpx import Response
+from typing import Dict, Optional
+from .auth_tools import AuthTools, TokenRefresher
+from framework.api.core.logger import logger
+from ..resources.endpoints import ApiEndpoints
+
+
+class AsyncTokenRefresher:
+    """
+    Асинхронный аналог TokenRefresher: обновление токенов к сроку jwtAccessExpirationDate в задаче asyncio.
+    Сам refresh выполняется в потоке через общий single-flight сессии, чтобы не расходиться с клиентами после 401.
+    """
+
+    def __init__(self, auth_tools, refresh_interval=170):  # 3 minutes default - 10sec
+        self.auth_tools = auth_tools
+        self.refresh_interval = refresh_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(max(TokenRefresher.MIN_WAIT, self.auth_tools.next_refresh_check(self.refresh_interval)))
+
+            # Проверяем нужно ли обновить токен
+            if self.auth_tools.needs_token_refresh() and not await asyncio.to_thread(self.auth_tools.renew_session):
+                await asyncio.sleep(TokenRefresher.RETRY_DELAY)
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+
+class AsyncAuthTools(AuthTools):
+    """
+    Асинхронный вариант AuthTools поверх context.async_client.
+
+    Парсинг ответов и хранение сессии общие с AuthTools, обновление токенов
+    выполняется задачей asyncio в event loop теста вместо отдельного потока.
+    """
+
+    async def authentication(self):
+        """High-level authentication handler"""
+        if self._manual_auth:
+            return self.get_current_session()
+
+        if not self.is_authenticated():
+            self._configure_credentials()
+            return (await self.login()).json()
+        return self.get_current_session()
+
+    async def force_authentication(self):
+        """Принудительный login независимо от текущего состояния(очистка)"""
+        await self.logout_and_clean()
+        return await self.login()
+
+    async def login(self):
+        """Public login interface"""
+        self._manual_auth = True
+        self._validate_login_prerequisites()
+        response = await self._perform_login()
+        self._setup_session(response)
+        return response
+
+    async def _perform_login(self):
+        """Core login implementation"""
+        headers = self._prepare_headers()
+        response = await self._send_login_request(headers)
+        self._validate_response(response)
+        return response
+
+    async def _send_login_request(self, headers):
+        """Выполняет POST запрос"""
+        return await self._context.async_client.post(
+            ApiEndpoints.Auth.LOGIN,
+            json=self._config.to_request(),
+            headers=headers
+        )
+
+    def _start_token_refresher(self):
+        """Запускаем token_refresher задачей в текущем event loop"""
+        self._token_refresher = AsyncTokenRefresher(self)
+        self._token_refresher.start()
+
+    async def refresh_tokens(self):
+        """
+        Refreshes authentication tokens using the refresh token endpoint.
+        Updates session data, headers and cookies with new values.
+        """
+        if not self._user_agent:
+            raise ValueError("User-Agent not set. Login first.")
+
+        params = {
+            'user-agent': self._user_agent,
+            'tabId': -1
+        }
+
+        response = await self._context.async_client.get(
+            ApiEndpoints.Auth.REFRESH_TOKENS,
+            headers=self.session.snapshot.auth_headers,
+            params=params
+        )
+
+        if response.status_code != 200:
+            logger.error(f"Token refresh failed with status code: {response.status_code}")
+            raise Exception(f"Token refresh failed: {response.text}")
+
+        self._update_session(response)
+        return response
+
+    async def logout(self) -> Dict:
+        """Perform logout and return status"""
+        if not self._prepare_logout():
+            status = {
+                "success": False,
+                "message": "Logout preparation failed - no active session",
+                "action_completed": "none"
+            }
+            self.logger.info(f"Logout status: {status}")
+            return status
+
+        self._forget_shared_session()
+        response = await self._send_logout_request()
+        self._handle_logout_response(response)
+
+        status = {
+            "success": response.status_code in (200, 204),
+            "message": "Logout successful" if response.status_code in (200, 204) else "Logout failed",
+            "status_code": response.status_code,
+            "action_completed": "full_logout"
+        }
+        self.logger.info(f"Logout status: {status}")
+        return status
+
+    async def _send_logout_request(self):
+        logout_data = self._prepare_logout_data()
+        snapshot = self.session.snapshot
+        return await self._context.async_client.post(
+            ApiEndpoints.Auth.LOGOUT,
+            json=logout_data,
+            headers=snapshot.auth_headers,
+            cookies=snapshot.cookies
+        )
+
+    async def logout_and_clean(self) -> Optional[Response]:
+        """Perform logout with clean"""
+        if not self._prepare_logout():
+            return None
+
+        # Общую сессию закрывает последний воркер, который её использует
+        if not self._release_shared_session():
+            return None
+
+        response = await self._send_logout_request()
+        self._handle_logout_response(response)
+        return response
@@ -0,0 +1,30 @@
+from framework.api.tools.cluster_tools import ClusterSnapshot, ClusterTools
+from ..resources.endpoints import ApiEndpoints
+
+
+class AsyncClusterTools(ClusterTools):
+    """
+    Асинхронные операции с кластером поверх context.async_client.
+    Снимок clusterInfo общий с синхронным ClusterTools контекста.
+    """
+
+    @property
+    def _shared(self) -> ClusterTools:
+        return self._context.tools_manager.cluster
+
+    async def snapshot(self) -> ClusterSnapshot:
+        """Актуальный снимок кластера. См. ClusterTools.snapshot"""
+        snapshot = self._shared._fresh_snapshot()
+        return snapshot if snapshot is not None else await self.refresh()
+
+    async def refresh(self) -> ClusterSnapshot:
+        generation = self._shared._generation
+        response = await self._context.async_client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+        return self._shared._store(response, generation)
+
+    def invalidate(self):
+        self._shared.invalidate()
+
+    async def get_cluster_info(self, keys_to_extract=None):
+        """Get cluster information with required disk data"""
+        return self._extract_snapshot(await self.snapshot(), keys_to_extract)
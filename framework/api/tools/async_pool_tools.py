@@ -0,0 +1,143 @@
+from httpx import Response
+from typing import AsyncIterator, Dict, Iterable, List, Set, Tuple
+from framework.api.core.batch import BatchResult
+from framework.api.models.pool_models import PoolConfig
+from framework.api.utils.retry import disk_operation_with_retry
+from .pool_tools import PoolTools
+from ..resources.pools.pool_matrix import PoolWave
+from ..resources.endpoints import ApiEndpoints
+
+
+class AsyncPoolTools(PoolTools):
+    """
+    Асинхронный вариант PoolTools.
+
+    Логика подготовки запросов и выбора дисков общая с PoolTools,
+    асинхронными являются только обращения к API через context.async_client.
+
+    Example:
+        async def test_pools(framework_context):
+            pools = framework_context.tools_manager.async_pool
+            await asyncio.gather(*(pools.delete_pool(name) for name in names))
+    """
+
+    @disk_operation_with_retry()
+    async def create(self, **custom_params) -> dict:
+        """Основной метод создания пула"""
+        self.validate()
+        request_data = await self._prepare_request_data()
+        response = await self._make_create_request(request_data)
+        return self._register_created_pool(request_data, response)
+
+    async def _prepare_request_data(self) -> dict:
+        """Подготавливаем запрос на создание пула"""
+        self._ensure_config()
+        disk_config = await self._get_disk_configuration()
+        return self._build_request_data(disk_config)
+
+    async def _get_disk_configuration(self, exclude: Iterable[str] = ()) -> dict:
+        """Получить данные от кластера, конфигурацию дисков. Диски из exclude не выбираются."""
+        cluster_data = await self._context.tools_manager.async_cluster.get_cluster_info()
+
+        return self._disk_selector.select_disks(
+            cluster_data,
+            self._config,
+            exclude
+        )
+
+    async def _make_create_request(self, request_data: Dict) -> Response:
+        """Создаём API запрос на создание пула используя асинхронный клиент из контекста"""
+        return await self._context.async_client.post(
+            ApiEndpoints.Pools.CREATE_POOL.format(pool_name=request_data['name']),
+            json=request_data
+        )
+
+    async def delete_pool(self, pool_name: str) -> None:
+        """Delete pool by name"""
+        response = await self._context.async_client.delete(
+            ApiEndpoints.Pools.DELETE_POOL.format(pool_name=pool_name)
+        )
+        self._forget_pool(pool_name, response)
+
+    async def create_pools(self, configs: Iterable[PoolConfig], max_concurrency: int = None) -> List[BatchResult]:
+        """Конкурентно создаёт несколько пулов. См. PoolTools.create_pools"""
+        self.validate()
+        requests: List[Tuple[dict, Set[str]]] = []
+        try:
+            for config in configs:
+                self.configure(config)
+                requests.append(self._take_pool_request(
+                    await self._get_disk_configuration(exclude=self._requested_disks(requests))
+                ))
+        except ValueError:
+            self._release_pool_requests(requests)
+            raise
+
+        results = await self._context.async_client.batch(self._create_specs(requests), max_concurrency)
+        self._register_created_pools(requests, results)
+        return results
+
+    async def run_waves(self, configs: Iterable[PoolConfig],
+                        max_concurrency: int = None) -> AsyncIterator[Tuple[PoolWave, List[BatchResult]]]:
+        """
+        Прогоняет матрицу конфигураций волнами. См. PoolTools.run_waves
+
+        Example:
+            async for wave, results in pool_tools.run_waves(configs):
+                assert all(result.ok for result in results)
+        """
+        self.validate()
+        snapshot = await self._context.tools_manager.async_cluster.snapshot()
+        for wave in self._schedule_waves(configs, snapshot.inventory):
+            results = await self.create_pools(wave.configs, max_concurrency)
+            try:
+                yield wave, results
+            finally:
+                await self.delete_pools(self._created_pool_names(results), max_concurrency)
+
+    async def delete_pools(self, pool_names: List[str], max_concurrency: int = None) -> List[BatchResult]:
+        """Конкурентно удаляет несколько пулов. См. PoolTools.delete_pools"""
+        results = await self._context.async_client.batch(self._delete_specs(pool_names), max_concurrency)
+        self._forget_deleted_pools(results)
+        return results
+
+    async def add_disks_to_pools(self, endpoint: str, disks_by_pool: Dict[str, List[str]],
+                                 max_concurrency: int = None) -> List[BatchResult]:
+        """Конкурентно добавляет диски к нескольким пулам. См. PoolTools.add_disks_to_pools"""
+        results = await self._context.async_client.batch(
+            self._add_disks_specs(endpoint, disks_by_pool), max_concurrency
+        )
+        self._cluster_changed()
+        return results
+
+    async def get_pools(self):
+        return await self._context.async_client.get(ApiEndpoints.Pools.BASE)
+
+    async def get_pool_by_name(self, pool_name: str) -> dict:
+        """Get pool configuration by name"""
+        response = await self.get_pools()
+        return self._find_pool(response.json(), pool_name)
+
+    async def _make_expansion_request(self, pool_name: str, request_data: Dict) -> Response:
+        """Send pool expansion request"""
+        return await self._context.async_client.put(
+            ApiEndpoints.Pools.EXPAND_POOL.format(pool_name=pool_name),
+            json=request_data
+        )
+
+    @disk_operation_with_retry()
+    async def expand_pool(self, pool_name: str) -> Response:
+        """Расширение существующего пула"""
+        self.validate()
+
+        pool_data = await self.get_pool_by_name(pool_name)
+        cluster_info = await self._context.tools_manager.async_cluster.get_cluster_info()
+        request_data = self._build_expansion_request(pool_data, cluster_info)
+
+        response = await self._make_expansion_request(
+            pool_name=pool_name,
+            request_data=request_data
+        )
+        self._cluster_changed()
+        self._settle_reservation(pool_name, response.is_success)
+        return response
@@ -1,17 +1,26 @@
 import os
-import time
 from httpx import Response
 from threading import Thread, Event
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional
 from ..models.auth_models import AuthConfig
 from ..tools.base_tools import BaseTools
-from framework.api.core.cookie_manager import CookieManager
+from framework.api.core.session_broker import SharedSession, session_broker
+from framework.api.core.session_store import SessionStore, access_expires_at
 from framework.api.core.logger import logger
 from framework.api.resources.auth.auth_exceptions import AuthenticationError
+from framework.api.resources.endpoints import ApiEndpoints
 
 
 
 class TokenRefresher(Thread):
+    """
+    Обновляет токены к сроку jwtAccessExpirationDate (минус API_TOKEN_REFRESH_MARGIN).
+    refresh_interval - максимальная пауза между проверками.
+    """
+
+    RETRY_DELAY = 5  # Пауза перед повтором после неудачного обновления
+    MIN_WAIT = 1
+
     def __init__(self, auth_tools, refresh_interval=170):  # 3 minutes default - 10sec
         super().__init__(daemon=True)
         self.auth_tools = auth_tools
@@ -23,11 +32,12 @@ class TokenRefresher(Thread):
         while not self.stop_event.is_set():
 
             # Проверяем нужно ли обновить токен
-            if self.auth_tools.needs_token_refresh():
-                self.auth_tools.refresh_tokens()
+            if self.auth_tools.needs_token_refresh() and not self.auth_tools.renew_session():
+                self.stop_event.wait(self.RETRY_DELAY)
+                continue
 
             # Ждём следующей проверки
-            self.stop_event.wait(self.refresh_interval)
+            self.stop_event.wait(max(self.MIN_WAIT, self.auth_tools.next_refresh_check(self.refresh_interval)))
 
     def stop(self):
         self.stop_event.set()
@@ -38,25 +48,49 @@ class AuthTools(BaseTools):
         super().__init__(context)
         self._config: Optional[AuthConfig] = None
         self._user_agent: Optional[str] = None
-        self._session_data: Optional[Dict] = None
-        self._auth_headers: Optional[Dict] = None
-        self.cookie_manager = CookieManager()
+        # Сессия клиента ноды, на которой выполнен login (см. session)
+        self._session: Optional[SessionStore] = None
+        self._client = None  # Клиент ноды, на которой выполнен login: через него идёт refresh
         self._token_refresher: Optional[TokenRefresher] = None
-        self._last_refresh_time: Optional[float] = None
+        # Ключ и версия сессии в брокере, если она общая для воркеров xdist (см. shared_login)
+        self._shared_key: Optional[str] = None
+        self._shared_version: Optional[int] = None
         self._skip_validation: bool = False
         self.logger = logger
         self._manual_auth = False  # Flag for manual authentication
 
+    @property
+    def session(self) -> SessionStore:
+        """
+        Сессия, с которой работает инструмент: хранилище клиента ноды, на которой выполнен login.
+        После переключения ноды (node_switcher) logout и refresh по-прежнему используют куки этой сессии.
+        До login - сессия текущего клиента контекста.
+        """
+        return self._session or self._context.client.session
+
     def authentication(self):
         """High-level authentication handler"""
+        shared = session_broker.enabled and self._auth_scope() != 'function'
+        if self._shared_key is not None and not shared:
+            # Тест сам управляет сессией (logout и т.п.) - общую сессию воркеров ему не отдаём
+            self._leave_shared_session()
+
         if self._manual_auth:
             return self.get_current_session()
 
         if not self.is_authenticated():
             self._configure_credentials()
+            if shared:
+                return self.shared_login()
             return self.login().json()
         return self.get_current_session()
 
+    def _auth_scope(self) -> str:
+        """Область авторизации теста из маркера auth_scope: session (по умолчанию) или function"""
+        node = getattr(self._context.request, 'node', None)
+        marker = node.get_closest_marker('auth_scope') if node is not None else None
+        return marker.args[0] if marker is not None and marker.args else 'session'
+
     def force_authentication(self):
         """Принудительный login независимо от текущего состояния(очистка)"""
         self.logout_and_clean()  # Clear existing session
@@ -77,6 +111,30 @@ class AuthTools(BaseTools):
         self._setup_session(response)
         return response
 
+    def shared_login(self) -> Dict:
+        """
+        Login через брокер сессий (pytest-xdist): login на ноду выполняет один воркер,
+        остальные получают его сессию. Возвращает данные сессии, как get_current_session().
+        """
+        self._manual_auth = True
+        self._validate_login_prerequisites()
+        self._prepare_headers()
+        self._bind_session()
+        self._shared_key = session_broker.key(self._context.client.name or self._context.client.base_url, self._config)
+        self._adopt(session_broker.acquire(self._shared_key, self._login_for_broker))
+        self._start_token_refresher()
+        return self.get_current_session()
+
+    def _login_for_broker(self):
+        self._update_session(self._login_bound_client())
+        return self.session.cookies, self.session.snapshot.session_data
+
+    def _adopt(self, shared: SharedSession):
+        """Подхватывает версию сессии из брокера"""
+        self.session.update_cookies(shared.cookies)
+        self.session.set_session(shared.session_data, shared.refreshed_at)
+        self._shared_version = shared.version
+
     def _validate_login_prerequisites(self):
         if not self._skip_validation and not self.validate():
             raise ValueError("Invalid authentication configuration")
@@ -130,6 +188,13 @@ class AuthTools(BaseTools):
         self._validate_response(response)
         return response
 
+    def _login_bound_client(self) -> Response:
+        """Синхронный login через клиент, к сессии которого привязан инструмент (в том числе из потоков)"""
+        response = self._client.post(ApiEndpoints.Auth.LOGIN, json=self._config.to_request(),
+                                     headers=self._prepare_headers())
+        self._validate_response(response)
+        return response
+
     def _prepare_headers(self):
         """Prepare request"""
         headers = {
@@ -141,7 +206,7 @@ class AuthTools(BaseTools):
     def _send_login_request(self, headers):
         """Выполняет POST запрос"""
         return self._context.client.post(
-            "/login",
+            ApiEndpoints.Auth.LOGIN,
             json=self._config.to_request(),
             headers=headers
         )
@@ -178,31 +243,31 @@ class AuthTools(BaseTools):
 
     def _setup_session(self, response):
         """Setup session after successful login"""
-        self.cookie_manager.update_from_response(response)
-        self._session_data, self._auth_headers, self._cookies = self._parse_auth_response(response)
-        logger.info(f"Session data after login: {self._session_data}")
-        self._last_refresh_time = time.time()
+        self._bind_session()
+        self._update_session(response)
+        logger.info(f"Session data after login: {self._session.snapshot.session_data}")
         self._start_token_refresher()
 
-    def _parse_auth_response(self, response) -> Tuple[Dict, Dict, Dict]:
+    def _bind_session(self):
+        """Привязывается к сессии клиента текущей ноды; клиенты ноды обновляют её через _renew при 401"""
+        self._client = self._context.client
+        self._session = self._client.session
+        self._session.bind_renewer(self._renew)
+
+    def _update_session(self, response):
+        """Сохраняет куки и данные ответа login/refresh в сессию"""
+        # Клиент уже обновил куки своей сессии, но после переключения ноды это может быть другая сессия
+        self.session.update_from_response(response)
+        session_data = self._parse_auth_response(response)
+        self.session.set_session(session_data, expires_at=access_expires_at(session_data, response.headers.get('Date')))
+
+    def _parse_auth_response(self, response) -> Dict:
         """Управляет парсерами для поддержания сессии"""
         response_data = response.json()
 
         if "data" in response_data:
-            session_data = self._parse_login_data(response_data)
-        else:
-            session_data = self._parse_refresh_data(response_data)
-
-        cookies = self.cookie_manager.parse_set_cookie_header(
-            response.headers.get_list('Set-Cookie')
-        )
-
-        headers = {
-            "Content-Type": "application/json",
-            "Cookie": self.cookie_manager.format_cookie_header(cookies)
-        }
-
-        return session_data, headers, cookies
+            return self._parse_login_data(response_data)
+        return self._parse_refresh_data(response_data)
 
     @staticmethod
     def _parse_login_data(response_data) -> Dict:
@@ -218,7 +283,7 @@ class AuthTools(BaseTools):
         }
 
     def _parse_refresh_data(self, response_data) -> Dict:
-        session_data = self._session_data.copy()
+        session_data = dict(self.session.snapshot.session_data)
         session_data.update({
             "jwtAccessExpirationDate": response_data["jwtAccessExpirationDate"],
             "jwtRefreshExpirationDate": response_data["jwtRefreshExpirationDate"]
@@ -227,30 +292,66 @@ class AuthTools(BaseTools):
 
     def _start_token_refresher(self):
         """Запускаем token_refresher в отдельном потоке"""
-        self._token_refresher = TokenRefresher(self)
+        if self._shared_key is not None:
+            # Для общей сессии поток в основном подхватывает версии, обновлённые другими воркерами
+            self._token_refresher = TokenRefresher(self, refresh_interval=session_broker.sync_interval())
+        else:
+            self._token_refresher = TokenRefresher(self)
         self._token_refresher.start()
 
     def needs_token_refresh(self) -> bool:
         """Check if token needs refresh based on expiration time
             Проверяем наличие session_data
-            Устанавливаем время первого входа если его нет
-            Вычисляем время прошедшее с последнего обновления
-            Возвращаем True если прошло больше 170 секунд (3 минуты минус 10 секунд)
-            Проверка выполняется в цикле с интервалом, указанным в refresh_interval
+            Сравниваем текущее время со сроком jwtAccessExpirationDate минус API_TOKEN_REFRESH_MARGIN
+            (если сервер срок не вернул - 170 секунд с последнего обновления)
+            Проверка выполняется TokenRefresher к этому сроку, но не реже refresh_interval
         """
-        if not self._session_data:
+        snapshot = self.session.snapshot
+        refresh_in = snapshot.refresh_in()
+        if refresh_in is None:
             return False
 
-        # Если время последнего обновления не установлено (первый вход в систему), установит его сейчас
-        if self._last_refresh_time is None:
-            self._last_refresh_time = time.time()
-            return False
+        # Другой воркер уже обновил или закрыл общую сессию
+        if self._shared_key is not None:
+            shared = session_broker.current(self._shared_key)
+            if shared is None or shared.version != self._shared_version:
+                return True
 
-        current_time = time.time()
-        time_since_last_refresh = current_time - self._last_refresh_time
+        return refresh_in <= 0
 
-        # Обновляем, если с момента последнего обновления/входа прошло более 170 секунд.
-        return time_since_last_refresh >= 170
+    def next_refresh_check(self, max_wait: float) -> float:
+        """Через сколько секунд TokenRefresher проверяет сессию снова: к сроку обновления, но не позже max_wait"""
+        refresh_in = self.session.snapshot.refresh_in()
+        return max_wait if refresh_in is None else min(max_wait, refresh_in)
+
+    def renew_session(self) -> bool:
+        """
+        Обновляет сессию single-flight: если токены уже обновляет другой поток (например, клиент после 401),
+        ждёт его результата вместо второго refresh. True - сессия обновлена.
+        """
+        return self.session.renew(self.session.snapshot)
+
+    def _renew(self):
+        """
+        Обновление для SessionStore.renew: refresh, а если refresh-токен уже недействителен - новый login.
+        Синхронное и для AsyncAuthTools: выполняется из потока TokenRefresher или клиента, получившего 401.
+        """
+        if not self._user_agent:
+            raise ValueError("User-Agent not set. Login first.")
+        try:
+            if self._shared_key is not None:
+                self._refresh_shared()
+            else:
+                self._refresh_request()
+        except Exception as e:
+            if not self._config:
+                raise
+            logger.warning(f"Token refresh failed ({e}), logging in again")
+            if self._shared_key is not None:
+                session_broker.forget(self._shared_key, (self.get_current_session() or {}).get('sid', ''))
+                self._adopt(session_broker.acquire(self._shared_key, self._login_for_broker))
+            else:
+                self._update_session(self._login_bound_client())
 
     def refresh_tokens(self):
         """
@@ -260,23 +361,45 @@ class AuthTools(BaseTools):
         if not self._user_agent:
             raise ValueError("User-Agent not set. Login first.")
 
+        if self._shared_key is not None:
+            return self._refresh_shared()
+        return self._refresh_request()
+
+    def _refresh_shared(self) -> Optional[Response]:
+        """
+        Refresh общей сессии: запрос выполняет один воркер, остальные подхватывают новую версию.
+        Возвращает ответ refresh, если запрос выполнил этот воркер.
+        """
+        response = None
+
+        def refresh():
+            nonlocal response
+            response = self._refresh_request()
+            return self.session.cookies, self.session.snapshot.session_data
+
+        shared = session_broker.refresh(self._shared_key, self._shared_version, refresh)
+        if shared is None:
+            logger.warning("Shared session was logged out by another worker, acquiring a new one")
+            shared = session_broker.acquire(self._shared_key, self._login_for_broker)
+        self._adopt(shared)
+        return response
+
+    def _refresh_request(self) -> Response:
         params = {
             'user-agent': self._user_agent,
             'tabId': -1
         }
 
         try:
-            response = self._context.client.get(
-                "/refresh_tokens",
-                headers=self._auth_headers,
+            response = (self._client or self._context.client).get(
+                ApiEndpoints.Auth.REFRESH_TOKENS,
+                headers=self.session.snapshot.auth_headers,
                 params=params
             )
 
             if response.status_code == 200:
                 # Обновляем данные сессии из ответа
-                self._session_data, self._auth_headers, cookies = self._parse_auth_response(response)
-                self.cookie_manager.update_from_response(response)
-                self._last_refresh_time = time.time()
+                self._update_session(response)
 
                 # Verify session data is properly updated
                 # logger.info(f"Session data after refresh: {self._session_data}")
@@ -291,7 +414,7 @@ class AuthTools(BaseTools):
 
     def get_current_session(self) -> Dict:
         """Get current session information"""
-        return self._session_data
+        return self.session.snapshot.session_data
 
     def is_authenticated(self) -> bool:
         """Check if client is authenticated and has active token refresher"""
@@ -308,6 +431,7 @@ class AuthTools(BaseTools):
             self.logger.info(f"Logout status: {status}")
             return status
 
+        self._forget_shared_session()
         response = self._send_logout_request()
         self._handle_logout_response(response)
 
@@ -324,34 +448,54 @@ class AuthTools(BaseTools):
         self._stop_token_refresher()
         return self._validate_logout_prerequisites()
 
+    def _forget_shared_session(self):
+        """Явный logout общей сессии: брокер перестаёт её выдавать, воркеры получат новую"""
+        if self._shared_key is not None:
+            session_broker.forget(self._shared_key, (self.get_current_session() or {}).get('sid', ''))
+            self._shared_key = None
+
+    def _leave_shared_session(self):
+        """Отпускает общую сессию, чтобы выполнить собственный login"""
+        self.logout_and_clean()
+        self.clean_session_data()
+        self._manual_auth = False
+
+    def _release_shared_session(self) -> bool:
+        """Отпускает общую сессию. True - сессию нужно закрыть logout: она больше никому не нужна"""
+        key, self._shared_key = self._shared_key, None
+        if key is None:
+            return True
+        return session_broker.release(key, (self.get_current_session() or {}).get('sid', ''))
+
     def _stop_token_refresher(self):
         if self._token_refresher:
             self._token_refresher.stop()
             self._token_refresher = None
 
     def _validate_logout_prerequisites(self) -> bool:
-        current_cookies = self.cookie_manager.get_current_cookies()
-        if not current_cookies:
+        if not self.session.cookies:
             self.logger.warning("No active session found for logout")
             return False
         return True
 
     def _send_logout_request(self):
         logout_data = self._prepare_logout_data()
+        snapshot = self.session.snapshot
         return self._context.client.post(
-            "/logout",
+            ApiEndpoints.Auth.LOGOUT,
             json=logout_data,
-            headers=self._auth_headers,
-            cookies=self.cookie_manager.get_current_cookies()
+            headers=snapshot.auth_headers,
+            cookies=snapshot.cookies
         )
 
     def _prepare_logout_data(self) -> Dict:
-        if not self._session_data:
+        session_data = self.session.snapshot.session_data
+        if not session_data:
             return {}
         return {
-            "sid": self._session_data["sid"],
-            "login": self._session_data["data"]["login"],
-            "role": self._session_data["data"]["role"]
+            "sid": session_data["sid"],
+            "login": session_data["data"]["login"],
+            "role": session_data["data"]["role"]
         }
 
     def _handle_logout_response(self, response):
@@ -363,13 +507,17 @@ class AuthTools(BaseTools):
         if not self._prepare_logout():
             return None
 
+        # Общую сессию закрывает последний воркер, который её использует
+        if not self._release_shared_session():
+            return None
+
         response = self._send_logout_request()
         self._handle_logout_response(response)
         return response
 
     def clean_session_data(self):
-        # Очищаем все данные сессии
-        self._session_data = None
-        self._auth_headers = None
-        self._last_refresh_time = None
-        self.cookie_manager = CookieManager()
+        # Очищаем все данные сессии (общей с клиентом ноды)
+        self.session.clear()
+        self._session = None
+        self._client = None
+        self._shared_key = None
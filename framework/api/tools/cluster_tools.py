@@ -1,52 +1,197 @@
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import RLock
+from typing import Dict, List, Optional
 from framework.api.tools.base_tools import BaseTools
-from framework.api.utils.extractors import TestExtractor
+from framework.api.utils.extractors import TestExtractor, compile_jsonpath
+from ..resources.disks.cluster_diff import ClusterDiff, diff_disks
+from ..resources.disks.disk_inventory import DiskInventory
 from ..resources.endpoints import ApiEndpoints
 from ..core.logger import logger
 
 
+""" Снимок /nodes/clusterInfo.
+
+    Создание пула раньше скачивало clusterInfo на каждом шаге: выбор дисков, расширение,
+    каждая попытка disk_operation_with_retry. Теперь ClusterTools хранит последний ответ (ClusterSnapshot)
+    и отдаёт его, пока снимок не устарел. Снимок сбрасывается:
+    - после изменений кластера через PoolTools (создание/удаление/расширение пула, добавление дисков);
+    - перед повтором в disk_operation_with_retry - неудача могла быть из-за устаревших данных;
+    - в начале каждого теста (framework_context);
+    - по истечении CLUSTER_SNAPSHOT_TTL - изменения, сделанные мимо этого контекста (другими воркерами).
+
+    Новый снимок сравнивается с предыдущим (ClusterDiff): DiskInventory пересобирается только для
+    изменившихся дисков, а неизменившиеся диски общие с предыдущим снимком. Непустые разницы хранятся
+    в ограниченной истории (history()) - по ней видно, как менялся кластер за прогон.
+
+Настройки (.env / переменные окружения):
+    - CLUSTER_SNAPSHOT_TTL: сколько секунд снимок считается актуальным (по умолчанию 30, 0 - не хранить).
+    - CLUSTER_HISTORY_SIZE: сколько последних изменений кластера хранить (по умолчанию 50).
+    - CLUSTER_INFO_STREAMING: 1 - потоковый разбор clusterInfo (снимок при этом не используется).
+"""
+
+
+def is_streaming_enabled() -> bool:
+    """Потоковый разбор clusterInfo включается переменной окружения CLUSTER_INFO_STREAMING=1"""
+    return os.getenv('CLUSTER_INFO_STREAMING', '').lower() in ('1', 'true', 'yes')
+
+
+def snapshot_ttl() -> float:
+    return float(os.getenv('CLUSTER_SNAPSHOT_TTL', 30))
+
+
+def history_size() -> int:
+    return int(os.getenv('CLUSTER_HISTORY_SIZE', 50))
+
+
+@dataclass(frozen=True)
+class ClusterSnapshot:
+    """
+    Ответ /nodes/clusterInfo на момент запроса.
+    version растёт с каждым новым снимком контекста. data (разобранный JSON), disks и inventory
+    разделяются с соседними снимками - изменять их нельзя.
+    """
+    version: int
+    node: Optional[str]
+    data: dict
+    fetched_at: float
+    disks: Dict[str, dict]
+    inventory: DiskInventory
+    diff: ClusterDiff
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
 class ClusterTools(BaseTools):
     """Tools for cluster operations"""
 
+    DEFAULT_KEYS = ['disks_info', 'free_disks', 'free_for_wc', 'free_disks_by_size_and_type']
+
+    def __init__(self, context):
+        super().__init__(context)
+        self._snapshot: Optional[ClusterSnapshot] = None
+        # Последний полученный снимок, в том числе сброшенный: с ним сравнивается следующий
+        self._last: Optional[ClusterSnapshot] = None
+        self._history: deque = deque(maxlen=history_size())
+        self._version = 0
+        # Растёт при каждом invalidate: ответ, запрошенный до изменения кластера, снимком не становится
+        self._generation = 0
+        self._lock = RLock()
+
     def validate(self):
         """Implementation of abstract method"""
         pass
 
-    def get_cluster_info(self, keys_to_extract=None):
-        """Get cluster information with required disk data"""
-        response = self._context.client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+    def snapshot(self) -> ClusterSnapshot:
+        """Актуальный снимок кластера: сохранённый или новый, если сохранённого нет или он устарел"""
+        with self._lock:
+            snapshot = self._fresh_snapshot()
+            return snapshot if snapshot is not None else self.refresh()
+
+    def refresh(self) -> ClusterSnapshot:
+        """Запрашивает clusterInfo и сохраняет новый снимок"""
+        with self._lock:
+            generation = self._generation
+            response = self._context.client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+            return self._store(response, generation)
+
+    def invalidate(self):
+        """Сбрасывает снимок: следующий snapshot() запросит clusterInfo заново"""
+        with self._lock:
+            self._generation += 1
+            if self._snapshot is not None:
+                logger.debug(f"Cluster snapshot v{self._snapshot.version} invalidated")
+            self._snapshot = None
+
+    def diff(self, old: ClusterSnapshot, new: Optional[ClusterSnapshot] = None) -> ClusterDiff:
+        """Изменения дисков между двумя снимками (по умолчанию - между old и актуальным)"""
+        new = new or self.snapshot()
+        if new.diff.from_version == old.version:
+            return new.diff
+        diff, _ = diff_disks(old.disks, [dict(new.disks)], old.version, new.version)
+        return diff
+
+    def find(self, expression: str) -> list:
+        """Значения по JSONPath из актуального снимка, например find("$.nodes[*].name")"""
+        return [match.value for match in compile_jsonpath(expression).find(self.snapshot().data)]
+
+    def history(self) -> List[ClusterDiff]:
+        """Последние изменения кластера, замеченные этим контекстом, от старых к новым"""
+        with self._lock:
+            return list(self._history)
+
+    def _fresh_snapshot(self) -> Optional[ClusterSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.node != self._context.client.name or snapshot.age >= snapshot_ttl():
+            return None
+        return snapshot
+
+    def _store(self, response, generation: int) -> ClusterSnapshot:
         assert response.status_code == 200
-        data = response.json()
+        with self._lock:
+            self._version += 1
+            data = response.json()
+            snapshot = self._build_snapshot(data, self._last)
+            self._last = snapshot
+            if generation == self._generation:
+                self._snapshot = snapshot
+            if snapshot.diff and snapshot.diff.from_version is not None:
+                self._history.append(snapshot.diff)
+                logger.info(f"Cluster changed {snapshot.diff.summary()}")
+            logger.debug(f"Cluster snapshot v{snapshot.version} fetched from {snapshot.node}")
+            return snapshot
+
+    def _build_snapshot(self, data: dict, previous: Optional[ClusterSnapshot]) -> ClusterSnapshot:
+        """Снимок из ответа: диски и инвентарь строятся по изменениям относительно previous"""
+        containers = TestExtractor.find_disks(data)
+        if previous is None:
+            diff, disks = diff_disks({}, containers, None, self._version)
+            inventory = DiskInventory.from_disks(disks)
+        else:
+            diff, disks = diff_disks(previous.disks, containers, previous.version, self._version)
+            inventory = previous.inventory.with_changes(disks, diff.changed_disks)
+        return ClusterSnapshot(self._version, self._context.client.name, data, time.monotonic(),
+                               disks, inventory, diff)
 
-        default_keys = ['disks_info', 'free_disks', 'free_for_wc', 'free_disks_by_size_and_type']
+    def get_cluster_info(self, keys_to_extract=None, stream=None):
+        """Get cluster information with required disk data
+
+        :param keys_to_extract: Ключи, значения которых нужно собрать из ответа, или выражения JSONPath
+            ("$.nodes[*].name") - для них ответ не обходится целиком. JSONPath не поддерживается с stream.
+        :param stream: Разбирать ответ потоково (по умолчанию - CLUSTER_INFO_STREAMING из .env).
+            Память и время разбора растут с объёмом извлекаемых данных, а не всего ответа.
+        """
+        if stream is None:
+            stream = is_streaming_enabled()
+        if stream:
+            return self._get_cluster_info_streaming(keys_to_extract)
+
+        return self._extract_snapshot(self.snapshot(), keys_to_extract)
+
+    def _get_cluster_info_streaming(self, keys_to_extract=None):
+        """Передаёт тело /nodes/clusterInfo в экстрактор по частям, не разбирая его целиком"""
+        with self._context.client.stream("GET", ApiEndpoints.Cluster.CLUSTER_INFO) as response:
+            assert response.status_code == 200
+            resp_data = TestExtractor().extract_cluster_info_stream(
+                response.iter_bytes(), keys_to_extract or self.DEFAULT_KEYS
+            )
+
+        logger.info(f"DATA: {resp_data}")
+        return resp_data
+
+    @classmethod
+    def _extract_snapshot(cls, snapshot: ClusterSnapshot, keys_to_extract=None):
+        """Извлекает данные о дисках из снимка /nodes/clusterInfo"""
         extractor = TestExtractor()
 
-        resp_data = extractor.extract_cluster_info(data, keys_to_extract or default_keys)
+        resp_data = extractor.extract_cluster_info(
+            snapshot.data, keys_to_extract or cls.DEFAULT_KEYS, inventory=snapshot.inventory
+        )
         logger.info(f"DATA: {resp_data}")
 
         return resp_data
 
-
-    # def update_cluster_info(self):
-    #     """Update cluster information"""
-    #     response = self._context.client.get("/nodes/clusterInfo")
-    #     assert response.status_code == 200
-    #     self._context.cluster_info = response.json()
-
-''' Если вдруг нужно будет хранить контекст.'''
-    # def validate(self):
-    #     if not self._context.cluster_info:
-    #         self.update_cluster_info()
-    #
-    # def update_cluster_info(self):
-    #     """Update cluster information"""
-    #     response = self._context.client.get("/nodes/clusterInfo")
-    #     assert response.status_code == 200
-    #     self._context.cluster_info = response.json()
-    #
-    # def get_cluster_info(self):
-    #     """Get processed cluster information"""
-    #     self.validate()
-    #     return TestExtractor().extract_cluster_info(
-    #         self._context.cluster_info,     # сырые данные о кластере
-    #         self._context.keys_to_extract   # список ключей, которые нужно извлечь из данных
-    #     )
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 import os
 from dotenv import load_dotenv
 from ..tools.base_tools import BaseTools
+from ..resources.endpoints import ApiEndpoints
 import logging
 
 
@@ -37,10 +38,11 @@ class ConnectionTools(BaseTools):
         self.configure(node=node)
 
     def _load_available_nodes(self) -> Dict[str, str]:
-        """Load all available nodes from environment variables"""
+        """Load all available nodes from environment variables
+        Учитываются только NODE_* со значением-URL (NODE_USERNAME/NODE_PASSWORD - не ноды)"""
         nodes = {}
         for key, value in os.environ.items():
-            if key.startswith('NODE_') and key.upper() == key:
+            if key.startswith('NODE_') and key.upper() == key and value.startswith(('http://', 'https://')):
                 nodes[key] = value
         return nodes
 
@@ -58,7 +60,7 @@ class ConnectionTools(BaseTools):
             return False
 
         try:
-            response = self._context.client.get("/health")
+            response = self._context.client.get(ApiEndpoints.Cluster.HEALTH)
             return response.status_code == 200
         except Exception as e:
             self.logger.error(f"Connection validation failed: {e}")
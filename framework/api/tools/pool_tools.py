@@ -1,12 +1,16 @@
 import json
 from httpx import Response
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from framework.api.utils.generators import Generates
 from framework.api.utils.retry import disk_operation_with_retry
 from framework.api.models.pool_models import PoolConfig, PoolData, PoolProps
+from framework.api.core.batch import BatchResult, RequestSpec
 from .base_tools import BaseTools
 from ..core.logger import logger
+from ..resources.disks.disk_ledger import disk_ledger
 from ..resources.disks.disk_selector import DiskSelector
+from ..resources.disks.disk_inventory import DiskInventory
+from ..resources.pools.pool_matrix import PoolMatrix, PoolWave
 from ..resources.endpoints import ApiEndpoints
 
 
@@ -17,6 +21,8 @@ class PoolTools(BaseTools):
         self.current_pool = None
         self._pool_names: List[str] = []
         self._disk_selector = DiskSelector(self)
+        # Диски, зарезервированные последним выбором (disk_ledger) до ответа на запрос
+        self._selected_disks: Set[str] = set()
 
     def configure(self, config: Union[PoolConfig, dict]):
         if isinstance(config, PoolConfig):
@@ -37,6 +43,13 @@ class PoolTools(BaseTools):
         # Отправляет POST запрос, получает объект Response
         response = self._make_create_request(request_data)
 
+        return self._register_created_pool(request_data, response)
+
+    def _register_created_pool(self, request_data: dict, response: Response) -> dict:
+        """Обрабатывает ответ на создание и запоминает созданный пул"""
+        self._cluster_changed()
+        self._settle_reservation(request_data['name'], response.status_code == 201)
+
         # Преобразует Response в словарь:
         response_data = self._process_response(response)
 
@@ -52,12 +65,16 @@ class PoolTools(BaseTools):
 
     def _prepare_request_data(self) -> dict:
         """Подготавливаем запрос на создание пула"""
-        if not self._config:
-            self._config = PoolConfig()
+        self._ensure_config()
 
         # Стратегия сама определит что делать на основе auto_configure
         disk_config = self._get_disk_configuration()
 
+        return self._build_request_data(disk_config)
+
+    def _build_request_data(self, disk_config: dict) -> dict:
+        """Собирает тело запроса из конфига пула и выбранных дисков"""
+        self._selected_disks = {disk for disks in disk_config.values() for disk in disks}
         request_data = self._config.to_request()
         request_data.update(self._get_dynamic_params())
 
@@ -80,17 +97,22 @@ class PoolTools(BaseTools):
             'name': self._generate_pool_name() # Вынести хелперы в отдельный tool.
         }
 
-    def _get_disk_configuration(self) -> dict:
-        """Получить данные от кластера, конфигурацию дисков."""
-        cluster_data = self._context.tools_manager.cluster.get_cluster_info(
-            keys_to_extract=["name"]
-        )
+    def _get_disk_configuration(self, exclude: Iterable[str] = ()) -> dict:
+        """Получить данные от кластера, конфигурацию дисков. Диски из exclude не выбираются."""
+        # Для выбора нужны только диски: без keys_to_extract ответ не обходится в поисках ключей
+        cluster_data = self._context.tools_manager.cluster.get_cluster_info()
 
         return self._disk_selector.select_disks(
             cluster_data,
-            self._config
+            self._config,
+            exclude
         )
 
+    def _ensure_config(self):
+        """Если пул не сконфигурирован - используем PoolConfig по умолчанию"""
+        if not self._config:
+            self._config = PoolConfig()
+
     def _make_create_request(self, request_data: Dict) -> Response:
         """Создаём API запрос на создание пула используя клиент из контекста"""
         return self._context.client.post(
@@ -119,16 +141,169 @@ class PoolTools(BaseTools):
         response = self._context.client.delete(
             ApiEndpoints.Pools.DELETE_POOL.format(pool_name=pool_name)
         )
+        self._forget_pool(pool_name, response)
+
+    def _forget_pool(self, pool_name: str, response: Response) -> None:
+        """Проверяет ответ на удаление и убирает пул из списка созданных"""
+        self._cluster_changed()
 
         if response.status_code not in (200, 204):
             raise ValueError(f"Failed to delete pool: {response.text}")
 
+        disk_ledger.release_pool(pool_name)
+
         if pool_name in self._pool_names:
             self._pool_names.remove(pool_name)
 
         if self.current_pool and self.current_pool['name'] == pool_name:
             self.current_pool = None
 
+    def create_pools(self, configs: Iterable[PoolConfig], max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Параллельно создаёт несколько пулов (например, волну PoolMatrix).
+
+        Диски всех пулов выбираются до отправки запросов и не пересекаются между пулами.
+        Ошибки создания не пробрасываются: созданные пулы запоминаются для cleanup,
+        результаты по каждому пулу возвращаются в порядке configs.
+        """
+        self.validate()
+        requests: List[Tuple[dict, Set[str]]] = []
+        try:
+            for config in configs:
+                self.configure(config)
+                requests.append(self._take_pool_request(
+                    self._get_disk_configuration(exclude=self._requested_disks(requests))
+                ))
+        except ValueError:
+            self._release_pool_requests(requests)
+            raise
+
+        results = self._context.client.batch(self._create_specs(requests), max_concurrency)
+        self._register_created_pools(requests, results)
+        return results
+
+    def run_waves(self, configs: Iterable[PoolConfig],
+                  max_concurrency: int = None) -> Iterator[Tuple[PoolWave, List[BatchResult]]]:
+        """
+        Прогоняет матрицу конфигураций волнами (см. PoolMatrix): пулы волны создаются одним пакетом,
+        вызывающий код проверяет их, после чего пулы волны удаляются одним пакетом.
+
+        Example:
+            for wave, results in pool_tools.run_waves(configs):
+                assert all(result.ok for result in results)
+        """
+        self.validate()
+        for wave in self._schedule_waves(configs, self._context.tools_manager.cluster.snapshot().inventory):
+            results = self.create_pools(wave.configs, max_concurrency)
+            try:
+                yield wave, results
+            finally:
+                self.delete_pools(self._created_pool_names(results), max_concurrency)
+
+    def _schedule_waves(self, configs: Iterable[PoolConfig], inventory: DiskInventory) -> Tuple[PoolWave, ...]:
+        schedule = PoolMatrix(configs, selector=self._disk_selector).schedule(
+            inventory, exclude=disk_ledger.reserved_by_others(self._disk_selector.owner)
+        )
+        if schedule.unplaceable:
+            raise ValueError(f"Pool configs do not fit the cluster: {schedule.unplaceable}")
+        return schedule.waves
+
+    def _take_pool_request(self, disk_config: dict) -> Tuple[dict, Set[str]]:
+        """Тело запроса на создание пула и зарезервированные для него диски"""
+        request_data = self._build_request_data(disk_config)
+        disks, self._selected_disks = self._selected_disks, set()
+        return request_data, disks
+
+    @staticmethod
+    def _requested_disks(requests: List[Tuple[dict, Set[str]]]) -> Set[str]:
+        return {disk for _, disks in requests for disk in disks}
+
+    def _release_pool_requests(self, requests: List[Tuple[dict, Set[str]]]) -> None:
+        for request_data, disks in requests:
+            self._settle_reservation(request_data['name'], False, disks)
+
+    @staticmethod
+    def _create_specs(requests: List[Tuple[dict, Set[str]]]) -> List[RequestSpec]:
+        return [
+            RequestSpec("POST", ApiEndpoints.Pools.CREATE_POOL, {'pool_name': request_data['name']}, json=request_data)
+            for request_data, _ in requests
+        ]
+
+    def _register_created_pools(self, requests: List[Tuple[dict, Set[str]]], results: List[BatchResult]) -> None:
+        self._cluster_changed()
+        for (request_data, disks), result in zip(requests, results):
+            created = result.response is not None and result.response.status_code == 201
+            self._settle_reservation(request_data['name'], created, disks)
+            if created:
+                self._pool_names.append(request_data['name'])
+            else:
+                logger.error(f"Failed to create pool {request_data['name']}: "
+                             f"{result.error or result.response.text}")
+
+    @staticmethod
+    def _created_pool_names(results: List[BatchResult]) -> List[str]:
+        return [result.spec.path_params['pool_name'] for result in results if result.ok]
+
+    def delete_pools(self, pool_names: List[str], max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Параллельно удаляет несколько пулов.
+
+        Ошибки не пробрасываются: успешно удалённые пулы убираются из списка созданных,
+        результаты по каждому пулу возвращаются в порядке pool_names.
+        """
+        results = self._context.client.batch(self._delete_specs(pool_names), max_concurrency)
+        self._forget_deleted_pools(results)
+        return results
+
+    def add_disks_to_pools(self, endpoint: str, disks_by_pool: Dict[str, List[str]],
+                           max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Параллельно добавляет диски к нескольким пулам.
+
+        :param endpoint: Шаблон эндпоинта роли: ApiEndpoints.Pools.ADD_WRC / ADD_RDC / ADD_SPARE.
+        :param disks_by_pool: Имя пула -> список дисков для добавления.
+        :return: Результаты в порядке disks_by_pool.
+        """
+        results = self._context.client.batch(self._add_disks_specs(endpoint, disks_by_pool), max_concurrency)
+        self._cluster_changed()
+        return results
+
+    @staticmethod
+    def _delete_specs(pool_names: List[str]) -> List[RequestSpec]:
+        return [RequestSpec("DELETE", ApiEndpoints.Pools.DELETE_POOL, {'pool_name': name}) for name in pool_names]
+
+    @staticmethod
+    def _add_disks_specs(endpoint: str, disks_by_pool: Dict[str, List[str]]) -> List[RequestSpec]:
+        return [
+            RequestSpec("POST", endpoint, {'pool_name': name}, json={'disks': list(disks)})
+            for name, disks in disks_by_pool.items()
+        ]
+
+    def _forget_deleted_pools(self, results: List[BatchResult]) -> None:
+        self._cluster_changed()
+        for result in results:
+            if not result.ok:
+                logger.error(f"Failed to delete pool {result.spec.path_params['pool_name']}: "
+                             f"{result.error or result.response.text}")
+                continue
+            self._forget_pool(result.spec.path_params['pool_name'], result.response)
+
+    def _cluster_changed(self) -> None:
+        """Запрос изменил (или мог изменить) диски кластера - сохранённый снимок clusterInfo больше не актуален"""
+        self._context.tools_manager.cluster.invalidate()
+
+    def _settle_reservation(self, pool_name: str, succeeded: bool, disks: Optional[Set[str]] = None) -> None:
+        """
+        Резерв выбранных дисков (по умолчанию - последнего выбора): после успешного запроса привязывается
+        к пулу (снимется при его удалении), после неудачного - снимается, чтобы диски могли выбрать другие тесты.
+        """
+        if disks is None:
+            disks, self._selected_disks = self._selected_disks, set()
+        if succeeded:
+            disk_ledger.assign(self._disk_selector.owner, disks, pool_name)
+        else:
+            disk_ledger.release(self._disk_selector.owner, disks)
+
     def cleanup(self):
         """Cleanup all created pools"""
         # for pool_name in self._pool_names[:]:
@@ -140,7 +315,10 @@ class PoolTools(BaseTools):
 
     def get_pool_by_name(self, pool_name: str) -> dict:
         """Get pool configuration by name"""
-        pools = self.get_pools().json()
+        return self._find_pool(self.get_pools().json(), pool_name)
+
+    @staticmethod
+    def _find_pool(pools: dict, pool_name: str) -> dict:
         for pool in pools['pools']:
             if pool['name'] == pool_name:
                 return pool
@@ -166,6 +344,23 @@ class PoolTools(BaseTools):
 
         # Получаем текущий пул
         pool_data = self.get_pool_by_name(pool_name)
+
+        # Получаем диски через стратегию расширения
+        cluster_info = self._context.tools_manager.cluster.get_cluster_info()
+        request_data = self._build_expansion_request(pool_data, cluster_info)
+
+        # Отправляем запрос на расширение
+        response = self._make_expansion_request(
+            pool_name=pool_name,
+            request_data=request_data
+        )
+        self._cluster_changed()
+        self._settle_reservation(pool_name, response.is_success)
+
+        return response
+
+    def _build_expansion_request(self, pool_data: dict, cluster_info: dict) -> dict:
+        """Подбирает диски для расширения пула и формирует тело запроса"""
         # Преобразуем приходящий словарь к PoolData
         current_pool = PoolData(
             name=pool_data['name'],
@@ -173,19 +368,10 @@ class PoolTools(BaseTools):
             props=PoolProps(**pool_data['props'])
         )
 
-        # Получаем диски через стратегию расширения
-        cluster_info = self._context.tools_manager.cluster.get_cluster_info()
         expansion_disks = self._disk_selector.select_disks_for_expansion(cluster_info, current_pool)
+        self._selected_disks = set(expansion_disks['mainDisks'])
 
         # Преобразуем в нужный формат
-        request_data = {
+        return {
             'disks': list(expansion_disks['mainDisks'])
         }
-
-        # Отправляем запрос на расширение
-        response = self._make_expansion_request(
-            pool_name=pool_name,
-            request_data=request_data
-        )
-
-        return response
@@ -1,34 +1,191 @@
+import functools
+import json
 from framework.api.core.api_client import logger
-from typing import Dict, List
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - потоковый парсер опционален
+    ijson = None
+
+try:
+    from jsonpath_ng.ext import parse as parse_jsonpath
+except ImportError:  # pragma: no cover - JSONPath в keys_to_extract опционален
+    parse_jsonpath = None
+
+
+# События ijson, которые являются скалярным значением
+_SCALAR_EVENTS = frozenset(('null', 'boolean', 'integer', 'double', 'number', 'string'))
+
+# Ключи результата, которые строятся по инвентарю дисков, а не ищутся в ответе
+_RESULT_KEYS = frozenset((
+    'inventory', 'all_disks', 'free_disks', 'free_disks_obj', 'free_for_wc', 'free_disks_by_size',
+    'free_disks_by_size_and_type', 'disks_info',
+))
+
+
+def is_jsonpath(key: str) -> bool:
+    """Ключ keys_to_extract, начинающийся с '$', - выражение JSONPath (например "$.nodes[*].name")"""
+    return key.startswith('$')
+
+
+@functools.lru_cache(maxsize=256)
+def compile_jsonpath(expression: str):
+    """Выражение JSONPath компилируется один раз на процесс"""
+    if parse_jsonpath is None:
+        raise ImportError(f"jsonpath-ng is required for JSONPath key '{expression}'")
+    return parse_jsonpath(expression)
 
 
 class TestExtractor:
     """Cluster information extractor"""
 
-    def extract_cluster_info(self, data: dict, keys_to_extract: List[str]) -> Dict:
+    def extract_cluster_info(self, data: dict, keys_to_extract: List[str],
+                             inventory: Optional[DiskInventory] = None) -> Dict:
+        """
+        Args:
+            keys_to_extract: Имена ключей - их значения собираются на любой глубине обходом всего ответа
+                (кроме словарей `disks`), или выражения JSONPath ("$.nodes[*].name") - значения
+                находятся по пути без обхода остального документа.
+            inventory: Готовый инвентарь дисков этого ответа (снимок ClusterTools) -
+                словари `disks` тогда не разбираются, собираются только значения keys_to_extract.
+        """
+        keys = [key for key in keys_to_extract if not is_jsonpath(key)]
+        extracted = {key: [] for key in keys}
+        disk_info = self._new_disk_info() if inventory is None else None
+
+        # Обход нужен, чтобы найти диски или искомые ключи; ключи результата (disks_info...) в ответе не ищем
+        if disk_info is not None or any(key not in _RESULT_KEYS for key in keys):
+            self._process_cluster_data(data, extracted, disk_info)
+
+        for key in keys_to_extract:
+            if is_jsonpath(key):
+                extracted[key] = [match.value for match in compile_jsonpath(key).find(data)]
+        return self._build_result(extracted, disk_info if inventory is None else inventory)
+
+    @classmethod
+    def find_disks(cls, data) -> List[Dict[str, dict]]:
+        """Словари `disks` ответа clusterInfo (по одному на полку/ноду) в порядке обхода"""
+        found = []
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if key == "disks" and isinstance(value, dict):
+                    found.append(value)
+                elif isinstance(value, (dict, list)):
+                    found.extend(cls.find_disks(value))
+        elif isinstance(data, list):
+            for item in data:
+                found.extend(cls.find_disks(item))
+        return found
+
+    def extract_cluster_info_stream(self, chunks: Iterable[bytes], keys_to_extract: List[str]) -> Dict:
+        """
+        Потоковое извлечение информации о кластере из тела ответа по частям.
+
+        Тело /nodes/clusterInfo не разбирается целиком: в память собираются только словари `disks`
+        и значения запрошенных ключей, остальные ветки документа пропускаются на уровне событий парсера.
+        Результат совпадает с extract_cluster_info.
+        Требует пакет ijson, без него тело буферизуется и разбирается обычным json.
+
+        Args:
+            chunks: Части тела ответа (например, response.iter_bytes()).
+            keys_to_extract: Ключи, значения которых нужно собрать.
+        """
+        if ijson is None:
+            logger.warning("ijson is not installed, clusterInfo is parsed without streaming")
+            return self.extract_cluster_info(json.loads(b''.join(chunks)), keys_to_extract)
+
+        paths = [key for key in keys_to_extract if is_jsonpath(key)]
+        if paths:
+            raise ValueError(f"JSONPath keys are not supported in streaming mode: {paths}")
+
         extracted = {key: [] for key in keys_to_extract}
-        disk_info = {
-            'all_disks': set(),
-            'free_disks': set(),
-            'free_disks_obj': set(),
-            'free_for_wc': set(),
-            'free_disks_by_size': {},
-            'free_disks_by_size_and_type': {},
-            'disks_info': {}
-        }
+        disk_info = self._new_disk_info()
+
+        events = ijson.sendable_list()
+        parser = ijson.basic_parse_coro(events, use_float=True)
+        state = _StreamState()
+
+        for chunk in chunks:
+            parser.send(chunk)
+            self._process_stream_events(events, state, extracted, disk_info)
+            del events[:]
+        parser.close()
+        self._process_stream_events(events, state, extracted, disk_info)
+
+        return self._build_result(extracted, disk_info)
+
+    def _process_stream_events(self, events, state, extracted, disk_info):
+        """
+        Обрабатывает порцию событий парсера.
+
+        Повторяет семантику _process_dict: значение ключа из keys_to_extract добавляется
+        в extracted (с сохранением порядка обхода), словарь `disks` передаётся в _process_disks,
+        а внутрь `disks` поиск ключей не продолжается.
+        """
+        captures = state.captures
+        for event, value in events:
+            if event == 'map_key':
+                for capture in captures:
+                    capture.builder.event(event, value)
+                state.last_key = value
+                continue
+
+            key, state.last_key = state.last_key, None
+            starts_container = event == 'start_map' or event == 'start_array'
+
+            # Значение ключа словаря начинается сразу после map_key
+            if key is not None and not state.inside_disks and (starts_container or event in _SCALAR_EVENTS):
+                is_disks = key == 'disks' and event == 'start_map'
+                slot = None
+                if key in extracted:
+                    extracted[key].append(None)
+                    slot = len(extracted[key]) - 1
+                if is_disks or slot is not None:
+                    captures.append(_Capture(key, state.depth, is_disks, slot))
+                    if is_disks:
+                        state.inside_disks += 1
+
+            for capture in captures:
+                capture.builder.event(event, value)
 
-        self._process_cluster_data(data, extracted, disk_info)
-        logger.info(f"Available free disks: {sorted(list(disk_info['free_disks']))}")
+            if starts_container:
+                state.depth += 1
+            elif event == 'end_map' or event == 'end_array':
+                state.depth -= 1
+
+            # Завершаем захваты, значение которых полностью собрано
+            # (пока значение-контейнер не закрыт, текущая глубина больше глубины его начала)
+            while captures and captures[-1].depth == state.depth:
+                capture = captures.pop()
+                if capture.slot is not None:
+                    extracted[capture.key][capture.slot] = capture.builder.value
+                if capture.is_disks:
+                    state.inside_disks -= 1
+                    self._process_disks(capture.builder.value, disk_info)
+
+    @staticmethod
+    def _new_disk_info() -> DiskInventory:
+        return DiskInventory()
+
+    @staticmethod
+    def _build_result(extracted, disk_info: DiskInventory) -> Dict:
+        free_disks = disk_info.free_disks()
+        logger.info(f"Available free disks: {len(free_disks)} of {len(disk_info)}")
 
         return {
             **extracted,
-            'all_disks': list(disk_info['all_disks']),
-            'free_disks': list(disk_info['free_disks']),
-            'free_disks_obj': list(disk_info['free_disks_obj']),
-            'free_for_wc': list(disk_info['free_for_wc']),
-            'free_disks_by_size': disk_info['free_disks_by_size'],
-            'free_disks_by_size_and_type': disk_info['free_disks_by_size_and_type'],
-            'disks_info': disk_info['disks_info']
+            'inventory': disk_info,
+            'all_disks': list(disk_info),
+            'free_disks': free_disks,
+            # Раньше отдельное множество с теми же именами - оставлено для совместимости
+            'free_disks_obj': free_disks,
+            'free_for_wc': disk_info.free_for_wc(),
+            'free_disks_by_size': disk_info.free_by_size(),
+            'free_disks_by_size_and_type': disk_info.free_groups(),
+            # Записи DiskRecord читаются как словари: disks_info[disk_id]['size']
+            'disks_info': disk_info
         }
 
     def _process_cluster_data(self, data, extracted, disk_info):
@@ -52,7 +209,7 @@ class TestExtractor:
             Args:
                 data (dict): Словарь данных для обработки.
                 extracted (dict): Словарь для хранения извлеченной информации.
-                disk_info (dict): Словарь для хранения информации о дисках.
+                disk_info (DiskInventory): Инвентарь, в который добавляются диски (None - диски пропускаются).
 
             Returns:
                 None
@@ -62,73 +219,39 @@ class TestExtractor:
                 extracted[key].append(value)
 
             if key == "disks" and isinstance(value, dict):
-                self._process_disks(value, disk_info)
+                if disk_info is not None:
+                    self._process_disks(value, disk_info)
                 continue
 
             if isinstance(value, (dict, list)):
                 self._process_cluster_data(value, extracted, disk_info)
 
-    def _process_disks(self, disks, disk_info):
-        """Process and categorize disks from cluster information"""
-
-        # logger.info("\n=== Processing Cluster Disks ===")
-
-        for disk_name, disk_data in disks.items():
-            # logger.info(f"\nProcessing disk: {disk_name}")
-            # logger.info(f"Full disk data: {disk_data}")
-
-            disk_info['all_disks'].add(disk_name)
-
-            # Save complete disk information
-            disk_info['disks_info'][disk_name] = {
-                'type': disk_data.get('type'),
-                'size': disk_data.get('size'),
-                'state': disk_data.get('state'),
-                'model': disk_data.get('model'),
-                'vendor': disk_data.get('vendor'),
-                'serial': disk_data.get('serial'),
-                'dev_name': disk_data.get('dev_name'),
-                'rotational': disk_data.get('rotational'),
-                'bus': disk_data.get('bus'),
-                'partition_count': disk_data.get('partition_count'),
-                'partitions': disk_data.get('partitions', []),
-                'used_as_wc': disk_data.get('used_as_wc'),
-                'rdcache': disk_data.get('rdcache'),
-                'spare': disk_data.get('spare'),
-                'pools': disk_data.get('pools', []),
-                'damaged': disk_data.get('damaged'),
-                'removed': disk_data.get('removed')
-            }
-
-            size = disk_data.get("size")
-            disk_type = disk_data.get("type")
-            pools = disk_data.get("pools", [])
-            used_as_wc = disk_data.get("used_as_wc", 0)
-
-            # Log disk status
-            # if pools:
-            #     logger.info(f"Disk {disk_name} is used in pools: {pools}")
-            # if used_as_wc:
-            #     logger.info(f"Disk {disk_name} is used as write cache")
-
-            # Process free disks
-            if not pools and used_as_wc == 0:
-                # logger.info(f"Disk {disk_name} is free")
-                disk_info['free_disks'].add(disk_name)
-                disk_info['free_disks_obj'].add(disk_name)  # Add full disk object
-                if size:
-                    disk_info['free_disks_by_size'].setdefault(size, []).append(disk_name)
-                    if disk_type:
-                        key = (size, disk_type)
-                        disk_info['free_disks_by_size_and_type'].setdefault(key, []).append(disk_name)
-
-            # Process write cache disks
-            if used_as_wc == 1:
-                # logger.info(f"Disk {disk_name} is available for write cache")
-                disk_info['free_for_wc'].add(disk_name)
-
-        # Log final statistics
-        # logger.info("\n=== Disk Processing Summary ===")
-        # logger.info(f"Total disks found: {len(disk_info['all_disks'])}")
-        # logger.info(f"Free disks: {len(disk_info['free_disks'])}")
-        # logger.info(f"Write cache available: {len(disk_info['free_for_wc'])}")
+    def _process_disks(self, disks, disk_info: DiskInventory):
+        """Добавляет диски из clusterInfo в инвентарь: индексы свободных дисков и дисков для write cache
+        обновляются вместе с записями"""
+        disk_info.update(disks)
+
+
+class _StreamState:
+    """Состояние потокового разбора между порциями данных"""
+
+    __slots__ = ('depth', 'last_key', 'inside_disks', 'captures')
+
+    def __init__(self):
+        self.depth = 0
+        self.last_key = None
+        self.inside_disks = 0
+        self.captures: List[_Capture] = []
+
+
+class _Capture:
+    """Собираемое значение ключа: сборщик объекта и глубина, на которой оно началось"""
+
+    __slots__ = ('key', 'depth', 'is_disks', 'slot', 'builder')
+
+    def __init__(self, key, depth, is_disks, slot):
+        self.key = key
+        self.depth = depth
+        self.is_disks = is_disks
+        self.slot = slot
+        self.builder = ijson.ObjectBuilder()
@@ -7,6 +7,17 @@ class Generates:
         Класс для генерации данных.
     """
 
+    # Собственный генератор, чтобы seed() не влиял на модуль random у остального кода
+    _random = random.Random()
+
+    @staticmethod
+    def seed(value):
+        """
+            Инициализирует генератор, чтобы последовательность строк была воспроизводимой
+            (используется для режима кассет: одинаковые имена пулов при записи и воспроизведении).
+        """
+        Generates._random.seed(value)
+
     # Функция генерирует рандомную латинскую строку
     @staticmethod
     def random_string(length=None):
@@ -27,14 +38,14 @@ class Generates:
                 ValueError: Если указанная длина меньше 2 или больше 100.
         """
         if length is None:
-            length = random.randint(2, 100)  # Генерируем случайную длину от 2 до 100
+            length = Generates._random.randint(2, 100)  # Генерируем случайную длину от 2 до 100
         else:
             if length < 2 or length > 100:
                 raise ValueError("Length must be between 2 and 100")
 
         # Генерируем строку из латинских букв (как верхнего, так и нижнего регистра)
         letters = string.ascii_letters  # 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
-        return ''.join(random.choice(letters) for _ in range(length))
+        return ''.join(Generates._random.choice(letters) for _ in range(length))
 
 # Пример использования
 if __name__ == "__main__":
@@ -1,22 +1,70 @@
 from framework.api.core.logger import logger
+import asyncio
+import inspect
+import os
+import random
 import time
 import functools
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Optional, Tuple
+import httpx
 
 
 def disk_operation_with_retry(max_retries=3, delay=5):
-    """Decorator for disk operations requiring retries"""
+    """Decorator for disk operations requiring retries.
+    Работает как с обычными функциями, так и с корутинами (async tools)."""
 
     def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            context = next((arg for arg in args
-                            if hasattr(arg, '_context')), None)
+        def get_context(args):
+            return next((arg for arg in args
+                         if hasattr(arg, '_context')), None)
 
+        def is_negative_test(context):
             # Check for negative test marker
-            is_negative = (context and context._context.request.node
-                           .get_closest_marker('nc') is not None)
+            return bool(context and context._context.request.node
+                        .get_closest_marker('nc') is not None)
+
+        def log_failure(attempts, error):
+            logger.info(f"Attempt {attempts} failed: {str(error)}. "
+                        f"Retrying in {delay} seconds...")
+
+        def after_delay(context):
+            # Неудача могла быть из-за устаревшего снимка clusterInfo: следующая попытка запросит его заново
+            if context:
+                context._context.tools_manager.cluster.invalidate()
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                context = get_context(args)
+                if is_negative_test(context):
+                    return await func(*args, **kwargs)
+
+                attempts = 0
+                last_error = None
+
+                while attempts < max_retries:
+                    try:
+                        return await func(*args, **kwargs)
+                    except ValueError as e:
+                        last_error = e
+                        attempts += 1
+                        if attempts < max_retries:
+                            log_failure(attempts, e)
+                            await asyncio.sleep(delay)
+                            after_delay(context)
+
+                raise ValueError(f"Operation failed after {max_retries} attempts. "
+                                 f"Last error: {last_error}")
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            context = get_context(args)
 
-            if is_negative:
+            if is_negative_test(context):
                 return func(*args, **kwargs)
 
             attempts = 0
@@ -29,11 +77,9 @@ def disk_operation_with_retry(max_retries=3, delay=5):
                     last_error = e
                     attempts += 1
                     if attempts < max_retries:
-                        logger.info(f"Attempt {attempts} failed: {str(e)}. "
-                                    f"Retrying in {delay} seconds...")
+                        log_failure(attempts, e)
                         time.sleep(delay)
-                        if context:
-                            context._context.tools_manager.cluster.update_cluster_info()
+                        after_delay(context)
 
             raise ValueError(f"Operation failed after {max_retries} attempts. "
                              f"Last error: {last_error}")
@@ -43,3 +89,81 @@ def disk_operation_with_retry(max_retries=3, delay=5):
     return decorator
 
 
+@dataclass
+class RetryPolicy:
+    """
+    Повтор HTTP-запросов внутри клиента (APIClient.handle_http).
+
+    Повторяются:
+    - ответы с кодами retry_statuses (429 и 5xx) - только для идемпотентных методов;
+    - ошибки соединения (ConnectError/ConnectTimeout) - для любых методов, запрос до сервера не дошёл;
+    - прочие сетевые ошибки (обрыв, таймаут чтения) - только для идемпотентных методов.
+
+    Пауза - экспоненциальная с полным джиттером: random(0, min(backoff_max, backoff * 2^попытка)).
+    Заголовок Retry-After имеет приоритет. Все повторы укладываются в общий бюджет budget секунд:
+    если следующая пауза в него не помещается, возвращается последний ответ/ошибка.
+
+    Настройки (.env): API_RETRY_ATTEMPTS (1 - без повторов), API_RETRY_BACKOFF, API_RETRY_BACKOFF_MAX, API_RETRY_BUDGET.
+    """
+    max_attempts: int = 3
+    backoff: float = 0.2
+    backoff_max: float = 5.0
+    budget: float = 15.0
+    retry_statuses: FrozenSet[int] = frozenset((429, 500, 502, 503, 504))
+    idempotent_methods: Tuple[str, ...] = ('GET', 'PUT', 'DELETE')
+
+    @classmethod
+    def from_env(cls) -> 'RetryPolicy':
+        return cls(
+            max_attempts=int(os.getenv('API_RETRY_ATTEMPTS', cls.max_attempts)),
+            backoff=float(os.getenv('API_RETRY_BACKOFF', cls.backoff)),
+            backoff_max=float(os.getenv('API_RETRY_BACKOFF_MAX', cls.backoff_max)),
+            budget=float(os.getenv('API_RETRY_BUDGET', cls.budget)),
+        )
+
+    def deadline(self) -> float:
+        """Момент (time.monotonic), после которого повторов больше не будет"""
+        return time.monotonic() + self.budget
+
+    def next_delay(self, method: str, attempt: int, deadline: float,
+                   response: Optional[httpx.Response] = None,
+                   error: Optional[Exception] = None) -> Optional[float]:
+        """
+        Пауза перед следующей попыткой или None, если повторять не нужно.
+
+        :param attempt: Номер завершившейся попытки, начиная с 1.
+        :param deadline: Значение deadline(), полученное перед первой попыткой.
+        """
+        if attempt >= self.max_attempts or not self._is_retryable(method, response, error):
+            return None
+
+        delay = self._retry_after(response)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (attempt - 1)))
+
+        if time.monotonic() + delay > deadline:
+            return None
+        return delay
+
+    def _is_retryable(self, method: str, response: Optional[httpx.Response], error: Optional[Exception]) -> bool:
+        if error is not None:
+            if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+                return True
+            return isinstance(error, httpx.TransportError) and method in self.idempotent_methods
+        return response is not None and response.status_code in self.retry_statuses \
+            and method in self.idempotent_methods
+
+    @staticmethod
+    def _retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+        """Retry-After в секундах или в виде HTTP даты"""
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,42 @@
+import argparse
+import os
+import time
+from .server import node_urls, start_cluster
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m framework.emulator',
+        description='Локальный эмулятор API СХД для прогона и нагрузочного тестирования фреймворка без кластера'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.getenv('EMULATOR_PORT', 8000)),
+                        help='порт NODE_1, остальные ноды слушают следующие порты')
+    parser.add_argument('--nodes', type=int, default=2)
+    parser.add_argument('--disks', type=int, default=int(os.getenv('EMULATOR_DISKS', 64)))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=float(os.getenv('EMULATOR_LATENCY', 0)),
+                        help='задержка ответа, секунды')
+    parser.add_argument('--jitter', type=float, default=0.0, help='случайная добавка к задержке, секунды')
+    parser.add_argument('--access-ttl', type=float, default=180, help='время жизни jwt_access, секунды')
+    args = parser.parse_args()
+
+    servers = start_cluster(
+        nodes=args.nodes, disk_count=args.disks, host=args.host, port=args.port, seed=args.seed,
+        latency=args.latency, jitter=args.jitter, access_ttl=args.access_ttl
+    )
+
+    print("Emulator is running. Use in .env:")
+    for node, url in node_urls(servers).items():
+        print(f"{node}={url}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+import json
+import random
+import re
+import secrets
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from framework.api.resources.endpoints import ApiEndpoints
+from .cluster import EmulatedCluster, EmulatorError
+
+
+""" HTTP API одной ноды эмулятора без привязки к транспорту.
+
+    EmulatorApp.handle принимает метод, путь, заголовки и тело и возвращает EmulatorResponse.
+    Поверх него работают TCP сервер (server.py) и транспорт httpx внутри процесса.
+    Маршруты строятся по шаблонам ApiEndpoints, поэтому эмулятор и клиент не расходятся в путях.
+"""
+
+DEFAULT_USERS = {
+    'admin': ('123456', 'admin'),
+    'user': ('123456', 'user'),
+}
+
+
+@dataclass
+class EmulatorResponse:
+    status_code: int
+    body: bytes = b''
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class _Session:
+    sid: str
+    login: str
+    role: str
+    remember: bool
+    access_token: str = ''
+    refresh_token: str = ''
+    access_expires: float = 0.0
+    refresh_expires: float = 0.0
+
+
+class EmulatorApp:
+    """
+    API одной ноды: авторизация со своими сессиями и общий для нод EmulatedCluster.
+
+    Сессия, открытая на одной ноде, другой ноде неизвестна: logout на ней вернёт 500, как на реальном кластере.
+    Повторный logout уже закрытой сессии на той же ноде успешен.
+
+    Example:
+        cluster = EmulatedCluster(disk_count=10000)
+        apps = [EmulatorApp(cluster, node=1), EmulatorApp(cluster, node=2)]
+        response = apps[0].handle("GET", "/api/v2.0/health")
+    """
+
+    def __init__(self, cluster: EmulatedCluster, node: int = 1, prefix: str = '/api/v2.0',
+                 latency: float = 0.0, jitter: float = 0.0,
+                 access_ttl: float = 180, refresh_ttl: float = 86400,
+                 users: Optional[Dict[str, Tuple[str, str]]] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        :param latency: (float): Задержка ответа в секундах (выдерживает транспорт, см. delay()).
+        :param jitter: (float): Случайная добавка к задержке, от 0 до jitter секунд.
+        :param access_ttl: (float): Время жизни jwt_access в секундах.
+        :param refresh_ttl: (float): Время жизни jwt_refresh в секундах.
+        :param users: (dict): login -> (password, role).
+        """
+        self.cluster = cluster
+        self.node = node
+        self.prefix = prefix.rstrip('/')
+        self.latency = latency
+        self.jitter = jitter
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.users = users or DEFAULT_USERS
+        self._clock = clock
+        self._sessions: Dict[str, _Session] = {}
+        self._by_access: Dict[str, _Session] = {}
+        self._by_refresh: Dict[str, _Session] = {}
+        # Все когда-либо выданные этой нодой sid: повторный logout не ошибка
+        self._issued_sids = set()
+        self._lock = Lock()
+        self._routes = self._build_routes()
+
+    def delay(self) -> float:
+        """Сколько транспорт должен выждать перед ответом"""
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def handle(self, method: str, target: str, headers: Optional[Mapping[str, str]] = None,
+               body: bytes = b'') -> EmulatorResponse:
+        """Обрабатывает запрос. target - путь с query строкой, headers - заголовки (регистр не важен)"""
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        url = urlsplit(target)
+        path = unquote(url.path)
+        if self.prefix and path.startswith(self.prefix):
+            path = path[len(self.prefix):] or '/'
+
+        template = ApiEndpoints.template_for(path)
+        handler = self._routes.get((method.upper(), template))
+        if handler is None:
+            known = any(route_template == template for _, route_template in self._routes)
+            return self._error(405 if known else 404, f"No route for {method} {path}")
+
+        try:
+            payload = json.loads(body) if body else {}
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            cookies = _parse_cookies(headers.get('cookie', ''))
+            if template not in _PUBLIC_ENDPOINTS:
+                self._authorize(cookies)
+            if method.upper() == 'GET' and template in _VERSIONED_ENDPOINTS:
+                return self._conditional(headers.get('if-none-match'), lambda: handler(
+                    payload=payload, query=query, cookies=cookies, **_path_params(template, path)
+                ))
+            return handler(payload=payload, query=query, cookies=cookies, **_path_params(template, path))
+        except EmulatorError as exc:
+            return self._error(exc.status_code, exc.message)
+        except (ValueError, TypeError, KeyError) as exc:
+            return self._error(400, f"Bad request: {exc}")
+
+    def _conditional(self, if_none_match: Optional[str],
+                     handler: Callable[[], EmulatorResponse]) -> EmulatorResponse:
+        """
+        ETag по версии кластера: пока пулы и диски не менялись, на If-None-Match отвечаем 304 без тела.
+        Версия берётся до построения ответа - при изменении во время запроса клиент просто получит 200 позже.
+        """
+        etag = f'"{self.cluster.version}"'
+        if if_none_match == etag:
+            return EmulatorResponse(304, headers=[('etag', etag)])
+        response = handler()
+        if response.status_code == 200:
+            response.headers.append(('etag', etag))
+        return response
+
+    # --- Авторизация ---
+
+    def _login(self, payload, **_):
+        user = self.users.get(payload.get('login'))
+        if user is None or user[0] != payload.get('password'):
+            raise EmulatorError(401, "Invalid credentials")
+
+        session = _Session(secrets.token_hex(16), payload['login'], user[1], bool(payload.get('remember')))
+        with self._lock:
+            self._sessions[session.sid] = session
+            self._issued_sids.add(session.sid)
+            self._issue_tokens(session)
+        return self._json(200, {
+            'sid': session.sid,
+            'data': {'login': session.login, 'role': session.role, 'remember': session.remember},
+            **self._expiration_dates(session),
+        }, self._session_cookies(session))
+
+    def _refresh_tokens(self, cookies, **_):
+        with self._lock:
+            session = self._by_refresh.get(cookies.get('jwt_refresh', ''))
+            if session is None or session.refresh_expires <= self._clock():
+                raise EmulatorError(401, "Refresh token is invalid or expired")
+            self._issue_tokens(session)
+        return self._json(200, self._expiration_dates(session), self._session_cookies(session))
+
+    def _logout(self, cookies, **_):
+        with self._lock:
+            sid = cookies.get('BAUMSID', '')
+            if sid not in self._issued_sids:
+                raise EmulatorError(500, "Session not found")
+            session = self._sessions.pop(sid, None)
+            if session is not None:
+                self._by_access.pop(session.access_token, None)
+                self._by_refresh.pop(session.refresh_token, None)
+        return self._json(200, {'success': True})
+
+    def _authorize(self, cookies):
+        session = self._by_access.get(cookies.get('jwt_access', ''))
+        if session is None or session.access_expires <= self._clock():
+            raise EmulatorError(401, "Unauthorized")
+
+    def _issue_tokens(self, session: _Session):
+        self._by_access.pop(session.access_token, None)
+        self._by_refresh.pop(session.refresh_token, None)
+        now = self._clock()
+        session.access_token = secrets.token_urlsafe(24)
+        session.refresh_token = secrets.token_urlsafe(24)
+        session.access_expires = now + self.access_ttl
+        session.refresh_expires = now + self.refresh_ttl
+        self._by_access[session.access_token] = session
+        self._by_refresh[session.refresh_token] = session
+
+    @staticmethod
+    def _expiration_dates(session: _Session) -> dict:
+        return {
+            'jwtAccessExpirationDate': _iso(session.access_expires),
+            'jwtRefreshExpirationDate': _iso(session.refresh_expires),
+        }
+
+    @staticmethod
+    def _session_cookies(session: _Session) -> List[Tuple[str, str]]:
+        # BAUMSID выставляется и при refresh: AuthTools собирает заголовок Cookie из последнего ответа
+        cookies = [
+            ('BAUMSID', session.sid), ('jwt_access', session.access_token), ('jwt_refresh', session.refresh_token)
+        ]
+        return [('set-cookie', f"{name}={value}; Path=/; HttpOnly") for name, value in cookies]
+
+    # --- Кластер и пулы ---
+
+    def _health(self, **_):
+        return self._json(200, {'status': 'ok', 'node': self.node})
+
+    def _cluster(self, **_):
+        return self._json(200, {'status': 'online', 'nodes': self.cluster.nodes, 'version': self.cluster.version})
+
+    def _cluster_info(self, **_):
+        return EmulatorResponse(200, self.cluster.cluster_info(), [('content-type', 'application/json')])
+
+    def _get_pools(self, **_):
+        return self._json(200, {'pools': self.cluster.list_pools()})
+
+    def _get_pool(self, pool_name, **_):
+        return self._json(200, self.cluster.get_pool(pool_name))
+
+    def _create_pool(self, pool_name, payload, **_):
+        return self._json(201, self.cluster.create_pool({**payload, 'name': payload.get('name') or pool_name}))
+
+    def _delete_pool(self, pool_name, **_):
+        self.cluster.delete_pool(pool_name)
+        return self._json(200, {})
+
+    def _expand_pool(self, pool_name, payload, **_):
+        self.cluster.expand_pool(pool_name, payload['disks'])
+        return self._json(200, self.cluster.get_pool(pool_name))
+
+    def _import_view(self, **_):
+        return self._json(200, {'pools': self.cluster.list_exported_pools()})
+
+    def _import_pool(self, pool_name, **_):
+        self.cluster.import_pool(pool_name)
+        return self._json(200, {})
+
+    def _export_pool(self, pool_name, **_):
+        self.cluster.export_pool(pool_name)
+        return self._json(200, {})
+
+    def _add_disks(self, role):
+        def handler(pool_name, payload, **_):
+            self.cluster.add_disks(pool_name, role, payload['disks'])
+            return self._json(200, self.cluster.get_pool(pool_name))
+        return handler
+
+    def _remove_disk(self, role):
+        def handler(pool_name, disk, **_):
+            self.cluster.remove_disks(pool_name, role, [disk])
+            return self._json(200, {})
+        return handler
+
+    def _remove_disks(self, pool_name, payload, query, **_):
+        # DELETE без тела: тип и диски можно передать query параметрами (?type=wrc&disks=a,b)
+        role = payload.get('type') or query['type']
+        disks = payload.get('disks') or query['disks'].split(',')
+        if role not in ('wrc', 'rdc', 'spare'):
+            raise EmulatorError(400, f"Unknown disk type: {role}")
+        self.cluster.remove_disks(pool_name, role, disks)
+        return self._json(200, {})
+
+    def _change_disk(self, pool_name, disk, payload, **_):
+        self.cluster.replace_disk(pool_name, disk, payload['disk'])
+        return self._json(200, self.cluster.get_pool(pool_name))
+
+    def _reserve(self, payload, **_):
+        self.cluster.reserve(payload['name'], int(payload['percentage']))
+        return self._json(200, {})
+
+    def _build_routes(self) -> Dict[Tuple[str, str], Callable]:
+        auth, cluster, pools = ApiEndpoints.Auth, ApiEndpoints.Cluster, ApiEndpoints.Pools
+        return {
+            ('POST', auth.LOGIN): self._login,
+            ('GET', auth.REFRESH_TOKENS): self._refresh_tokens,
+            ('POST', auth.LOGOUT): self._logout,
+            ('GET', cluster.HEALTH): self._health,
+            ('GET', cluster.BASE): self._cluster,
+            ('GET', cluster.STATUS): self._cluster,
+            ('GET', cluster.CLUSTER_INFO): self._cluster_info,
+            ('GET', pools.BASE): self._get_pools,
+            ('GET', pools.GET_POOL): self._get_pool,
+            ('POST', pools.CREATE_POOL): self._create_pool,
+            ('DELETE', pools.DELETE_POOL): self._delete_pool,
+            ('PUT', pools.EXPAND_POOL): self._expand_pool,
+            ('GET', pools.GET_IMPORT_POOLS): self._import_view,
+            ('POST', pools.IMPORT_POOL): self._import_pool,
+            ('POST', pools.EXPORT_POOL): self._export_pool,
+            ('POST', pools.ADD_WRC): self._add_disks('wrc'),
+            ('POST', pools.ADD_RDC): self._add_disks('rdc'),
+            ('POST', pools.ADD_SPARE): self._add_disks('spare'),
+            ('PUT', pools.CHANGE_DISK): self._change_disk,
+            ('DELETE', pools.DELETE_WRC): self._remove_disk('wrc'),
+            ('DELETE', pools.DELETE_RDC): self._remove_disk('rdc'),
+            ('DELETE', pools.DELETE_SPARE): self._remove_disk('spare'),
+            ('DELETE', pools.DELETE_DISKS): self._remove_disks,
+            ('PUT', pools.RESERV_POOL): self._reserve,
+        }
+
+    # --- Ответы ---
+
+    @staticmethod
+    def _json(status_code: int, data, headers: Optional[List[Tuple[str, str]]] = None) -> EmulatorResponse:
+        return EmulatorResponse(
+            status_code,
+            json.dumps(data, separators=(',', ':')).encode(),
+            [('content-type', 'application/json')] + (headers or [])
+        )
+
+    def _error(self, status_code: int, message: str) -> EmulatorResponse:
+        return self._json(status_code, {'error': message})
+
+
+# Ответы, которые зависят только от состояния кластера: для них выдаётся ETag
+_VERSIONED_ENDPOINTS = frozenset((
+    ApiEndpoints.Cluster.CLUSTER_INFO, ApiEndpoints.Pools.BASE, ApiEndpoints.Pools.GET_POOL,
+    ApiEndpoints.Pools.GET_IMPORT_POOLS,
+))
+
+# Эндпоинты без проверки jwt_access
+_PUBLIC_ENDPOINTS = frozenset((
+    ApiEndpoints.Auth.LOGIN, ApiEndpoints.Auth.REFRESH_TOKENS, ApiEndpoints.Auth.LOGOUT, ApiEndpoints.Cluster.HEALTH,
+))
+
+
+def _path_params(template: str, path: str) -> Dict[str, str]:
+    names = re.findall(r'{(\w+)}', template)
+    if not names:
+        return {}
+    return dict(zip(names, _template_regex(template).fullmatch(path).groups()))
+
+
+_template_patterns: Dict[str, re.Pattern] = {}
+
+
+def _template_regex(template: str) -> re.Pattern:
+    pattern = _template_patterns.get(template)
+    if pattern is None:
+        pattern = _template_patterns[template] = re.compile(
+            re.sub(r'\\{\w+\\}', '([^/]+)', re.escape(template))
+        )
+    return pattern
+
+
+def _parse_cookies(header: str) -> Dict[str, str]:
+    cookies = {}
+    for part in header.split(';'):
+        name, _, value = part.strip().partition('=')
+        if name:
+            cookies[name] = value
+    return cookies
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
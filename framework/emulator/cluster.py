@@ -0,0 +1,482 @@
+import json
+import random
+import uuid
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+from framework.api.models.disk_models import DiskType
+
+
+""" Состояние эмулируемого кластера: диски и пулы в памяти.
+
+    Состояние общее для всех нод кластера (как общий дисковый массив), сессии у каждой ноды свои
+    (см. EmulatorApp). Рассчитано на десятки тысяч дисков:
+    - свободные диски индексируются по (размер, тип), подбор дисков для пула не перебирает весь кластер;
+    - JSON каждого диска кэшируется и пересобирается только после изменения диска,
+      тело /nodes/clusterInfo кэшируется целиком до следующего изменения состояния.
+"""
+
+GIB = 1024 ** 3
+
+# Профили дисков: тип, размер, вендор, модель, rpm, доля в кластере
+DISK_PROFILES = (
+    (DiskType.HDD, 4000 * GIB, "SEAGATE", "ST4000NM0025", 7200, 0.35),
+    (DiskType.HDD, 8000 * GIB, "HGST", "HUH721008AL5200", 7200, 0.25),
+    (DiskType.SSD, 480 * GIB, "SAMSUNG", "MZILT480HBHQ", 0, 0.15),
+    (DiskType.SSD, 960 * GIB, "SAMSUNG", "MZILT960HAHQ", 0, 0.15),
+    (DiskType.NVME, 1600 * GIB, "INTEL", "SSDPE2KE016T8", 0, 0.10),
+)
+
+# Минимальное число основных дисков для уровня RAID (raid7 - тройная чётность, как raidz3)
+RAID_MIN_DISKS = {'raid0': 1, 'raid1': 2, 'raid5': 3, 'raid6': 4, 'raid7': 5, 'raid10': 4}
+
+# Значения used_as_wc: диск может быть кэшем на запись / используется как кэш на запись
+WC_CAPABLE = 1
+WC_USED = 2
+
+# Слотов в одной дисковой полке
+ENCLOSURE_SLOTS = 60
+
+
+class EmulatorError(Exception):
+    """Ошибка запроса к эмулятору, превращается в HTTP ответ с кодом status_code"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def generate_disks(count: int, seed: int = 0, nodes: int = 2) -> Dict[str, dict]:
+    """
+    Генерирует детерминированный набор дисков в формате DiskInfo.
+
+    Половина SSD помечается как пригодные для кэша на запись (used_as_wc=1).
+    """
+    rnd = random.Random(seed)
+    weights = [profile[-1] for profile in DISK_PROFILES]
+    disks = {}
+    for index in range(count):
+        disk_type, size, vendor, model, rpm, _ = rnd.choices(DISK_PROFILES, weights)[0]
+        serial = f"{vendor[:2]}{rnd.getrandbits(40):010X}"
+        name = f"scsi-35000c5{index:08x}"
+        disks[name] = {
+            'name': name,
+            'active': 1,
+            'state': 'ACTIVE',
+            'ioerr_cnt': 0,
+            'dev_name': f"/dev/sd{_device_suffix(index)}",
+            'serial': serial,
+            'vendor': vendor,
+            'model': model,
+            'bus': 'nvme' if disk_type == DiskType.NVME else 'sas',
+            'rotational': 1 if disk_type == DiskType.HDD else 0,
+            'size': size,
+            'type': disk_type.value,
+            'status': 'online',
+            'rdcache': False,
+            'spare': False,
+            'pools': [],
+            'removed': False,
+            'damaged': False,
+            'nodes_view': list(range(1, nodes + 1)),
+            'logical_block_size': 512,
+            'physical_block_size': 4096,
+            'hw_sector_size': 512,
+            'in_rack': 1,
+            'rpm': rpm,
+            'target_port': f"0x5000c5{index:010x}",
+            'cache_size': 0,
+            'used_hb': 0,
+            'used_as_wc': WC_CAPABLE if disk_type == DiskType.SSD and index % 2 else 0,
+            'led_state': 0,
+            'enclosure_id': f"enc{index // ENCLOSURE_SLOTS:04d}",
+            'expander_sas_address': f"0x500605b0{index // ENCLOSURE_SLOTS:08x}",
+            'slot': index % ENCLOSURE_SLOTS,
+            'path_count': 2,
+            'partition_count': 0,
+            'partitions': [],
+        }
+    return disks
+
+
+def _device_suffix(index: int) -> str:
+    """0 -> a, 25 -> z, 26 -> aa ... как имена /dev/sdX"""
+    letters = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord('a') + rest) + letters
+    return letters
+
+
+class EmulatedCluster:
+    """
+    Диски и пулы кластера. Все публичные методы потокобезопасны.
+
+    Example:
+        cluster = EmulatedCluster(disk_count=20000)
+        cluster.create_pool({"name": "pool1", "mainDisksCount": 2, "auto_configure": True})
+    """
+
+    def __init__(self, disk_count: int = 64, nodes: int = 2, seed: int = 0,
+                 disks: Optional[Dict[str, dict]] = None):
+        self.nodes = nodes
+        self._lock = RLock()
+        self._disks: Dict[str, dict] = disks if disks is not None else generate_disks(disk_count, seed, nodes)
+        self._pools: Dict[str, dict] = {}
+        self._exported: Dict[str, dict] = {}
+        # Свободные диски по (размер, тип); dict используется как упорядоченное множество
+        self._free: Dict[Tuple[int, str], Dict[str, None]] = {}
+        self._free_for_wc: Dict[str, None] = {}
+        self._disk_json: Dict[str, str] = {}
+        self._cluster_info: Optional[bytes] = None
+        self.version = 0
+
+        for name, disk in self._disks.items():
+            self._index_disk(name, disk)
+
+    # --- Чтение состояния ---
+
+    def cluster_info(self) -> bytes:
+        """Тело ответа /nodes/clusterInfo: ноды и полки с картой дисков"""
+        with self._lock:
+            if self._cluster_info is None:
+                self._cluster_info = self._render_cluster_info()
+            return self._cluster_info
+
+    def list_pools(self) -> List[dict]:
+        with self._lock:
+            return [self._pool_view(pool) for pool in self._pools.values()]
+
+    def list_exported_pools(self) -> List[dict]:
+        with self._lock:
+            return [self._pool_view(pool) for pool in self._exported.values()]
+
+    def get_pool(self, name: str) -> dict:
+        with self._lock:
+            return self._pool_view(self._require_pool(name))
+
+    def disk(self, name: str) -> dict:
+        with self._lock:
+            if name not in self._disks:
+                raise EmulatorError(404, f"Disk {name} not found")
+            return dict(self._disks[name])
+
+    def free_disk_count(self) -> int:
+        with self._lock:
+            return sum(len(disks) for disks in self._free.values())
+
+    # --- Изменение состояния ---
+
+    def create_pool(self, request: dict) -> dict:
+        """Создаёт пул по контракту PoolConfig.prepare_contract (auto или manual режим)"""
+        name = request.get('name')
+        if not name:
+            raise EmulatorError(400, "Pool name is required")
+
+        with self._lock:
+            if name in self._pools or name in self._exported:
+                raise EmulatorError(409, f"Pool {name} already exists")
+
+            raid = request.get('raid_type', 'raid1')
+            if raid not in RAID_MIN_DISKS:
+                raise EmulatorError(400, f"Unsupported raid type: {raid}")
+
+            if request.get('auto_configure', True):
+                roles = self._select_auto(request)
+            else:
+                roles = self._select_manual(request)
+
+            main = roles['main']
+            groups = request.get('mainGroupsCount') or 1
+            if len(main) < RAID_MIN_DISKS[raid] * groups or len(main) % groups:
+                raise EmulatorError(
+                    400, f"{raid} requires at least {RAID_MIN_DISKS[raid]} disks per group, got {len(main)}"
+                )
+
+            pool = {
+                'name': name,
+                'type': 'lvm' if request.get('perfomance_type') == 0 else 'zfs',
+                'guid': str(uuid.uuid4().int)[:19],
+                'raid': raid,
+                'mode': request.get('perfomance_type', 1),
+                'node': request.get('node') or 1,
+                'priority': request.get('priority', 0),
+                'reserved': request.get('percentage', 0),
+                'groups': groups,
+                'disks': [],
+                'wrcache': [],
+                'rdcache': [],
+                'spare': [],
+            }
+            self._pools[name] = pool
+            for role, disks in roles.items():
+                self._attach(pool, role, disks)
+            self._changed()
+            return {'name': name, 'status': 'created'}
+
+    def delete_pool(self, name: str):
+        with self._lock:
+            pool = self._require_pool(name)
+            self._release(pool, pool['disks'] + pool['wrcache'] + pool['rdcache'] + pool['spare'])
+            del self._pools[name]
+            self._changed()
+
+    def expand_pool(self, name: str, disks: List[str]):
+        """Расширение пула дисками того же размера и типа"""
+        with self._lock:
+            pool = self._require_pool(name)
+            self._check_free(disks)
+            sample = self._disks[pool['disks'][0]]
+            for disk in disks:
+                if (self._disks[disk]['size'], self._disks[disk]['type']) != (sample['size'], sample['type']):
+                    raise EmulatorError(400, f"Disk {disk} does not match pool disks size/type")
+            self._attach(pool, 'main', disks)
+            pool['groups'] += 1
+            self._changed()
+
+    def add_disks(self, name: str, role: str, disks: List[str]):
+        """Добавляет кэш на запись/чтение или запасные диски (role: wrc, rdc, spare)"""
+        with self._lock:
+            pool = self._require_pool(name)
+            if role == 'wrc':
+                self._check_wc(disks)
+            else:
+                self._check_free(disks)
+            self._attach(pool, role, disks)
+            self._changed()
+
+    def remove_disks(self, name: str, role: str, disks: List[str]):
+        with self._lock:
+            pool = self._require_pool(name)
+            field = _ROLE_FIELDS[role]
+            missing = [disk for disk in disks if disk not in pool[field]]
+            if missing:
+                raise EmulatorError(404, f"Disks {missing} are not {role} disks of pool {name}")
+            self._release(pool, disks)
+            self._changed()
+
+    def replace_disk(self, name: str, old_disk: str, new_disk: str):
+        with self._lock:
+            pool = self._require_pool(name)
+            if old_disk not in pool['disks']:
+                raise EmulatorError(404, f"Disk {old_disk} is not in pool {name}")
+            self._check_free([new_disk])
+            self._release(pool, [old_disk])
+            self._attach(pool, 'main', [new_disk])
+            self._changed()
+
+    def export_pool(self, name: str):
+        with self._lock:
+            self._exported[name] = self._pools.pop(self._require_pool(name)['name'])
+            self._changed()
+
+    def import_pool(self, name: str):
+        with self._lock:
+            if name not in self._exported:
+                raise EmulatorError(404, f"Pool {name} not found for import")
+            self._pools[name] = self._exported.pop(name)
+            self._changed()
+
+    def reserve(self, name: str, percentage: int):
+        with self._lock:
+            if not 0 <= percentage <= 100:
+                raise EmulatorError(400, f"Reservation must be between 0 and 100, got {percentage}")
+            self._require_pool(name)['reserved'] = percentage
+            self._changed()
+
+    # --- Подбор дисков ---
+
+    def _select_auto(self, request: dict) -> Dict[str, List[str]]:
+        taken = set()
+        main = self._take_group(request.get('mainDisksCount') or 0, request.get('mainDisksType'),
+                                request.get('mainDisksSize'), taken, ssd_only=request.get('perfomance_type') == 0)
+        main_disk = self._disks[main[0]] if main else {}
+        spare = self._take_group(request.get('spareCacheDiskCount') or 0,
+                                 request.get('spareDiskType') or main_disk.get('type'),
+                                 request.get('spareDiskSize') or main_disk.get('size'), taken)
+        wrc = self._take_wc(request.get('wrCacheDiskCount') or 0, request.get('wrcDiskSize'), taken)
+        rdc = self._take_group(request.get('rdCacheDiskCount') or 0, request.get('rdcDiskType') or DiskType.SSD.value,
+                               request.get('rdcDiskSize'), taken)
+        return {'main': main, 'spare': spare, 'wrc': wrc, 'rdc': rdc}
+
+    def _select_manual(self, request: dict) -> Dict[str, List[str]]:
+        roles = {}
+        for role, key in (('main', 'mainDisks'), ('spare', 'spareDisks'), ('wrc', 'wrcDisks'), ('rdc', 'rdcDisks')):
+            disks = request.get(key) or []
+            if isinstance(disks, int):
+                raise EmulatorError(400, f"{key} must be a list of disk names in manual mode")
+            if role == 'wrc':
+                self._check_wc(disks)
+            else:
+                self._check_free(disks)
+            roles[role] = list(disks)
+
+        selected = [disk for disks in roles.values() for disk in disks]
+        if len(selected) != len(set(selected)):
+            raise EmulatorError(400, "The same disk is selected for several roles")
+        return roles
+
+    def _take_group(self, count: int, disk_type: Optional[str], size: Optional[int], taken: set,
+                    ssd_only: bool = False) -> List[str]:
+        """Первые count свободных дисков одной группы (размер, тип), как _select_optimal_group"""
+        if not count:
+            return []
+        if ssd_only:
+            disk_type = DiskType.SSD.value
+        elif isinstance(disk_type, DiskType):
+            disk_type = disk_type.value
+        for (group_size, group_type), disks in sorted(self._free.items()):
+            if (size and group_size != size) or (disk_type and group_type != disk_type):
+                continue
+            chosen = _first_free(disks, count, taken)
+            if chosen:
+                taken.update(chosen)
+                return chosen
+        raise EmulatorError(400, f"Insufficient free disks: type={disk_type}, size={size}, count={count}")
+
+    def _take_wc(self, count: int, size: Optional[int], taken: set) -> List[str]:
+        if not count:
+            return []
+        by_size: Dict[int, List[str]] = {}
+        for disk in self._free_for_wc:
+            if disk not in taken and (not size or self._disks[disk]['size'] == size):
+                by_size.setdefault(self._disks[disk]['size'], []).append(disk)
+        for disks in (by_size[key] for key in sorted(by_size)):
+            if len(disks) >= count:
+                taken.update(disks[:count])
+                return disks[:count]
+        raise EmulatorError(400, f"Insufficient write cache disks: size={size}, count={count}")
+
+    def _check_free(self, disks: Iterable[str]):
+        for disk in disks:
+            if disk not in self._disks:
+                raise EmulatorError(404, f"Disk {disk} not found")
+            info = self._disks[disk]
+            if disk not in self._free.get((info['size'], info['type']), ()):
+                raise EmulatorError(409, f"Disk {disk} is already in use")
+
+    def _check_wc(self, disks: Iterable[str]):
+        for disk in disks:
+            if disk not in self._disks:
+                raise EmulatorError(404, f"Disk {disk} not found")
+            if disk not in self._free_for_wc:
+                raise EmulatorError(409, f"Disk {disk} can not be used as write cache")
+
+    # --- Учёт дисков ---
+
+    def _attach(self, pool: dict, role: str, disks: List[str]):
+        pool[_ROLE_FIELDS[role]].extend(disks)
+        for name in disks:
+            disk = self._disks[name]
+            self._unindex_disk(name, disk)
+            disk['pools'] = [pool['name']]
+            if role == 'wrc':
+                disk['used_as_wc'] = WC_USED
+            elif role == 'rdc':
+                disk['rdcache'] = True
+            elif role == 'spare':
+                disk['spare'] = True
+            self._disk_json.pop(name, None)
+
+    def _release(self, pool: dict, disks: List[str]):
+        for name in disks:
+            for field in _ROLE_FIELDS.values():
+                if name in pool[field]:
+                    pool[field].remove(name)
+            disk = self._disks[name]
+            disk['pools'] = []
+            disk['rdcache'] = False
+            disk['spare'] = False
+            if disk['used_as_wc'] == WC_USED:
+                disk['used_as_wc'] = WC_CAPABLE
+            self._index_disk(name, disk)
+            self._disk_json.pop(name, None)
+
+    def _index_disk(self, name: str, disk: dict):
+        if disk['pools'] or disk['damaged'] or disk['removed']:
+            return
+        if disk['used_as_wc'] == WC_CAPABLE:
+            self._free_for_wc[name] = None
+        elif disk['used_as_wc'] == 0:
+            self._free.setdefault((disk['size'], disk['type']), {})[name] = None
+
+    def _unindex_disk(self, name: str, disk: dict):
+        self._free_for_wc.pop(name, None)
+        self._free.get((disk['size'], disk['type']), {}).pop(name, None)
+
+    def _changed(self):
+        self.version += 1
+        self._cluster_info = None
+
+    def _require_pool(self, name: str) -> dict:
+        if name not in self._pools:
+            raise EmulatorError(404, f"Pool {name} not found")
+        return self._pools[name]
+
+    # --- Представление ---
+
+    def _render_cluster_info(self) -> bytes:
+        enclosures: Dict[str, List[str]] = {}
+        for name, disk in self._disks.items():
+            enclosures.setdefault(disk['enclosure_id'], []).append(name)
+
+        parts = []
+        for enclosure_id, names in enclosures.items():
+            disks_json = ','.join(f"{json.dumps(name)}:{self._disk_as_json(name)}" for name in names)
+            parts.append(f'{{"id":{json.dumps(enclosure_id)},"slots":{ENCLOSURE_SLOTS},"disks":{{{disks_json}}}}}')
+
+        nodes = json.dumps([
+            {'id': node, 'name': f"node{node}", 'status': 'online'} for node in range(1, self.nodes + 1)
+        ])
+        return f'{{"nodes":{nodes},"enclosures":[{",".join(parts)}]}}'.encode()
+
+    def _disk_as_json(self, name: str) -> str:
+        cached = self._disk_json.get(name)
+        if cached is None:
+            cached = self._disk_json[name] = json.dumps(self._disks[name], separators=(',', ':'))
+        return cached
+
+    def _pool_view(self, pool: dict) -> dict:
+        """Пул в формате PoolData с PoolProps"""
+        size = sum(self._disks[disk]['size'] for disk in pool['disks']) // max(RAID_MIN_DISKS[pool['raid']], 1)
+        return {
+            'name': pool['name'],
+            'type': pool['type'],
+            'props': {
+                'guid': pool['guid'],
+                'status': 'ONLINE',
+                'used': '0',
+                'free': str(size),
+                'size': str(size),
+                'disks': list(pool['disks']),
+                'disks_groups_count': pool['groups'],
+                'removed_disks': [],
+                'mode': pool['mode'],
+                'raid': pool['raid'],
+                'rdcache': list(pool['rdcache']),
+                'wrcache': list(pool['wrcache']),
+                'spare': list(pool['spare']),
+                'node': pool['node'],
+                'dedupratio': '1.00x',
+                'dataset_dedup': [],
+                'freeing': '0',
+                'reserved': pool['reserved'],
+                'priority': pool['priority'],
+                'scan': {},
+            },
+        }
+
+
+# Роль диска в пуле -> поле пула
+_ROLE_FIELDS = {'main': 'disks', 'wrc': 'wrcache', 'rdc': 'rdcache', 'spare': 'spare'}
+
+
+def _first_free(disks: Dict[str, None], count: int, taken: set) -> List[str]:
+    chosen = []
+    for disk in disks:
+        if disk not in taken:
+            chosen.append(disk)
+            if len(chosen) == count:
+                return chosen
+    return []
@@ -0,0 +1,99 @@
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Dict, List, Optional
+from framework.api.core.logger import logger
+from .app import EmulatorApp
+from .cluster import EmulatedCluster
+
+
+class _EmulatorHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 - чтобы клиент держал keep-alive соединения, как с реальным кластером
+    protocol_version = 'HTTP/1.1'
+    app: EmulatorApp = None
+
+    def _dispatch(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        delay = self.app.delay()
+        if delay:
+            time.sleep(delay)
+
+        response = self.app.handle(self.command, self.path, dict(self.headers.items()), body)
+        self.send_response(response.status_code)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):
+        # Журнал каждого запроса на порядки замедляет нагрузочные прогоны
+        pass
+
+
+class EmulatorServer:
+    """
+    TCP сервер одной ноды эмулятора в фоновом потоке.
+
+    Example:
+        with EmulatorServer(EmulatorApp(EmulatedCluster(disk_count=1000)), port=0) as server:
+            client = APIClient(server.url)
+    """
+
+    def __init__(self, app: EmulatorApp, host: str = '127.0.0.1', port: int = 0):
+        handler = type('EmulatorHandler', (_EmulatorHandler,), {'app': app})
+        self.app = app
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.app.prefix}"
+
+    def start(self) -> 'EmulatorServer':
+        self._thread = Thread(target=self._server.serve_forever, daemon=True, name=f"emulator-node{self.app.node}")
+        self._thread.start()
+        logger.info(f"Emulator node {self.app.node} listening on {self.url}")
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def start_cluster(nodes: int = 2, disk_count: int = 64, host: str = '127.0.0.1', port: int = 0,
+                  seed: int = 0, **app_options) -> List[EmulatorServer]:
+    """
+    Запускает по серверу на каждую ноду общего кластера.
+    При port=0 порты выбираются свободные, иначе ноды слушают port, port+1...
+
+    :param app_options: Параметры EmulatorApp (latency, jitter, access_ttl...).
+    """
+    cluster = EmulatedCluster(disk_count=disk_count, nodes=nodes, seed=seed)
+    return [
+        EmulatorServer(EmulatorApp(cluster, node=node, **app_options), host, port + node - 1 if port else 0).start()
+        for node in range(1, nodes + 1)
+    ]
+
+
+def node_urls(servers: List[EmulatorServer]) -> Dict[str, str]:
+    """URL нод в формате .env: {"NODE_1": "http://127.0.0.1:8000/api/v2.0", ...}"""
+    return {f"NODE_{server.app.node}": server.url for server in servers}
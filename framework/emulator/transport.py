@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Dict
+import httpx
+from .app import EmulatorApp, EmulatorResponse
+from .cluster import EmulatedCluster
+
+
+class EmulatorTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx, который передаёт запрос в EmulatorApp внутри процесса - без сокетов и HTTP сервера.
+
+    Подходит и для httpx.Client, и для httpx.AsyncClient. Запрос по-прежнему проходит через
+    handle_http клиента, сессию ноды, журнал и метрики - подменяется только сеть.
+
+    Example:
+        transport = EmulatorTransport(EmulatorApp(EmulatedCluster(disk_count=1000)))
+        client = APIClient("http://node1/api/v2.0", transport=transport)
+    """
+
+    def __init__(self, app: EmulatorApp):
+        self.app = app
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        delay = self.app.delay()
+        if delay:
+            time.sleep(delay)
+        return self._to_httpx(self.app.handle(request.method, self._target(request), request.headers, body), request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        delay = self.app.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._to_httpx(self.app.handle(request.method, self._target(request), request.headers, body), request)
+
+    @staticmethod
+    def _target(request: httpx.Request) -> str:
+        return request.url.raw_path.decode('ascii')
+
+    @staticmethod
+    def _to_httpx(response: EmulatorResponse, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(response.status_code, headers=response.headers, content=response.body, request=request)
+
+
+def build_transports(nodes: Dict[str, str], disk_count: int = 256, seed: int = 0,
+                     **app_options) -> Dict[str, EmulatorTransport]:
+    """
+    Транспорты для нод из .env поверх одного эмулируемого кластера.
+
+    :param nodes: (dict): Ноды и их URL (ConnectionTools.get_available_nodes()). Префикс API берётся из пути URL.
+    :param app_options: Параметры EmulatorApp (latency, jitter, access_ttl...).
+    """
+    cluster = EmulatedCluster(disk_count=disk_count, nodes=len(nodes), seed=seed)
+    return {
+        node: EmulatorTransport(EmulatorApp(cluster, node=index, prefix=httpx.URL(url).path, **app_options))
+        for index, (node, url) in enumerate(sorted(nodes.items()), start=1)
+    }
@@ -33,6 +33,7 @@ from framework.api.resources.auth.auth_exceptions import AuthenticationError
 
 # Авторизация с валидацией полей. получаем response из прямого запроса на аутентификацию.
 
+@pytest.mark.auth_scope("function")
 @pytest.mark.parametrize("base_url", ["NODE_1", "NODE_2"], indirect=True)
 def test_auth(base_url, framework_context):
     auth_tool = framework_context.tools_manager.auth
@@ -51,7 +52,7 @@ def test_auth(base_url, framework_context):
     assert "jwtRefreshExpirationDate" in response
 
     # Verify cookies are set
-    cookies = auth_tool.cookie_manager.get_current_cookies()
+    cookies = auth_tool.session.get_current_cookies()
     logger.info(f"Cookies after login: {cookies}")
     assert "BAUMSID" in cookies
     assert "jwt_access" in cookies
@@ -64,6 +65,7 @@ def test_auth(base_url, framework_context):
 
 
 # Login\logout на разных нодах
+@pytest.mark.auth_scope("function")
 @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
 def test_cross_node_scenario(framework_context, node_switcher):
     response = framework_context.tools_manager.auth.get_current_session()
@@ -0,0 +1,58 @@
+import pytest
+
+from framework.api.core.logger import logger
+from framework.api.models.pool_models import PoolConfig
+
+
+# Потоковый разбор clusterInfo должен давать тот же результат, что и разбор всего ответа
+@pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+@pytest.mark.parametrize("keys_to_extract", [None, ["name"]])
+def test_cluster_info_streaming(framework_context, keys_to_extract):
+    cluster_tools = framework_context.tools_manager.cluster
+
+    full = cluster_tools.get_cluster_info(keys_to_extract=keys_to_extract, stream=False)
+    streamed = cluster_tools.get_cluster_info(keys_to_extract=keys_to_extract, stream=True)
+
+    logger.info(f"Free disks: {len(streamed['free_disks'])} of {len(streamed['all_disks'])}")
+
+    assert streamed['disks_info'] == full['disks_info']
+    assert sorted(streamed['free_disks']) == sorted(full['free_disks'])
+    assert sorted(streamed['free_for_wc']) == sorted(full['free_for_wc'])
+    assert streamed['free_disks_by_size_and_type'] == full['free_disks_by_size_and_type']
+    for key in keys_to_extract or []:
+        assert streamed[key] == full[key]
+
+
+# Снимок clusterInfo переиспользуется до изменения кластера через PoolTools
+@pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+def test_cluster_snapshot_invalidation(framework_context):
+    cluster_tools = framework_context.tools_manager.cluster
+    pool_tools = framework_context.tools_manager.pool
+
+    snapshot = cluster_tools.snapshot()
+    cluster_tools.get_cluster_info(keys_to_extract=["name"])
+    assert cluster_tools.snapshot() is snapshot
+
+    pool_tools.configure(PoolConfig(raid_type="raid1", mainDisksCount=2, mainGroupsCount=1))
+    pool = pool_tools.create()
+
+    refreshed = cluster_tools.snapshot()
+    assert refreshed.version > snapshot.version
+    # В разнице снимков только диски нового пула
+    joined = refreshed.diff.joined_pools()
+    assert joined and all(pools == [pool['name']] for pools in joined.values())
+
+    pool_tools.delete_pool(pool['name'])
+    assert cluster_tools.snapshot().diff.left_pools() == joined
+    assert cluster_tools.history()[-1].to_version == cluster_tools.snapshot().version
+
+
+# JSONPath-ключи находят значения по пути, без обхода всего ответа
+@pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+def test_cluster_info_jsonpath(framework_context):
+    cluster_tools = framework_context.tools_manager.cluster
+
+    data = cluster_tools.get_cluster_info(keys_to_extract=["$.nodes[*].name"])
+
+    assert data["$.nodes[*].name"] == [node["name"] for node in cluster_tools.snapshot().data["nodes"]]
+    assert cluster_tools.find("$.nodes[*].name") == data["$.nodes[*].name"]
@@ -0,0 +1,59 @@
+import uuid
+import pytest
+from framework.api.core.api_client import APIClient
+from framework.api.core.rate_limiter import RateLimiter
+from framework.api.core.response_cache import ResponseCache
+from framework.api.utils.retry import RetryPolicy
+from framework.emulator.app import EmulatorApp
+from framework.emulator.cluster import EmulatedCluster
+from framework.emulator.transport import EmulatorTransport
+from .helpers import FakeClock, FaultyTransport
+
+
+""" Фикстуры для тестов инфраструктуры клиента (tests/api/core) поверх эмулятора внутри процесса.
+
+    Тесты не зависят от .env и --emulator: у каждого теста свой EmulatedCluster, а клиенты создаются
+    с отдельными ограничителем, кэшем и политикой повторов, чтобы общие синглтоны процесса не влияли на тест.
+"""
+
+
+@pytest.fixture
+def emulated_cluster():
+    return EmulatedCluster(disk_count=48, nodes=2)
+
+
+@pytest.fixture
+def emulator_clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def emulator_app(emulated_cluster, emulator_clock):
+    return EmulatorApp(emulated_cluster, node=1, access_ttl=60, clock=emulator_clock)
+
+
+@pytest.fixture
+def make_client(emulator_app):
+    """
+    Фабрика APIClient поверх эмулятора. У каждого клиента свой base_url - и своя цепь circuit breaker.
+
+    Example:
+        client = make_client(faults=[503, httpx.ConnectError("refused")])
+        client.transport.requests     # запросы, дошедшие до транспорта
+    """
+    clients = []
+
+    def make(faults=(), **kwargs) -> APIClient:
+        base_url = f"http://{uuid.uuid4().hex[:12]}.emulator/api/v2.0"
+        kwargs.setdefault('retry_policy', RetryPolicy(backoff=0.01, backoff_max=0.05, budget=5))
+        kwargs.setdefault('limiter', RateLimiter({}))
+        kwargs.setdefault('cache', ResponseCache(enabled=False))
+        client = APIClient(base_url, name='NODE_1',
+                           transport=FaultyTransport(EmulatorTransport(emulator_app), faults), **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+
+    for client in clients:
+        client.close()
@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+from typing import List, Optional
+import httpx
+from framework.api.core.api_client import APIClient
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.utils.extractors import TestExtractor
+
+
+""" Общие средства тестов инфраструктуры клиента: сбои транспорта, управляемые часы эмулятора и login. """
+
+CREDENTIALS = {'login': 'admin', 'password': '123456', 'remember': True}
+
+
+class FaultyTransport(httpx.BaseTransport):
+    """
+    Транспорт эмулятора, который первые запросы завершает заданными сбоями.
+
+    Сбой - код ответа (int), готовый httpx.Response или исключение httpx.
+    Все запросы, дошедшие до транспорта, сохраняются в requests.
+    delay задерживает каждый запрос, max_in_flight - наибольшее число одновременных запросов.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, faults=(), delay: float = 0.0):
+        self.transport = transport
+        self.faults = list(faults)
+        self.delay = delay
+        self.requests = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests.append(request)
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            fault = self.faults.pop(0) if self.faults else None
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if isinstance(fault, Exception):
+                raise fault
+            if isinstance(fault, httpx.Response):
+                fault.request = request
+                return fault
+            if fault is not None:
+                return httpx.Response(fault, json={'error': 'injected'}, request=request)
+            return self.transport.handle_request(request)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+
+class FakeClock:
+    """Часы эмулятора, которые двигает тест (истечение jwt_access без ожидания)"""
+
+    def __init__(self, now: Optional[float] = None):
+        self.now = time.time() if now is None else now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def login(client: APIClient) -> httpx.Response:
+    """login без AuthTools: куки попадают в сессию клиента, данные login - в session_data"""
+    response = client.post('/login', json=CREDENTIALS)
+    assert response.status_code == 200
+    client.session.set_session(response.json())
+    return response
+
+
+def free_group(cluster, count: int) -> List[str]:
+    """count свободных дисков эмулятора одного размера и типа - из них можно собрать пул"""
+    containers = TestExtractor.find_disks(json.loads(cluster.cluster_info()))
+    inventory = DiskInventory.from_disks({name: disk for container in containers for name, disk in container.items()})
+    return next(list(disks[:count]) for disks in inventory.free_groups().values() if len(disks) >= count)
+
+
+def renew_by_refresh(client: APIClient):
+    """Обновление сессии, как у AuthTools: refresh_tokens и новые данные сессии"""
+    def renew():
+        response = client.get(ApiEndpoints.Auth.REFRESH_TOKENS)
+        assert response.status_code == 200
+        client.session.set_session(response.json())
+    client.session.bind_renewer(renew)
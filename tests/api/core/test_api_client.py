@@ -0,0 +1,85 @@
+import json
+import httpx
+import pytest
+from framework.api.core.circuit_breaker import OPEN, BreakerSettings, CircuitOpenError
+from framework.api.core.rate_limiter import RateLimit, RateLimiter
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.utils.retry import RetryPolicy
+from .helpers import login, renew_by_refresh
+
+
+class CountingLimiter(RateLimiter):
+    """Ограничитель, который запоминает запрошенные токены"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reserved = []
+
+    def reserve(self, node, method, endpoint):
+        self.reserved.append((node, method, endpoint))
+        return super().reserve(node, method, endpoint)
+
+
+# Потоковый запрос повторяется по RetryPolicy до чтения тела, как и обычный
+def test_stream_retries_transient_failures(make_client):
+    client = make_client()
+    login(client)
+    client.transport.faults = [503, httpx.ReadError("connection reset")]
+
+    with client.stream("GET", ApiEndpoints.Cluster.CLUSTER_INFO) as response:
+        body = json.loads(response.read())
+
+    assert response.status_code == 200
+    assert body
+    # login и три попытки clusterInfo
+    assert len(client.transport.requests) == 4
+
+
+# Сетевые ошибки потоковых запросов размыкают цепь ноды, после восстановления /health цепь замыкается
+def test_stream_failures_open_circuit(make_client):
+    client = make_client(retry_policy=RetryPolicy(max_attempts=1))
+    login(client)
+    client.breaker.settings = BreakerSettings(threshold=2, probe_interval=0.01)
+    client.transport.faults = [httpx.ConnectError("refused")] * 2
+
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            with client.stream("GET", ApiEndpoints.Cluster.CLUSTER_INFO):
+                pass
+    sent = len(client.transport.requests)
+
+    assert client.breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        with client.stream("GET", ApiEndpoints.Cluster.CLUSTER_INFO):
+            pass
+    # Пока цепь разомкнута, запрос до транспорта не доходит; /health проверяет уже фоновый поток
+    assert all(request.url.path.endswith("/health") for request in client.transport.requests[sent:])
+    assert client.breaker.wait_closed(timeout=10)
+
+
+# Потоковый запрос с истёкшим jwt_access повторяется после обновления сессии
+def test_stream_replays_after_session_renewal(make_client, emulator_clock):
+    client = make_client()
+    login(client)
+    renew_by_refresh(client)
+    emulator_clock.advance(120)
+
+    with client.stream("GET", ApiEndpoints.Pools.BASE) as response:
+        body = json.loads(response.read())
+
+    assert response.status_code == 200
+    assert body == {"pools": []}
+    assert [request.url.path.rsplit("/", 1)[-1] for request in client.transport.requests] == \
+        ["login", "pools", "refresh_tokens", "pools"]
+
+
+# Потоковые запросы расходуют токены ограничителя ноды
+def test_stream_uses_rate_limiter(make_client):
+    limiter = CountingLimiter({"read": RateLimit(1000, burst=10)})
+    client = make_client(limiter=limiter)
+    login(client)
+
+    with client.stream("GET", ApiEndpoints.Cluster.CLUSTER_INFO) as response:
+        response.read()
+
+    assert ("NODE_1", "GET", ApiEndpoints.Cluster.CLUSTER_INFO) in limiter.reserved
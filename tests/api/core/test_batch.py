@@ -0,0 +1,42 @@
+import httpx
+from framework.api.core.batch import RequestSpec
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.utils.retry import RetryPolicy
+from .helpers import login
+
+
+def create_pool(cluster, name: str):
+    cluster.create_pool({"name": name, "raid_type": "raid1", "auto_configure": True,
+                         "mainDisksCount": 2, "mainGroupsCount": 1})
+
+
+# Результаты - в порядке запросов; ошибка одного запроса сохраняется в его результате и не мешает остальным
+def test_batch_keeps_order_and_isolates_errors(make_client, emulated_cluster):
+    create_pool(emulated_cluster, "pool1")
+    client = make_client(retry_policy=RetryPolicy(max_attempts=1))
+    login(client)
+    client.transport.faults = [httpx.ConnectError("refused")]
+    specs = [RequestSpec("GET", ApiEndpoints.Pools.GET_POOL, {"pool_name": name})
+             for name in ("pool1", "pool1", "missing")]
+
+    results = client.batch(specs, max_concurrency=1)
+
+    assert [result.spec for result in results] == specs
+    assert isinstance(results[0].error, httpx.ConnectError) and not results[0].ok
+    assert results[1].ok and results[1].response.json()["name"] == "pool1"
+    assert results[2].response.status_code == 404 and not results[2].ok
+
+
+# Одновременно выполняется не больше max_concurrency запросов пакета
+def test_batch_limits_concurrency(make_client, emulated_cluster):
+    client = make_client()
+    login(client)
+    for index in range(6):
+        create_pool(emulated_cluster, f"pool{index}")
+    client.transport.delay = 0.05
+    specs = [RequestSpec("GET", ApiEndpoints.Pools.GET_POOL, {"pool_name": f"pool{index}"}) for index in range(6)]
+
+    results = client.batch(specs, max_concurrency=2)
+
+    assert all(result.ok for result in results)
+    assert client.transport.max_in_flight == 2
@@ -0,0 +1,62 @@
+import pytest
+from framework.api.core.cassette import MODE_RECORD, MODE_REPLAY, Cassette, CassetteMissError, cassettes
+from framework.api.resources.endpoints import ApiEndpoints
+from .helpers import free_group, login
+
+
+def create_pool(client, name: str, disks):
+    body = {"name": name, "raid_type": "raid1", "auto_configure": False, "mainDisks": disks}
+    return client.post(ApiEndpoints.Pools.CREATE_POOL.format(pool_name=name), json=body)
+
+
+# Записанные ответы воспроизводятся без обращения к кластеру, в том числе куки login
+def test_replay_serves_recorded_responses(make_client, emulated_cluster, tmp_path):
+    path = str(tmp_path / "test.json")
+    emulated_cluster.create_pool({"name": "pool1", "raid_type": "raid1", "auto_configure": True,
+                                  "mainDisksCount": 2, "mainGroupsCount": 1})
+    with cassettes.use(Cassette(path, MODE_RECORD)):
+        recorder = make_client()
+        login(recorder)
+        recorded = recorder.get(ApiEndpoints.Pools.BASE).json()
+
+    with cassettes.use(Cassette(path, MODE_REPLAY)):
+        player = make_client()
+        login(player)
+        replayed = player.get(ApiEndpoints.Pools.BASE).json()
+
+    assert replayed == recorded and replayed["pools"][0]["name"] == "pool1"
+    assert "jwt_access" in player.session.cookies
+    assert player.transport.requests == []
+
+
+# Порядок дисков в теле не влияет на ключ; запрос, которого нет в кассете, - CassetteMissError
+def test_replay_normalizes_body_and_reports_misses(make_client, emulated_cluster, tmp_path):
+    path = str(tmp_path / "test.json")
+    disks = free_group(emulated_cluster, 2)
+    with cassettes.use(Cassette(path, MODE_RECORD)):
+        client = make_client()
+        login(client)
+        assert create_pool(client, "pool1", disks).status_code == 201
+
+    with cassettes.use(Cassette(path, MODE_REPLAY)):
+        assert create_pool(client, "pool1", list(reversed(disks))).status_code == 201
+        with pytest.raises(CassetteMissError):
+            create_pool(client, "pool2", disks)
+    # До кластера дошли только login и создание пула при записи
+    assert len(client.transport.requests) == 2
+
+
+# login, записанный в сессионную кассету, доступен тесту, в кассете которого его нет
+def test_auth_recorded_into_session_cassette(make_client, tmp_path):
+    session_path, test_path = str(tmp_path / "session.json"), str(tmp_path / "test.json")
+    with cassettes.use(Cassette(session_path, MODE_RECORD), session=True):
+        with cassettes.use(Cassette(test_path, MODE_RECORD)):
+            client = make_client()
+            login(client)
+
+    with cassettes.use(Cassette(session_path, MODE_REPLAY), session=True):
+        with cassettes.use(Cassette(str(tmp_path / "other.json"), MODE_REPLAY)):
+            player = make_client()
+            login(player)
+
+    assert player.transport.requests == []
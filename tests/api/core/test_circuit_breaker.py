@@ -0,0 +1,87 @@
+import httpx
+import pytest
+from framework.api.core.api_client import APIClient
+from framework.api.core.circuit_breaker import CLOSED, OPEN, BreakerSettings, CircuitBreaker, CircuitOpenError
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.utils.retry import RetryPolicy
+from framework.emulator.transport import EmulatorTransport
+from .helpers import FaultyTransport, login
+
+
+def make_breaker(emulator_app, threshold=3, probe_faults=()):
+    transport = FaultyTransport(EmulatorTransport(emulator_app), probe_faults)
+    settings = BreakerSettings(threshold=threshold, probe_interval=0.01, probe_timeout=1)
+    return CircuitBreaker("http://breaker.emulator/api/v2.0", settings=settings, transport=transport), transport
+
+
+# Цепь размыкается только после threshold неудач подряд; успех и ошибка API (500) счётчик не копят
+def test_breaker_opens_after_consecutive_failures(emulator_app):
+    breaker, _ = make_breaker(emulator_app)
+    for status in (503, 502, 200, 504, 500, 503):
+        breaker.record_response(httpx.Response(status))
+    assert breaker.state == CLOSED
+
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    assert breaker.wait_closed(timeout=10)
+
+
+# Разомкнутая цепь замыкается только после успешного /health, счётчик неудач сбрасывается
+def test_breaker_closes_after_health_probe(emulator_app):
+    breaker, transport = make_breaker(emulator_app, threshold=1, probe_faults=[503, httpx.ConnectError("refused")])
+
+    breaker.record_failure("refused")
+
+    assert breaker.wait_closed(timeout=10)
+    assert breaker.state == CLOSED and breaker.failures == 0
+    assert len(transport.requests) == 3
+    assert all(request.url.path.endswith(ApiEndpoints.Cluster.HEALTH) for request in transport.requests)
+    breaker.before_request()
+
+
+# При threshold=0 цепь не размыкается
+def test_disabled_breaker_never_opens(emulator_app):
+    breaker, _ = make_breaker(emulator_app, threshold=0)
+    for _ in range(10):
+        breaker.record_failure("refused")
+
+    assert breaker.state == CLOSED and not breaker.enabled
+
+
+# Клиенты одной ноды делят цепь: пока она разомкнута, запросы сразу падают и не доходят до транспорта
+def test_clients_of_node_share_circuit(make_client):
+    # Три ответа 503 размыкают цепь, первая проверка /health тоже неудачна
+    client = make_client(faults=[503] * 4, retry_policy=RetryPolicy(max_attempts=1))
+    client.breaker.settings = BreakerSettings(threshold=3, probe_interval=0.5)
+    other = APIClient(client.base_url, name="NODE_1", transport=client.transport,
+                      limiter=client.limiter, cache=client.cache, retry_policy=client.retry_policy)
+    for _ in range(3):
+        assert client.get(ApiEndpoints.Cluster.CLUSTER_INFO).status_code == 503
+    sent = len(client.transport.requests)
+
+    assert other.breaker is client.breaker and other.breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        other.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+    assert all(request.url.path.endswith(ApiEndpoints.Cluster.HEALTH) for request in client.transport.requests[sent:])
+    assert client.breaker.wait_closed(timeout=10)
+    login(other)
+    assert other.get(ApiEndpoints.Cluster.CLUSTER_INFO).status_code == 200
+    other.close()
+
+
+# Повторы одного запроса считаются одной неудачей: запрос, исчерпавший попытки, цепь не размыкает
+def test_retried_request_counts_once(make_client):
+    client = make_client(retry_policy=RetryPolicy(max_attempts=3, backoff=0.01, backoff_max=0.01))
+    client.breaker.settings = BreakerSettings(threshold=3, probe_interval=0.01)
+    login(client)
+    client.transport.faults = [503] * 3
+
+    assert client.get(ApiEndpoints.Cluster.CLUSTER_INFO).status_code == 503
+    assert client.breaker.state == CLOSED and client.breaker.failures == 1
+    client.transport.faults = [503, 503]
+    assert client.get(ApiEndpoints.Cluster.CLUSTER_INFO).status_code == 200
+    assert client.breaker.failures == 0
@@ -0,0 +1,45 @@
+import uuid
+import pytest
+from framework.api.core.api_client import ClientSettings
+from framework.api.core.client_registry import ClientRegistry
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.emulator.transport import build_transports
+from .helpers import login
+
+
+@pytest.fixture
+def registry():
+    # Уникальные имена нод: общие для процесса кэш и цепи circuit breaker привязаны к имени и URL ноды
+    run = uuid.uuid4().hex[:8]
+    nodes = {f"NODE_{run}_{index}": f"http://{run}-{index}.emulator/api/v2.0" for index in (1, 2)}
+    registry = ClientRegistry(nodes, settings=ClientSettings(timeout=5), transports=build_transports(nodes, 48))
+    yield registry
+    registry.close()
+
+
+# Клиент ноды создаётся один раз и переиспользуется, у каждой ноды - своя сессия
+def test_clients_are_per_node(registry):
+    first, second = sorted(registry.nodes())
+    client = registry.get(first)
+    login(client)
+
+    assert registry.get(first) is client
+    assert registry.get(first).get(ApiEndpoints.Pools.BASE).status_code == 200
+    # login на первой ноде не авторизует вторую
+    assert registry.get(second).session is not client.session
+    assert registry.get(second).get(ApiEndpoints.Pools.BASE).status_code == 401
+
+
+# Настройки ноды действуют для нового клиента, после close() клиент создаётся заново
+def test_node_settings_and_close(registry):
+    node = sorted(registry.nodes())[0]
+    registry.configure(node, ClientSettings(timeout=7, max_connections=3))
+    client = registry.get(node)
+
+    assert client.settings.timeout == 7
+    assert client.settings.max_connections == 3
+    registry.close()
+    assert client.http_client.is_closed
+    assert registry.get(node) is not client
+    with pytest.raises(ValueError):
+        registry.get("NODE_UNKNOWN")
@@ -0,0 +1,47 @@
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.utils.retry import RetryPolicy
+from .helpers import CREDENTIALS, free_group, login
+
+
+def create_pool(client, name: str, disks):
+    body = {"name": name, "raid_type": "raid1", "auto_configure": False, "mainDisks": disks}
+    return client.post(ApiEndpoints.Pools.CREATE_POOL.format(pool_name=name), json=body)
+
+
+# Пул занимает диски: второй пул на тех же дисках не создаётся, после удаления пула диски свободны
+def test_pool_lifecycle_takes_and_frees_disks(make_client, emulated_cluster):
+    client = make_client(retry_policy=RetryPolicy(max_attempts=1))
+    login(client)
+    free = emulated_cluster.free_disk_count()
+    disks = free_group(emulated_cluster, 2)
+
+    assert create_pool(client, "pool1", disks).status_code == 201
+    assert emulated_cluster.free_disk_count() == free - 2
+    assert create_pool(client, "pool2", disks).status_code == 409
+    assert client.delete(ApiEndpoints.Pools.DELETE_POOL.format(pool_name="pool1")).status_code == 200
+    assert emulated_cluster.free_disk_count() == free
+    assert client.get(ApiEndpoints.Pools.GET_POOL.format(pool_name="pool1")).status_code == 404
+
+
+# Без login и после истечения jwt_access запросы отклоняются с 401, refresh_tokens выдаёт новый jwt_access
+def test_access_token_expires_by_emulator_clock(make_client, emulator_clock):
+    client = make_client(retry_policy=RetryPolicy(max_attempts=1))
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 401
+    assert client.post("/login", json={**CREDENTIALS, "password": "wrong"}).status_code == 401
+    login(client)
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 200
+
+    emulator_clock.advance(61)
+
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 401
+    assert client.get(ApiEndpoints.Auth.REFRESH_TOKENS).status_code == 200
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 200
+
+
+# Неизвестный путь - 404, известный путь с другим методом - 405
+def test_unknown_routes(make_client):
+    client = make_client(retry_policy=RetryPolicy(max_attempts=1))
+    login(client)
+
+    assert client.get("/no/such/endpoint").status_code == 404
+    assert client.put(ApiEndpoints.Pools.BASE).status_code == 405
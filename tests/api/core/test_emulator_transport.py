@@ -0,0 +1,47 @@
+import uuid
+from framework.api.core.api_client import APIClient, AsyncAPIClient
+from framework.api.core.rate_limiter import RateLimiter
+from framework.api.core.response_cache import ResponseCache
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.emulator.transport import EmulatorTransport, build_transports
+from .helpers import CREDENTIALS, login
+
+
+def node_urls(count: int = 2) -> dict:
+    run = uuid.uuid4().hex[:8]
+    return {f"NODE_{index}": f"http://{run}-{index}.emulator/custom/prefix" for index in range(1, count + 1)}
+
+
+# Ноды build_transports работают с одним кластером: пул, созданный через одну ноду, виден на другой
+def test_build_transports_share_cluster():
+    nodes = node_urls()
+    transports = build_transports(nodes, disk_count=48)
+    clients = [APIClient(url, name=node, transport=transports[node], limiter=RateLimiter({}),
+                         cache=ResponseCache(enabled=False)) for node, url in sorted(nodes.items())]
+    try:
+        for client in clients:
+            login(client)
+        clients[0].post(ApiEndpoints.Pools.CREATE_POOL.format(pool_name="pool1"),
+                        json={"name": "pool1", "raid_type": "raid1", "auto_configure": True,
+                              "mainDisksCount": 2, "mainGroupsCount": 1})
+
+        # Префикс API берётся из пути URL ноды
+        pools = clients[1].get(ApiEndpoints.Pools.BASE).json()["pools"]
+        assert [pool["name"] for pool in pools] == ["pool1"]
+    finally:
+        for client in clients:
+            client.close()
+
+
+# Тот же транспорт обслуживает асинхронный клиент
+async def test_async_client_over_emulator(emulator_app):
+    client = AsyncAPIClient(f"http://{uuid.uuid4().hex[:8]}.emulator/api/v2.0", name="NODE_1",
+                            transport=EmulatorTransport(emulator_app), limiter=RateLimiter({}),
+                            cache=ResponseCache(enabled=False))
+    async with client:
+        response = await client.post("/login", json=CREDENTIALS)
+        client.session.set_session(response.json())
+        pools = await client.get(ApiEndpoints.Pools.BASE)
+
+    assert response.status_code == 200
+    assert pools.status_code == 200 and pools.json() == {"pools": []}
@@ -0,0 +1,49 @@
+import json
+import pytest
+from framework.api.utils.extractors import TestExtractor
+from framework.emulator.cluster import EmulatedCluster
+
+
+@pytest.fixture
+def cluster_info() -> bytes:
+    cluster = EmulatedCluster(disk_count=24, nodes=2)
+    cluster.create_pool({"name": "pool1", "raid_type": "raid1", "auto_configure": True,
+                         "mainDisksCount": 2, "mainGroupsCount": 1})
+    return cluster.cluster_info()
+
+
+def chunked(body: bytes, size: int = 7):
+    return (body[start:start + size] for start in range(0, len(body), size))
+
+
+# Потоковый разбор совпадает с разбором всего ответа: ключ внутри собираемого контейнера (name в nodes),
+# ключи рядом с disks (id, slots), сам disks и контейнер с disks внутри; внутрь disks поиск не идёт (state)
+@pytest.mark.parametrize("keys", [
+    ["name"],
+    ["nodes", "name", "id"],
+    ["enclosures", "slots", "disks", "state", "disks_info"],
+])
+def test_stream_matches_full_parse(cluster_info, keys):
+    full = TestExtractor().extract_cluster_info(json.loads(cluster_info), keys)
+    streamed = TestExtractor().extract_cluster_info_stream(chunked(cluster_info), keys)
+
+    for key in keys:
+        assert streamed[key] == full[key], key
+    assert streamed["disks_info"] == full["disks_info"]
+    assert streamed["free_disks_by_size_and_type"] == full["free_disks_by_size_and_type"]
+
+
+# JSONPath и обычные ключи в одном запросе: JSONPath - по пути, обычные - обходом; с готовым инвентарём тоже
+def test_jsonpath_mixed_with_plain_keys(cluster_info):
+    data = json.loads(cluster_info)
+    keys = ["$.nodes[*].name", "slots", "name", "free_disks"]
+    full = TestExtractor().extract_cluster_info(data, keys)
+
+    assert full["$.nodes[*].name"] == ["node1", "node2"]
+    assert full["name"] == ["node1", "node2"]
+    assert full["slots"] == [enclosure["slots"] for enclosure in data["enclosures"]]
+    with_inventory = TestExtractor().extract_cluster_info(data, keys, inventory=full["inventory"])
+    assert {key: with_inventory[key] for key in keys} == {key: full[key] for key in keys}
+    assert with_inventory["inventory"] is full["inventory"]
+    with pytest.raises(ValueError):
+        TestExtractor().extract_cluster_info_stream(chunked(cluster_info), keys)
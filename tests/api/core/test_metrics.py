@@ -0,0 +1,38 @@
+from framework.api.core.metrics import LatencyRecorder
+from framework.api.resources.endpoints import ApiEndpoints
+from .helpers import login
+
+
+# Задержки собираются по шаблону эндпоинта: запросы к разным пулам попадают в одну гистограмму
+def test_latency_grouped_by_endpoint_template(make_client, emulated_cluster):
+    metrics = LatencyRecorder()
+    client = make_client(metrics=metrics)
+    emulated_cluster.create_pool({"name": "pool1", "raid_type": "raid1", "auto_configure": True,
+                                  "mainDisksCount": 2, "mainGroupsCount": 1})
+    login(client)
+    client.get(ApiEndpoints.Pools.GET_POOL.format(pool_name="pool1"))
+    client.get(ApiEndpoints.Pools.GET_POOL.format(pool_name="missing"))
+
+    stats = metrics.to_dict()
+
+    assert set(stats) == {"POST /login", "GET /pools/{pool_name}"}
+    pool_stats = stats["GET /pools/{pool_name}"]
+    assert pool_stats["count"] == 2
+    assert pool_stats["statuses"] == {"200": 1, "404": 1}
+    assert 0 < pool_stats["p50"] <= pool_stats["max"]
+    assert pool_stats["response_bytes"] > 0
+
+
+# Метрики воркеров xdist сливаются в контроллере без потери запросов
+def test_merge_worker_metrics(make_client):
+    worker_metrics = LatencyRecorder()
+    login(make_client(metrics=worker_metrics))
+    login(make_client(metrics=worker_metrics))
+    controller = LatencyRecorder()
+
+    controller.merge_dict(worker_metrics.to_dict())
+    controller.merge_dict(worker_metrics.to_dict())
+
+    assert controller.to_dict()["POST /login"]["count"] == 4
+    assert controller.to_dict()["POST /login"]["statuses"] == {"200": 4}
+    assert "POST /login" in controller.format_table()
@@ -0,0 +1,61 @@
+import time
+from types import SimpleNamespace
+import pytest
+from framework.api.core import rate_limiter as rate_limiter_module
+from framework.api.core.rate_limiter import RateLimit, RateLimiter
+from framework.api.resources.endpoints import ApiEndpoints
+from .helpers import FakeClock, login
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+# burst запросов проходит сразу, следующие ждут по 1/rate; за паузу корзина наполняется
+def test_bucket_allows_burst_then_queues(clock):
+    limiter = RateLimiter({"read": RateLimit(2, burst=3)}, shared=False)
+
+    delays = [limiter.reserve("NODE_1", "GET", ApiEndpoints.Pools.BASE) for _ in range(5)]
+    assert delays == [0.0, 0.0, 0.0, 0.5, 1.0]
+
+    clock.advance(1)
+    assert limiter.reserve("NODE_1", "GET", ApiEndpoints.Pools.BASE) == 0.5
+
+
+# Корзины раздельные по нодам и классам эндпоинтов, лимит ноды важнее общего
+def test_buckets_per_node_and_endpoint_class(clock):
+    limiter = RateLimiter({"auth": RateLimit(1), "read": RateLimit(1)},
+                          node_limits={("NODE_2", "auth"): RateLimit(1, burst=2)}, shared=False)
+
+    assert limiter.reserve("NODE_1", "POST", ApiEndpoints.Auth.LOGIN) == 0.0
+    assert limiter.reserve("NODE_1", "POST", ApiEndpoints.Auth.LOGIN) == 1.0
+    assert limiter.reserve("NODE_1", "GET", ApiEndpoints.Pools.BASE) == 0.0
+    assert limiter.reserve("NODE_2", "POST", ApiEndpoints.Auth.LOGIN) == 0.0
+    assert limiter.reserve("NODE_2", "POST", ApiEndpoints.Auth.LOGIN) == 0.0
+    # Для mutate лимит не задан
+    assert limiter.reserve("NODE_1", "DELETE", ApiEndpoints.Pools.DELETE_POOL) == 0.0
+
+
+# Общие корзины в SQLite: два ограничителя (воркеры xdist) делят один лимит
+def test_shared_buckets_are_common_for_limiters(clock, tmp_path, monkeypatch):
+    monkeypatch.setenv("API_SHARED_STATE_DIR", str(tmp_path))
+    limits = {"read": RateLimit(1)}
+    first, second = RateLimiter(limits, shared=True), RateLimiter(limits, shared=True)
+
+    assert first.reserve("NODE_1", "GET", ApiEndpoints.Pools.BASE) == 0.0
+    assert second.reserve("NODE_1", "GET", ApiEndpoints.Pools.BASE) == 1.0
+
+
+# Клиент ждёт выданную ограничителем задержку перед запросом
+def test_client_waits_for_rate_limit(make_client):
+    client = make_client(limiter=RateLimiter({"read": RateLimit(10)}, shared=False))
+    login(client)
+
+    started = time.monotonic()
+    for _ in range(3):
+        assert client.get(ApiEndpoints.Pools.BASE).status_code == 200
+
+    assert time.monotonic() - started >= 0.15
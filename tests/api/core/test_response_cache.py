@@ -0,0 +1,110 @@
+import time
+import httpx
+import pytest
+from framework.api.core.response_cache import ResponseCache
+from framework.api.resources.endpoints import ApiEndpoints
+from .helpers import login
+
+
+class AfterResponse(httpx.BaseTransport):
+    """Транспорт, выполняющий action после того, как ответ собран, но до его получения клиентом"""
+
+    def __init__(self, transport: httpx.BaseTransport, action):
+        self.transport = transport
+        self.action = action
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.transport.handle_request(request)
+        action, self.action = self.action, None
+        if action is not None:
+            action()
+        return response
+
+
+def sent_paths(client):
+    return [request.url.path.rsplit("/api/v2.0", 1)[-1] for request in client.transport.requests]
+
+
+def pool_request(name):
+    return {"name": name, "raid_type": "raid1", "auto_configure": True, "mainDisksCount": 2, "mainGroupsCount": 1}
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(enabled=True)
+
+
+# Свежая запись отдаётся без обращения к кластеру
+def test_cache_hit(make_client, cache):
+    client = make_client(cache=cache)
+    login(client)
+
+    first = client.get(ApiEndpoints.Pools.BASE)
+    second = client.get(ApiEndpoints.Pools.BASE)
+
+    assert second.json() == first.json()
+    assert sent_paths(client) == ["/login", "/pools"]
+    assert cache.hits == 1
+
+
+# После TTL запрос уходит с If-None-Match, 304 продлевает запись без тела
+def test_cache_revalidates_with_etag(make_client):
+    cache = ResponseCache(ttls={ApiEndpoints.Cluster.CLUSTER_INFO: 0.05}, enabled=True)
+    client = make_client(cache=cache)
+    login(client)
+
+    first = client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+    time.sleep(0.1)
+    second = client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert cache.revalidated == 1
+    assert client.transport.requests[-1].headers["If-None-Match"] == first.headers["etag"]
+
+
+# Создание пула сбрасывает clusterInfo и список пулов всех нод
+def test_cache_invalidated_by_pool_write(make_client, cache, emulated_cluster):
+    client = make_client(cache=cache)
+    login(client)
+    client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+    client.get(ApiEndpoints.Pools.BASE)
+
+    assert client.post("/pools/cached", json=pool_request("cached")).status_code == 201
+    pools = client.get(ApiEndpoints.Pools.BASE).json()["pools"]
+    cluster_info = client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+
+    assert [pool["name"] for pool in pools] == [pool["name"] for pool in emulated_cluster.list_pools()]
+    assert cluster_info.content == emulated_cluster.cluster_info()
+    assert sent_paths(client)[-2:] == ["/pools", "/nodes/clusterInfo"]
+
+
+# Запись в диски и ноды сбрасывает clusterInfo так же, как запись в пулы
+@pytest.mark.parametrize("write", ["/nodes/node1/disks/disk_1/locate", "/disks/disk_1", "/cluster"])
+def test_cache_invalidated_by_disk_and_node_writes(make_client, cache, write):
+    client = make_client(cache=cache)
+    login(client)
+    client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+
+    client.put(write, json={})
+    client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+
+    assert sent_paths(client) == ["/login", "/nodes/clusterInfo", write, "/nodes/clusterInfo"]
+
+
+# Ответ GET, пока шёл который кластер изменили, в кэш не попадает (поколение кэша сменилось)
+def test_cache_skips_response_raced_by_write(make_client, cache, emulated_cluster):
+    writer = make_client(cache=cache)
+    login(writer)
+    reader = make_client(cache=cache)
+    login(reader)
+    reader.transport.transport = AfterResponse(
+        reader.transport.transport, lambda: writer.post("/pools/raced", json=pool_request("raced"))
+    )
+
+    stale = reader.get(ApiEndpoints.Pools.BASE).json()["pools"]
+    fresh = reader.get(ApiEndpoints.Pools.BASE).json()["pools"]
+
+    assert stale == []
+    assert [pool["name"] for pool in fresh] == ["raced"]
+    assert sent_paths(reader) == ["/login", "/pools", "/pools"]
@@ -0,0 +1,63 @@
+import time
+import httpx
+import pytest
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.utils.retry import RetryPolicy
+from .helpers import login
+
+
+def pool_body(name: str) -> dict:
+    return {"name": name, "raid_type": "raid1", "auto_configure": True, "mainDisksCount": 2, "mainGroupsCount": 1}
+
+
+# 5xx повторяется для идемпотентного GET, но не для POST: повторный POST мог бы создать пул дважды
+def test_retries_only_idempotent_methods_on_5xx(make_client):
+    client = make_client()
+    login(client)
+    client.transport.faults = [503, 503]
+
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 200
+    client.transport.faults = [503]
+    response = client.post(ApiEndpoints.Pools.CREATE_POOL.format(pool_name="pool1"), json=pool_body("pool1"))
+
+    assert response.status_code == 503
+    # login, три попытки GET и одна POST
+    assert len(client.transport.requests) == 5
+
+
+# Ошибка соединения повторяется и для POST: запрос до сервера не дошёл
+def test_connect_error_retried_for_post(make_client):
+    client = make_client()
+    login(client)
+    client.transport.faults = [httpx.ConnectError("refused")]
+
+    response = client.post(ApiEndpoints.Pools.CREATE_POOL.format(pool_name="pool1"), json=pool_body("pool1"))
+
+    assert response.status_code == 201
+
+
+# Пауза берётся из Retry-After; если она не помещается в бюджет повторов, возвращается последний ответ
+def test_retry_after_and_budget(make_client):
+    client = make_client(retry_policy=RetryPolicy(backoff=0.01, budget=1))
+    login(client)
+    client.transport.faults = [httpx.Response(429, headers={"Retry-After": "0.3"})]
+
+    started = time.monotonic()
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 200
+    assert time.monotonic() - started >= 0.3
+
+    client.transport.faults = [httpx.Response(429, headers={"Retry-After": "5"})]
+    started = time.monotonic()
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 429
+    assert time.monotonic() - started < 1
+
+
+# После max_attempts сетевая ошибка пробрасывается
+def test_gives_up_after_max_attempts(make_client):
+    client = make_client(retry_policy=RetryPolicy(max_attempts=2, backoff=0.01))
+    login(client)
+    client.transport.faults = [httpx.ReadError("reset")] * 2
+
+    with pytest.raises(httpx.ReadError):
+        client.get(ApiEndpoints.Pools.BASE)
+    assert len(client.transport.requests) == 3
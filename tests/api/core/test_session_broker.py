@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import uuid
+from types import SimpleNamespace
+import pytest
+from framework.api.core.api_client import AsyncAPIClient
+from framework.api.core.rate_limiter import RateLimiter
+from framework.api.core.response_cache import ResponseCache
+from framework.api.core.session_broker import SessionBroker
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.tools import auth_tools
+from framework.api.tools.async_auth_tools import AsyncAuthTools
+from framework.emulator.transport import EmulatorTransport
+from .helpers import login
+
+
+@pytest.fixture
+def broker(tmp_path):
+    return SessionBroker(enabled=True, path=str(tmp_path / "sessions.sqlite3"))
+
+
+@pytest.fixture
+def emulator_login(make_client):
+    """login в эмуляторе в формате SessionFactory брокера; calls - сколько раз он выполнялся"""
+    client = make_client()
+
+    def factory():
+        factory.calls += 1
+        response = login(client)
+        return dict(client.session.cookies), response.json()
+
+    factory.calls = 0
+    return factory
+
+
+# Воркеры, пришедшие одновременно, получают одну сессию: login выполняется один раз
+def test_acquire_logs_in_once(broker, emulator_login):
+    key = "NODE_1 admin True hash"
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        sessions = list(executor.map(lambda _: broker.acquire(key, emulator_login), range(4)))
+
+    assert emulator_login.calls == 1
+    assert len({session.sid for session in sessions}) == 1
+    # Сессию закрывает (logout) только последний из четырёх держателей
+    assert [broker.release(key, sessions[0].sid) for _ in range(4)] == [False, False, False, True]
+    assert broker.current(key) is None
+
+
+# login идёт вне транзакции: другой воркер может писать в файл брокера, пока login не завершён
+def test_login_does_not_hold_write_lock(broker, emulator_login, tmp_path):
+    broker.current("NODE_1 admin True hash")
+    other_worker = sqlite3.connect(str(tmp_path / "sessions.sqlite3"), timeout=0.1, isolation_level=None)
+    written = threading.Event()
+
+    def slow_login():
+        other_worker.execute("BEGIN IMMEDIATE")
+        other_worker.execute("DELETE FROM sessions WHERE key = 'other'")
+        other_worker.execute("COMMIT")
+        written.set()
+        time.sleep(0.1)
+        return emulator_login()
+
+    broker.acquire("NODE_1 admin True hash", slow_login)
+    other_worker.close()
+
+    assert written.is_set()
+
+
+# Упавший login снимает отметку: следующий воркер выполняет login сам, а не ждёт таймаута
+def test_failed_login_lets_next_worker_login(broker, emulator_login):
+    key = "NODE_1 admin True hash"
+
+    def broken_login():
+        raise ConnectionError("node is down")
+
+    with pytest.raises(ConnectionError):
+        broker.acquire(key, broken_login)
+    session = broker.acquire(key, emulator_login)
+
+    assert emulator_login.calls == 1
+    assert session.version == 1
+
+
+# Refresh выполняется один раз: воркер со старой версией получает уже обновлённую сессию
+def test_refresh_runs_once_per_version(broker, emulator_login):
+    key = "NODE_1 admin True hash"
+    session = broker.acquire(key, emulator_login)
+
+    refreshed = broker.refresh(key, session.version, emulator_login)
+    again = broker.refresh(key, session.version, emulator_login)
+
+    assert emulator_login.calls == 2
+    assert refreshed.version == session.version + 1
+    assert again == refreshed
+
+
+# Асинхронный logout общей сессии, как и синхронный: logout_and_clean отпускает её, пока она нужна другим
+# воркерам, а явный logout убирает её из брокера
+async def test_async_logout_uses_broker(broker, emulator_login, make_client, emulator_app, monkeypatch):
+    monkeypatch.setattr(auth_tools, "session_broker", broker)
+    key = "NODE_1 admin True hash"
+    client = make_client()
+    async_client = AsyncAPIClient(f"http://{uuid.uuid4().hex[:8]}.emulator/api/v2.0", session=client.session,
+                                  name="NODE_1", transport=EmulatorTransport(emulator_app), limiter=RateLimiter({}),
+                                  cache=ResponseCache(enabled=False))
+    tools = AsyncAuthTools(SimpleNamespace(client=client, async_client=async_client))
+    # Сессию держат два воркера
+    for _ in range(2):
+        tools._adopt(broker.acquire(key, emulator_login))
+
+    async with async_client:
+        tools._shared_key = key
+        assert await tools.logout_and_clean() is None
+        assert broker.current(key) is not None
+        assert client.get(ApiEndpoints.Pools.BASE).status_code == 200
+
+        tools._shared_key = key
+        status = await tools.logout()
+
+    assert status["success"]
+    assert broker.current(key) is None
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 401
@@ -0,0 +1,57 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from framework.api.core.session_store import SessionStore
+from framework.api.resources.endpoints import ApiEndpoints
+from .helpers import login, renew_by_refresh
+
+
+# Одновременные renew с одним снимком выполняют обновление один раз, все получают новую сессию
+def test_renew_is_single_flight():
+    session = SessionStore()
+    session.set_session({"login": "admin"})
+    calls = []
+
+    def renew():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        session.set_session({"login": "admin"}, refreshed_at=time.time() + 1)
+    session.bind_renewer(renew)
+    seen = session.snapshot
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: session.renew(seen), range(8)))
+
+    assert results == [True] * 8
+    assert len(calls) == 1
+    assert session.snapshot is not seen
+
+
+# Без функции обновления или при её ошибке renew возвращает False, сессия не меняется
+def test_renew_without_renewer_or_on_failure():
+    session = SessionStore()
+    session.set_session({"login": "admin"})
+    seen = session.snapshot
+    assert not session.renew(seen)
+
+    def renew():
+        raise RuntimeError("refresh failed")
+    session.bind_renewer(renew)
+
+    assert not session.renew(seen)
+    assert session.snapshot is seen
+
+
+# Запросы из потоков, получившие 401 после истечения jwt_access, ждут один refresh_tokens и повторяются
+def test_concurrent_401_trigger_one_refresh(make_client, emulator_clock):
+    client = make_client()
+    login(client)
+    renew_by_refresh(client)
+    emulator_clock.advance(61)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        statuses = list(pool.map(lambda _: client.get(ApiEndpoints.Pools.BASE).status_code, range(4)))
+
+    assert statuses == [200] * 4
+    refreshes = [request for request in client.transport.requests if request.url.path.endswith("refresh_tokens")]
+    assert len(refreshes) == 1
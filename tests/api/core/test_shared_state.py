@@ -0,0 +1,18 @@
+from framework.api.core.shared_state import SharedStore, remove_shared_state, shared_state_path
+
+
+# Файлы состояния удаляются только для своего прогона, вместе с -wal и -shm
+def test_remove_shared_state(tmp_path, monkeypatch):
+    monkeypatch.setenv("API_SHARED_STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("PYTEST_XDIST_TESTRUNUID", "run1")
+    store = SharedStore(shared_state_path("sessions"), "CREATE TABLE IF NOT EXISTS t (id INTEGER);")
+    with store.transaction() as db:
+        db.execute("INSERT INTO t VALUES (1)")
+    store.close()
+    other_run = tmp_path / "at_api_sessions_run2.sqlite3"
+    other_run.write_bytes(b"")
+
+    removed = remove_shared_state()
+
+    assert removed
+    assert [path.name for path in tmp_path.iterdir()] == [other_run.name]
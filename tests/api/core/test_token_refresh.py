@@ -0,0 +1,86 @@
+import time
+import uuid
+from email.utils import formatdate
+import pytest
+from framework.api.core.api_client import AsyncAPIClient
+from framework.api.core.rate_limiter import RateLimiter
+from framework.api.core.response_cache import ResponseCache
+from framework.api.core.session_store import FALLBACK_REFRESH_AFTER, SessionSnapshot, access_expires_at
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.emulator.transport import EmulatorTransport
+from .helpers import login, renew_by_refresh
+
+
+def paths(client) -> list:
+    return [request.url.path.rsplit("/", 1)[-1] for request in client.transport.requests]
+
+
+# Срок jwt_access читается в миллисекундах и ISO, расхождение часов с сервером учитывается по заголовку Date
+def test_access_expiry_from_session_data():
+    now = time.time()
+
+    assert access_expires_at({"jwtAccessExpirationDate": 1700000000000}) == 1700000000
+    assert access_expires_at({"jwtAccessExpirationDate": "2023-11-14T22:13:20Z"}) == 1700000000
+    assert access_expires_at({}) is None
+    assert access_expires_at({"jwtAccessExpirationDate": "soon"}) is None
+    # Часы сервера отстают на 100 секунд - срок по часам этой машины на 100 секунд позже
+    skewed = access_expires_at({"jwtAccessExpirationDate": (now + 60) * 1000}, formatdate(now - 100, usegmt=True))
+    assert skewed == pytest.approx(now + 160, abs=2)
+
+
+# Обновлять пора за API_TOKEN_REFRESH_MARGIN до срока, без срока - через FALLBACK_REFRESH_AFTER после login
+def test_refresh_due_by_expiry(monkeypatch):
+    monkeypatch.setenv("API_TOKEN_REFRESH_MARGIN", "5")
+    now = time.time()
+
+    assert SessionSnapshot().refresh_in() is None
+    assert SessionSnapshot(session_data={"login": "admin"}, refreshed_at=now,
+                           expires_at=now + 60).refresh_in() == pytest.approx(55, abs=1)
+    assert SessionSnapshot(session_data={"login": "admin"}, refreshed_at=now,
+                           expires_at=now + 3).refresh_in() == 0.0
+    assert SessionSnapshot(session_data={"login": "admin"},
+                           refreshed_at=now).refresh_in() == pytest.approx(FALLBACK_REFRESH_AFTER, abs=1)
+
+
+# После login срок берётся из ответа эмулятора, refresh_tokens его продлевает
+def test_login_sets_access_expiry(make_client, emulator_clock):
+    client = make_client()
+    login(client)
+    renew_by_refresh(client)
+    assert client.session.snapshot.expires_at == pytest.approx(emulator_clock() + 60, abs=1)
+
+    emulator_clock.advance(30)
+    assert client.session.renew(client.session.snapshot)
+
+    assert client.session.snapshot.expires_at == pytest.approx(emulator_clock() + 60, abs=1)
+
+
+# Если обновить сессию не удалось, 401 возвращается тесту без повторов; запросы со своим jwt_access не повторяются
+def test_401_is_not_replayed_without_renewal(make_client, emulator_clock):
+    client = make_client()
+    login(client)
+    renew_by_refresh(client)
+    # Истёк и jwt_refresh
+    emulator_clock.advance(86401)
+
+    assert client.get(ApiEndpoints.Pools.BASE).status_code == 401
+    assert paths(client) == ["login", "pools", "refresh_tokens"]
+    assert client.get(ApiEndpoints.Pools.BASE, cookies={"jwt_access": "foreign"}).status_code == 401
+    assert paths(client)[3:] == ["pools"]
+
+
+# Асинхронный клиент на общей сессии повторяет запрос после того же single-flight обновления
+async def test_async_client_replays_after_renewal(make_client, emulator_app, emulator_clock):
+    client = make_client()
+    login(client)
+    renew_by_refresh(client)
+    emulator_clock.advance(61)
+    async_client = AsyncAPIClient(f"http://{uuid.uuid4().hex[:8]}.emulator/api/v2.0", session=client.session,
+                                  name="NODE_1", transport=EmulatorTransport(emulator_app), limiter=RateLimiter({}),
+                                  cache=ResponseCache(enabled=False))
+
+    async with async_client:
+        response = await async_client.get(ApiEndpoints.Pools.BASE)
+
+    assert response.status_code == 200
+    assert paths(client) == ["login", "refresh_tokens"]
@@ -0,0 +1,37 @@
+import httpx
+import pytest
+from framework.api.core.transcript import RequestTranscript
+from framework.api.resources.endpoints import ApiEndpoints
+from framework.api.utils.retry import RetryPolicy
+from .helpers import login
+
+
+# В журнале - последние запросы клиента с кодом ответа, cURL строится только при отрисовке
+def test_transcript_keeps_last_requests(make_client):
+    transcript = RequestTranscript(maxlen=2)
+    client = make_client(transcript=transcript)
+    login(client)
+    client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+    client.get(ApiEndpoints.Pools.BASE)
+
+    records = transcript.records()
+
+    assert [(record.method, record.status_code) for record in records] == [("GET", 200), ("GET", 200)]
+    assert records[-1].url.endswith("/pools")
+    assert all(record.elapsed is not None for record in records)
+    rendered = transcript.render()
+    assert rendered.startswith("[1] GET ") and "curl" in rendered and "/pools" in rendered
+
+
+# Запрос, упавший без ответа, остаётся в журнале без кода ответа - его можно приложить к упавшему тесту
+def test_transcript_records_failed_request(make_client):
+    transcript = RequestTranscript()
+    client = make_client(faults=[httpx.ConnectError("refused")], transcript=transcript,
+                         retry_policy=RetryPolicy(max_attempts=1))
+
+    with pytest.raises(httpx.ConnectError):
+        client.get(ApiEndpoints.Cluster.CLUSTER_INFO)
+
+    assert len(transcript) == 1
+    assert transcript.records()[0].status_code is None
+    assert "no response" in transcript.render()
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+import httpx
+from framework.api.resources.disks.cluster_diff import diff_disks
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.tools.cluster_tools import ClusterTools
+from framework.emulator.cluster import EmulatedCluster
+
+
+def disk(state="online", pools=(), **flags) -> dict:
+    return {"type": "HDD", "size": 1000, "state": state, "pools": list(pools), **flags}
+
+
+def before_disks() -> dict:
+    return {
+        "disk_1": disk(),
+        "disk_2": disk(),
+        "disk_3": disk(pools=["pool1"]),
+        "disk_4": disk(damaged=1),
+        "disk_5": disk(),
+    }
+
+
+# Новые и пропавшие диски, смена состояния и пулов, появление флагов damaged/removed
+def test_diff_detects_changes():
+    after = {
+        "disk_1": disk(),
+        "disk_2": disk(state="offline", damaged=1),
+        "disk_3": disk(pools=["pool2"]),
+        "disk_4": disk(damaged=1, removed=1),
+        "disk_6": disk(),
+    }
+
+    diff, disks = diff_disks(before_disks(), [after], 1, 2)
+
+    assert diff.added == ("disk_6",) and diff.removed == ("disk_5",)
+    assert diff.changed_disks == ("disk_2", "disk_3", "disk_4")
+    assert diff.state_changes() == {"disk_2": ("online", "offline")}
+    # disk_4 уже был damaged - новым стал только флаг removed
+    assert diff.flagged() == {"disk_2": ("damaged",), "disk_4": ("removed",)}
+    assert diff.joined_pools() == {"disk_3": ["pool2"]} and diff.left_pools() == {"disk_3": ["pool1"]}
+    assert diff.summary() == "v1 -> v2: 1 added, 1 removed, 3 changed, 1 joined pools, 1 left pools, 2 flagged"
+    assert list(disks) == list(after)
+
+
+# Неизменившиеся диски нового снимка - те же объекты, что в предыдущем; записи инвентаря тоже общие
+def test_unchanged_disks_are_shared():
+    before = before_disks()
+    container = {name: dict(data) for name, data in before.items()}
+    container["disk_2"]["state"] = "offline"
+
+    diff, disks = diff_disks(before, [container], 1, 2)
+    inventory = DiskInventory.from_disks(before)
+    updated = inventory.with_changes(disks, diff.changed_disks)
+
+    assert not diff.added and not diff.removed
+    assert disks["disk_1"] is before["disk_1"] and container["disk_1"] is before["disk_1"]
+    assert disks["disk_2"] is not before["disk_2"]
+    assert updated["disk_1"] is inventory["disk_1"]
+    assert updated["disk_2"] is not inventory["disk_2"] and updated["disk_2"]["state"] == "offline"
+    assert not diff_disks(disks, [dict(disks)], 2, 3)[0]
+
+
+# В истории ClusterTools - только непустые разницы, не больше CLUSTER_HISTORY_SIZE последних
+def test_history_is_bounded(monkeypatch):
+    monkeypatch.setenv("CLUSTER_HISTORY_SIZE", "2")
+    cluster = EmulatedCluster(disk_count=24, nodes=1)
+    client = SimpleNamespace(name="NODE_1",
+                             get=lambda endpoint: httpx.Response(200, content=cluster.cluster_info()))
+    tools = ClusterTools(SimpleNamespace(client=client))
+
+    tools.refresh()
+    for index in range(3):
+        cluster.create_pool({"name": f"pool{index}", "raid_type": "raid1", "auto_configure": True,
+                             "mainDisksCount": 2, "mainGroupsCount": 1})
+        tools.refresh()
+    tools.refresh()
+
+    history = tools.history()
+    assert [(diff.from_version, diff.to_version) for diff in history] == [(2, 3), (3, 4)]
+    assert history[-1].joined_pools() and all(pools == ["pool2"] for pools in history[-1].joined_pools().values())
@@ -0,0 +1,54 @@
+import json
+import pytest
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.utils.extractors import TestExtractor
+from framework.emulator.cluster import EmulatedCluster
+
+
+# Диск без поля used_as_wc свободен, как и раньше в TestExtractor
+def test_disk_without_used_as_wc_is_free():
+    inventory = DiskInventory.from_disks({
+        "disk_1": {"type": "HDD", "size": 1000, "pools": []},
+        "disk_2": {"type": "HDD", "size": 1000, "pools": [], "used_as_wc": 1},
+    })
+
+    assert inventory["disk_1"].is_free
+    assert inventory.free_disks() == ["disk_1"]
+    assert inventory.free_groups() == {(1000, "HDD"): ("disk_1",)}
+    assert inventory.free_for_wc() == ["disk_2"]
+
+
+# Инвентарь по clusterInfo эмулятора совпадает с его свободными дисками
+def test_inventory_matches_emulator():
+    cluster = EmulatedCluster(disk_count=48, nodes=2)
+    cluster.create_pool({"name": "pool1", "raid_type": "raid1", "auto_configure": True,
+                         "mainDisksCount": 2, "mainGroupsCount": 1})
+    disks = {name: disk for container in TestExtractor.find_disks(json.loads(cluster.cluster_info()))
+             for name, disk in container.items()}
+
+    inventory = DiskInventory.from_disks(disks)
+
+    assert len(inventory.free_disks()) == cluster.free_disk_count()
+    assert sorted(inventory.in_pool("pool1")) == sorted(cluster.get_pool("pool1")["props"]["disks"])
+
+
+# Группы собираются один раз до изменения инвентаря; с exclude пересобираются только затронутые группы
+def test_groups_are_shared_read_only_views():
+    inventory = DiskInventory.from_disks({
+        "hdd_1": {"type": "HDD", "size": 1000, "pools": []},
+        "hdd_2": {"type": "HDD", "size": 1000, "pools": []},
+        "ssd_1": {"type": "SSD", "size": 100, "pools": []},
+    })
+    groups = inventory.free_groups()
+
+    assert inventory.free_groups() is groups
+    with pytest.raises(TypeError):
+        groups[(1000, "HDD")] = ()
+    excluded = inventory.free_groups(exclude={"hdd_1", "unknown"})
+    assert excluded[(1000, "HDD")] == ("hdd_2",)
+    assert excluded[(100, "SSD")] is groups[(100, "SSD")]
+    assert inventory.free_groups(disk_type="SSD") == {(100, "SSD"): ("ssd_1",)}
+
+    inventory.add("hdd_1", {"type": "HDD", "size": 1000, "pools": ["pool1"]})
+
+    assert inventory.free_groups() == {(1000, "HDD"): ("hdd_2",), (100, "SSD"): ("ssd_1",)}
@@ -0,0 +1,55 @@
+import time
+import pytest
+from framework.api.resources.disks.disk_ledger import DiskLedger
+
+
+@pytest.fixture(params=[False, True], ids=['memory', 'shared'])
+def ledger(request, tmp_path, monkeypatch):
+    monkeypatch.setenv('API_SHARED_STATE_DIR', str(tmp_path))
+    return DiskLedger(enabled=True, shared=request.param)
+
+
+# Резерв атомарен: при конфликте с чужим резервом не резервируется ни один диск
+def test_claim_conflicts_reserve_nothing(ledger):
+    assert ledger.claim('test_a', ['disk_1', 'disk_2']) == []
+
+    assert ledger.claim('test_b', ['disk_2', 'disk_3']) == ['disk_2']
+    assert ledger.reserved_by_others('test_a') == set()
+    assert ledger.reserved_by_others('test_b') == {'disk_1', 'disk_2'}
+    assert ledger.claim('test_a', ['disk_2', 'disk_3']) == []
+
+
+# Удаление пула снимает только резервы, привязанные к нему
+def test_release_pool_keeps_other_reservations(ledger):
+    ledger.claim('test_a', ['disk_1', 'disk_2', 'disk_3'])
+    ledger.assign('test_a', ['disk_1', 'disk_2'], 'pool1')
+
+    ledger.release_pool('pool1')
+
+    assert ledger.reserved_by_others('test_b') == {'disk_3'}
+    ledger.release_owner('test_a')
+    assert ledger.reserved_by_others('test_b') == set()
+
+
+# Резерв, который никто не продлевает, истекает через API_DISK_LEASE
+def test_reservation_expires_without_renewal(ledger, monkeypatch):
+    monkeypatch.setenv('API_DISK_LEASE', '0.2')
+    ledger.claim('test_a', ['disk_1'])
+
+    time.sleep(0.3)
+
+    assert ledger.reserved_by_others('test_b') == set()
+    assert ledger.claim('test_b', ['disk_1']) == []
+
+
+# keep_alive продлевает резервы владельца дольше API_DISK_LEASE, пока блок выполняется
+def test_keep_alive_renews_reservations(ledger, monkeypatch):
+    monkeypatch.setenv('API_DISK_LEASE', '0.3')
+    ledger.claim('test_a', ['disk_1'])
+
+    with ledger.keep_alive('test_a'):
+        time.sleep(0.6)
+        assert ledger.reserved_by_others('test_b') == {'disk_1'}
+
+    time.sleep(0.4)
+    assert ledger.reserved_by_others('test_b') == set()
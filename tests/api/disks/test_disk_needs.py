@@ -0,0 +1,47 @@
+import threading
+import pytest
+from framework.api.resources.disks import disk_needs
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.resources.disks.disk_ledger import DiskLedger
+from framework.api.resources.disks.disk_needs import DiskNeeds, hold_disks
+
+
+def make_inventory() -> DiskInventory:
+    disks = {f"hdd_4t_{index}": {"type": "HDD", "size": 4000, "pools": []} for index in range(4)}
+    disks.update({f"hdd_8t_{index}": {"type": "HDD", "size": 8000, "pools": []} for index in range(6)})
+    disks.update({f"ssd_{index}": {"type": "SSD", "size": 480, "pools": []} for index in range(2)})
+    disks.update({f"ssd_wc_{index}": {"type": "SSD", "size": 480, "pools": [], "used_as_wc": 1} for index in range(2)})
+    return DiskInventory.from_disks(disks)
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    ledger = DiskLedger(enabled=True, shared=False)
+    monkeypatch.setattr(disk_needs, 'disk_ledger', ledger)
+    return ledger
+
+
+# Диски одного вида берутся из одной группы размера и типа: 5 HDD - из группы 8000, а не 4 + 1
+def test_pick_takes_each_kind_from_one_group():
+    picked = DiskNeeds(hdd=5, ssd=2, wc=2).pick(make_inventory())
+
+    assert sorted(picked) == sorted([f"hdd_8t_{index}" for index in range(5)]
+                                    + ["ssd_0", "ssd_1", "ssd_wc_0", "ssd_wc_1"])
+    assert DiskNeeds(hdd=7).pick(make_inventory()) is None
+    assert not DiskNeeds(hdd=7).is_possible(make_inventory())
+
+
+# hold_disks ждёт по журналу резервов, пока другой тест снимет резерв, и резервирует диски за собой
+def test_hold_disks_waits_for_release(ledger):
+    inventory = make_inventory()
+    ledger.claim('other test', [f"hdd_8t_{index}" for index in range(3)])
+    releaser = threading.Timer(0.2, ledger.release_owner, args=('other test',))
+    releaser.start()
+
+    picked = hold_disks(DiskNeeds(hdd=5), inventory, 'this test', timeout=5, interval=0.05)
+
+    releaser.join()
+    assert len(picked) == 5
+    assert set(picked) == ledger.held_by('this test')
+    with pytest.raises(TimeoutError):
+        hold_disks(DiskNeeds(hdd=5), inventory, 'other test', timeout=0.1, interval=0.05)
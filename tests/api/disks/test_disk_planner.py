@@ -0,0 +1,60 @@
+import pytest
+from framework.api.resources.disks.disk_inventory import DiskInventory
+from framework.api.resources.pools.disk_selection_strategies.planner import DiskPlanner, RoleRequest
+
+
+def make_inventory(*groups) -> DiskInventory:
+    """groups: (префикс, количество, тип, размер, used_as_wc)"""
+    return DiskInventory.from_disks({
+        f"{prefix}_{index}": {"type": disk_type, "size": size, "pools": [], "used_as_wc": used_as_wc}
+        for prefix, count, disk_type, size, used_as_wc in groups for index in range(count)
+    })
+
+
+# main не забирает группу, без которой не собрать spare того же размера и типа
+@pytest.mark.parametrize("objective", ["capacity", "first_fit"])
+def test_plan_keeps_group_for_spare(objective):
+    inventory = make_inventory(("small", 2, "SSD", 100, 0), ("big", 3, "SSD", 200, 0))
+    planner = DiskPlanner(inventory, objective=objective)
+
+    plan = planner.plan([RoleRequest("main", 2, disk_type="SSD"), RoleRequest("spare", 1, same_as="main")])
+
+    assert plan["main"].size == plan["spare"].size == 200
+    assert len(plan.disks()) == 3 and plan.disks() <= set(inventory.free_groups()[(200, "SSD")])
+    assert plan.consumed == 600
+
+
+# WRC берётся из дисков для write cache, RDC - из свободных, роли не делят диски одной группы
+def test_plan_assigns_cache_roles():
+    inventory = make_inventory(("hdd", 4, "HDD", 1000, 0), ("ssd", 3, "SSD", 100, 0), ("wc", 2, "SSD", 100, 1))
+    planner = DiskPlanner(inventory, objective="capacity")
+
+    plan = planner.plan([RoleRequest("main", 4, disk_type="HDD"), RoleRequest("wrc", 2, for_cache=True),
+                         RoleRequest("rdc", 2, disk_type="SSD"), RoleRequest("spare", 0, same_as="main")])
+
+    assert set(plan["wrc"].disks) == {"wc_0", "wc_1"}
+    assert set(plan["rdc"].disks) <= {"ssd_0", "ssd_1", "ssd_2"}
+    assert "spare" not in plan
+    assert len(plan.disks()) == 8
+
+
+# Если ролям не хватает дисков (с учётом exclude и уже созданных пулов) - None
+def test_plan_infeasible_returns_none():
+    inventory = make_inventory(("hdd", 4, "HDD", 1000, 0))
+    planner = DiskPlanner(inventory, exclude=["hdd_0"], objective="capacity")
+
+    assert planner.available(disk_type="HDD") == 3
+    assert planner.plan([RoleRequest("main", 4, disk_type="HDD")]) is None
+    plan = planner.plan([RoleRequest("main", 2, disk_type="HDD")])
+    assert "hdd_0" not in plan.disks()
+    assert planner.without(plan.disks()).plan([RoleRequest("main", 2, disk_type="HDD")]) is None
+
+
+# Неизвестная цель подбора и ссылка на несуществующую роль - ValueError
+def test_plan_rejects_invalid_requests():
+    inventory = make_inventory(("hdd", 4, "HDD", 1000, 0))
+
+    with pytest.raises(ValueError):
+        DiskPlanner(inventory, objective="fastest")
+    with pytest.raises(ValueError):
+        DiskPlanner(inventory, objective="capacity").plan([RoleRequest("spare", 1, same_as="main")])
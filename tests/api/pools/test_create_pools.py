@@ -1,7 +1,9 @@
+import asyncio
 import pytest
 
 from framework.api.core.logger import logger
 from framework.api.models.pool_models import PoolConfig
+from framework.api.resources.disks.disk_ledger import disk_ledger
 
 
 class TestCreatePools:
@@ -15,6 +17,17 @@ class TestCreatePools:
         logger.info(response)
 
 
+    @pytest.mark.nc
+    @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+    async def test_get_pools_async(self, async_framework_context):
+        pool_tools = async_framework_context.tools_manager.async_pool
+        responses = await asyncio.gather(*(pool_tools.get_pools() for _ in range(10)))
+
+        # Все параллельные запросы выполнены успешно
+        assert all(response.status_code == 200 for response in responses)
+        logger.info(responses[0].json())
+
+
     @pytest.mark.nc
     @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
     @pytest.mark.parametrize("keys_to_extract", [["name"]])
@@ -214,3 +227,74 @@ class TestCreatePools:
 
         pool_tools.cleanup()
 
+
+    @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+    def test_create_pool_matrix_in_waves(self, framework_context):
+        pool_tools = framework_context.tools_manager.pool
+        configs = [
+            PoolConfig(auto_configure=False, raid_type=raid_type, mainDisks=main_disks,
+                       wrcDisks=wrc_disks, rdcDisks=rdc_disks, spareDisks=spare_disks)
+            for raid_type, main_disks in (("raid5", 3), ("raid6", 4), ("raid7", 5))
+            for wrc_disks, rdc_disks, spare_disks in ((0, 0, 0), (2, 0, 0), (0, 1, 0), (0, 0, 1), (2, 2, 2))
+        ]
+
+        waves, created = [], []
+        for wave, results in pool_tools.run_waves(configs):
+            # Все пулы волны создаются одним пакетом и есть на кластере
+            assert [result.response.status_code for result in results] == [201] * len(wave)
+            names = [result.spec.path_params['pool_name'] for result in results]
+            assert set(names) <= {pool['name'] for pool in pool_tools.get_pools().json()['pools']}
+            waves.append(wave)
+            created.extend(names)
+
+        # Матрица укладывается в меньшее число волн, чем конфигураций, и каждая прогнана ровно один раз
+        assert len(waves) < len(configs)
+        assert sorted(key for wave in waves for key in wave.keys) == list(range(len(configs)))
+        # Пулы волн удалены с кластера после проверки
+        assert not set(created) & {pool['name'] for pool in pool_tools.get_pools().json()['pools']}
+
+    @pytest.mark.pool_matrix(auto_configure=False, raid_type="raid5", mainDisks=[3, 100000], spareDisks=[0, 1])
+    @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+    def test_create_pool_from_matrix(self, framework_context, pool_config):
+        # Конфигурации с mainDisks=100000 не помещаются на кластер и не генерируются
+        assert pool_config.mainDisks == 3
+
+        pool_tools = framework_context.tools_manager.pool
+        pool_tools.configure(pool_config)
+        response = pool_tools.create()
+        assert response['status'] == "created"
+
+        pool_tools.cleanup()
+
+    @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+    @pytest.mark.parametrize("pool_config", [
+        PoolConfig(auto_configure=False, raid_type="raid6", mainDisks=100000),
+    ])
+    def test_infeasible_pool_config_skipped(self, framework_context, pool_config):
+        pytest.fail("Test must be skipped at collection: the cluster has fewer disks than pool_config requires")
+
+    @pytest.mark.needs_disks(hdd=2, ssd=1)
+    @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+    def test_needs_disks_reserves_disks(self, framework_context, disk_needs):
+        # Тест допущен с зарезервированными за ним дисками - другие тесты их не выберут
+        assert len(disk_needs) == 3
+        assert set(disk_needs) <= disk_ledger.reserved_by_others("another test")
+
+    @pytest.mark.needs_disks(hdd=7, size=8000 * 1024 ** 3)
+    @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+    def test_pool_uses_reserved_disks(self, framework_context, disk_needs):
+        pool_tools = framework_context.tools_manager.pool
+        pool_tools.configure(PoolConfig(auto_configure=False, raid_type="raid7", mainDisks=5, spareDisks=2))
+        response = pool_tools.create()
+        assert response['status'] == "created"
+
+        # Пул собран из дисков, зарезервированных за тестом, а не из меньших свободных дисков кластера
+        props = pool_tools.get_pool_by_name(pool_tools.current_pool['name'])['props']
+        assert set(props['disks']) | set(props['spare']) == set(disk_needs)
+
+        pool_tools.cleanup()
+
+    @pytest.mark.needs_disks(hdd=100000)
+    @pytest.mark.parametrize("base_url", ["NODE_1"], indirect=True)
+    def test_needs_disks_skips_impossible(self, framework_context):
+        pytest.fail("Test must be skipped: the cluster has fewer disks than needs_disks requires")